@@ -18,6 +18,9 @@
 # VARIABLES DE ENTORNO REQUERIDAS (si no se pasa DATABASE_URL):
 #   - DATABASE_URL: URL de conexión a PostgreSQL
 #
+# VARIABLES DE ENTORNO OPCIONALES:
+#   - SEEDS_COPY=1: cargar los seeds compilados a COPY por scripts/seed_copy.py
+#
 # ============================================================================
 
 set -e  # Exit on error
@@ -475,6 +478,12 @@ log "FASE 16: SEED DATA - Carga de Datos Iniciales (PROD)"
 log "============================================================================"
 
 SEEDS_DIR="$SCRIPT_DIR/seeds/prod"
+if [ "${SEEDS_COPY:-0}" = "1" ]; then
+    # INSERT fila por fila → bloques COPY; solo se recompilan los seeds que cambiaron
+    python3 "$SCRIPT_DIR/scripts/seed_copy.py" --env prod --quiet
+    SEEDS_DIR="$SCRIPT_DIR/scripts/.cache/seeds-copy/prod"
+    log "Seeds compilados a COPY: $SEEDS_DIR"
+fi
 
 # Orden correcto respetando dependencias:
 
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escalabilidad de validate_integrity.py sobre árboles sintéticos
+
+Para cada tamaño genera (o reutiliza) un árbol con ddl_synth.py y lo mide en
+un proceso aparte, de modo que el pico de RSS corresponde solo a esa corrida.
+Registra el tiempo total, la carga del corpus (lectura + tokenizado), la
+construcción de índices y cada validador, con su throughput en archivos/s y
+MB/s. Los resultados pueden guardarse como baseline y compararse contra ella
+para detectar regresiones.
+
+Uso:
+    python3 scripts/bench_integrity.py                          # 500, 2000, 10000 archivos
+    python3 scripts/bench_integrity.py --sizes 485,50000 --fk-density 3
+    python3 scripts/bench_integrity.py --save-baseline           # registrar baseline
+    python3 scripts/bench_integrity.py --compare                 # falla si hay regresiones
+Fecha: 2025-11-10
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from dataclasses import asdict
+from pathlib import Path
+
+from ddl_synth import SynthParams, generate_tree
+from profiling import timed
+
+DEFAULT_SIZES = "500,2000,10000"
+# Versionada junto al código para que --compare funcione en cualquier clon y en CI
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "bench_baseline.json"
+DEFAULT_WORKDIR = Path(tempfile.gettempdir()) / "gamilit-ddl-bench"
+
+# Una fase es regresión si tarda más que baseline * (1 + tolerancia) y al menos
+# MIN_REGRESSION_SECONDS más (evita falsos positivos en fases de milisegundos)
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def measure(tree: Path, jobs: int) -> dict:
+    """Mide una corrida completa sobre `tree` (se ejecuta en el proceso hijo)"""
+    from concurrent.futures import ProcessPoolExecutor
+    from ddl_corpus import load_corpus
+    from validate_integrity import build_validations
+
+    phases = {}
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        with timed("load_corpus") as stats:
+            corpus = load_corpus(tree, executor, jobs)
+        phases[stats.name] = stats.wall
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    with timed("build_indexes") as stats:
+        validations, _, _, _ = build_validations(corpus)
+    phases[stats.name] = stats.wall
+
+    issues = 0
+    for validator, *args in validations:
+        with timed(validator.__name__) as stats, redirect_stdout(io.StringIO()):
+            issues += len(validator(*args))
+        phases[stats.name] = stats.wall
+
+    return {
+        "files": len(corpus.files),
+        "bytes": sum(len(sql_file.content.encode()) for sql_file in corpus.files),
+        "issues": issues,
+        "wall": time.perf_counter() - started,
+        "cpu": time.process_time() - cpu_started,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "phases": phases,
+    }
+
+
+def run_size(files: int, args) -> dict:
+    params = SynthParams(files, args.fk_density, args.function_size, args.broken_rate, args.seed)
+    tree = args.workdir / f"synth-{files}-fk{args.fk_density}-fn{args.function_size}-s{args.seed}"
+    t = time.perf_counter()
+    generate_tree(tree, params)
+    generated = time.perf_counter() - t
+
+    child = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--measure", str(tree), "--jobs", str(args.jobs)],
+        capture_output=True, text=True, check=True,
+    )
+    result = json.loads(child.stdout)
+    result["params"] = asdict(params)
+    result["generate"] = generated
+    return result
+
+
+def print_result(result: dict):
+    mb = result["bytes"] / 1e6
+    print(f"\n{result['files']} archivos, {mb:.1f} MB, {result['issues']} issues "
+          f"(generado en {result['generate']:.1f}s)")
+    print(f"  total: {result['wall']:.3f}s wall, {result['cpu']:.3f}s CPU, "
+          f"pico RSS {result['peak_rss_kb'] / 1024:.0f} MB")
+    print(f"  {'fase':<30} {'segundos':>10} {'archivos/s':>12} {'MB/s':>10}")
+    for phase, seconds in result["phases"].items():
+        rate = result["files"] / seconds if seconds else float("inf")
+        throughput = mb / seconds if seconds else float("inf")
+        print(f"  {phase:<30} {seconds:>10.4f} {rate:>12.0f} {throughput:>10.1f}")
+
+
+def compare(results, baseline, tolerance):
+    """Regresiones (fase, archivos, segundos baseline, segundos actuales)"""
+    regressions = []
+    previous = {run["files"]: run for run in baseline.get("runs", [])}
+    for result in results:
+        base = previous.get(result["files"])
+        if base is None or base.get("params") != result["params"]:
+            continue
+        timings = dict(result["phases"], wall=result["wall"])
+        base_timings = dict(base["phases"], wall=base["wall"])
+        for phase, seconds in timings.items():
+            before = base_timings.get(phase)
+            if before is None:
+                continue
+            if seconds > before * (1 + tolerance) and seconds - before > MIN_REGRESSION_SECONDS:
+                regressions.append((phase, result["files"], before, seconds))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de validate_integrity.py sobre árboles sintéticos")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Tamaños en archivos separados por comas (default: {DEFAULT_SIZES})")
+    parser.add_argument("--fk-density", type=float, default=SynthParams.fk_density,
+                        help=f"FKs promedio por tabla (default: {SynthParams.fk_density})")
+    parser.add_argument("--function-size", type=int, default=SynthParams.function_size,
+                        help=f"Sentencias por cuerpo de función (default: {SynthParams.function_size})")
+    parser.add_argument("--broken-rate", type=float, default=SynthParams.broken_rate,
+                        help=f"Fracción de referencias a objetos inexistentes (default: {SynthParams.broken_rate})")
+    parser.add_argument("--seed", type=int, default=SynthParams.seed,
+                        help=f"Semilla del generador: misma semilla, mismo árbol (default: {SynthParams.seed})")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Procesos para el parseo (default: 1)")
+    parser.add_argument("--workdir", type=Path, default=DEFAULT_WORKDIR,
+                        help=f"Dónde generar los árboles (se reutilizan entre corridas; default: {DEFAULT_WORKDIR})")
+    parser.add_argument("--output", type=Path, help="Guardar los resultados en JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                        help=f"Archivo de baseline (default: {DEFAULT_BASELINE})")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar los resultados como baseline")
+    parser.add_argument("--compare", action="store_true", help="Comparar contra la baseline (código 1 si hay regresiones)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Margen antes de considerar regresión (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument("--measure", type=Path, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.jobs)))
+        return 0
+
+    args.workdir.mkdir(parents=True, exist_ok=True)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    print(f"Benchmark de validate_integrity.py (fk-density={args.fk_density}, "
+          f"function-size={args.function_size}, jobs={args.jobs}, cpus={os.cpu_count()})")
+
+    results = []
+    for files in sizes:
+        result = run_size(files, args)
+        print_result(result)
+        results.append(result)
+
+    report = {"python": sys.version.split()[0], "cpus": os.cpu_count(), "runs": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"\n✓ Baseline guardada en {args.baseline}")
+
+    if args.compare:
+        if not args.baseline.exists():
+            print(f"\nNo existe baseline en {args.baseline} (usar --save-baseline)")
+            return 1
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for phase, files, before, after in regressions:
+            print(f"[REGRESIÓN] {phase} con {files} archivos: {before:.3f}s -> {after:.3f}s")
+        if regressions:
+            return 1
+        print("\n✓ Sin regresiones respecto a la baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
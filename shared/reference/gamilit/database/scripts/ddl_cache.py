@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Caché incremental de extracciones DDL para validate_integrity.py
+
+Guarda en disco, por archivo, lo extraído por ddl_corpus.extract_facts (tablas,
+ENUMs, REFERENCES, funciones, EXECUTE de triggers) indexado por hash de
+contenido y versión del parser. Incluye además la detección de cambios contra
+una revisión de git para el modo --since.
+Fecha: 2025-11-07
+"""
+
+import json
+import os
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, Optional, Set
+
+from ddl_corpus import DDLCorpus, SqlFile, defined_objects, schema_of
+from ddl_parser import PARSER_VERSION, extract_facts
+
+DEFAULT_CACHE_FILE = Path(__file__).resolve().parent / ".cache" / "validate_integrity.json"
+
+
+class FactsCache:
+    """Extracciones por archivo indexadas por sha256 del contenido"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_FILE):
+        self.path = Path(path)
+        self.entries: Dict[str, dict] = {}
+        self.used: Set[str] = set()
+        self.hits = 0
+
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                data = {}
+            if data.get("parser_version") == PARSER_VERSION:
+                self.entries = data.get("entries", {})
+
+    @staticmethod
+    def key(sql_file: SqlFile) -> str:
+        return sql_file.digest
+
+    def get(self, sql_file: SqlFile) -> Optional[dict]:
+        key = self.key(sql_file)
+        facts = self.entries.get(key)
+        if facts is not None:
+            self.used.add(key)
+            self.hits += 1
+        return facts
+
+    def put(self, sql_file: SqlFile, facts: dict):
+        key = self.key(sql_file)
+        self.entries[key] = facts
+        self.used.add(key)
+
+    def save(self):
+        """Escribe de forma atómica solo las entradas usadas en esta ejecución"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "parser_version": PARSER_VERSION,
+            "entries": {key: self.entries[key] for key in sorted(self.used)},
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".tmp-", suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+
+# MODO --since <git-rev>
+@dataclass(frozen=True)
+class ChangeScope:
+    """Archivos cambiados y objetos afectados; limita los issues reportados"""
+    files: FrozenSet[str]
+    objects: FrozenSet[str]
+
+    def covers(self, issue) -> bool:
+        return issue["file"] in self.files or issue.get("object") in self.objects
+
+    def filter(self, issues):
+        return [issue for issue in issues if self.covers(issue)]
+
+
+def _git(args, cwd: Path) -> str:
+    try:
+        result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", "") or str(e)
+        raise SystemExit(f"git {' '.join(args)} falló: {stderr.strip()}")
+    return result.stdout
+
+
+def git_toplevel(path: Path) -> Path:
+    return Path(_git(["rev-parse", "--show-toplevel"], path).strip())
+
+
+def changed_paths(base_path: Path, rev: str) -> Set[Path]:
+    """Archivos .sql bajo base_path que difieren de `rev` (incluye borrados y no versionados)"""
+    base_path = Path(base_path).resolve()
+    top = git_toplevel(base_path)
+    names = _git(["diff", "--name-only", rev, "--", str(base_path)], top).splitlines()
+    names += _git(["ls-files", "--others", "--exclude-standard", "--", str(base_path)], top).splitlines()
+    return {top / name for name in names if name.endswith(".sql")}
+
+
+def previous_facts(path: Path, top: Path, rev: str) -> Optional[dict]:
+    """Extracción del archivo tal como estaba en `rev` (None si no existía)"""
+    try:
+        content = subprocess.run(
+            ["git", "show", f"{rev}:{path.relative_to(top).as_posix()}"],
+            cwd=top, capture_output=True, text=True, check=True,
+        ).stdout
+    except subprocess.CalledProcessError:
+        return None
+    return extract_facts(content)
+
+
+def change_scope(corpus: DDLCorpus, rev: str, graph=None) -> ChangeScope:
+    """Archivos cambiados desde `rev`, objetos que definían antes o definen ahora y,
+    con el DDLGraph del corpus, todos sus dependientes (FKs, vistas, triggers...)"""
+    base_path = corpus.base_path.resolve()
+    changed = changed_paths(base_path, rev)
+    top = git_toplevel(base_path)
+
+    files = set()
+    objects = set()
+    for sql_file in corpus.files:
+        if sql_file.path.resolve() in changed:
+            files.add(str(sql_file.path))
+            objects |= defined_objects(sql_file.facts, sql_file.schema)
+
+    for path in changed:
+        if not path.exists():
+            files.add(str(path))
+        facts = previous_facts(path, top, rev)
+        if facts is not None:
+            objects |= defined_objects(facts, schema_of(path, base_path))
+
+    if graph is not None:
+        # Como en --watch: lo que depende de un objeto cambiado puede haberse roto
+        changed = {node_id for node_id, node in graph.nodes.items()
+                   if node.file in files or files.intersection(node.also_defined_in) or node.name in objects}
+        for node_id in graph.transitive_dependents(changed):
+            node = graph.nodes[node_id]
+            files.add(node.file)
+            objects.add(node.name)
+
+    return ChangeScope(files=frozenset(files), objects=frozenset(objects))
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Corpus DDL compartido para los validadores de integridad de GAMILIT
+
+Recorre el árbol ddl/ una sola vez, lee cada archivo una sola vez y deja en
+memoria un índice de archivos, schemas y objetos extraídos que consumen todos
+los validadores de validate_integrity.py.
+Fecha: 2025-11-07
+"""
+
+import fnmatch
+import hashlib
+from bisect import insort
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+from ddl_parser import extract_facts
+
+PREREQUISITES_FILE = "00-prerequisites.sql"
+
+# Archivos fuera del layout schemas/<schema>/<tipo>/ (p. ej. un 00-init.sql
+# monolítico o scripts de políticas en docs/): pueden definir cualquier objeto
+MIXED_KIND = "*"
+
+DEFAULT_INCLUDE = ("**/*.sql",)
+
+# Bytes leídos de disco (validate_integrity.py lo registra como contador de profiling)
+bytes_read = 0
+
+
+@dataclass
+class SqlFile:
+    """Un archivo .sql del corpus con su contenido y los objetos extraídos"""
+    path: Path
+    schema: str
+    kind: str
+    content: str
+    is_prerequisites: bool = False
+    live: bool = True
+    facts: Dict[str, list] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+    @cached_property
+    def digest(self) -> str:
+        return hashlib.sha256(self.content.encode()).hexdigest()
+
+
+@dataclass
+class DDLCorpus:
+    """Índice en memoria del árbol ddl/ (archivos, schemas y objetos)"""
+    base_path: Path
+    files: List[SqlFile] = field(default_factory=list)
+    by_path: Dict[Path, SqlFile] = field(default_factory=dict)
+    by_kind: Dict[str, List[SqlFile]] = field(default_factory=dict)
+    schemas: List[str] = field(default_factory=list)
+    parsed_count: int = 0
+    include: Sequence[str] = DEFAULT_INCLUDE
+
+    @property
+    def schemas_path(self) -> Path:
+        return self.base_path / "schemas"
+
+    @property
+    def prerequisites(self) -> Optional[SqlFile]:
+        return self.by_path.get(self.base_path / PREREQUISITES_FILE)
+
+    def get(self, path: Path) -> Optional[SqlFile]:
+        return self.by_path.get(Path(path))
+
+    def of_kind(self, *kinds: str) -> List[SqlFile]:
+        """Archivos cuyo directorio padre es alguno de `kinds` (tables, enums,
+        functions...) más los archivos mixtos, en orden de path"""
+        selected = [sql_file for kind in kinds + (MIXED_KIND,) for sql_file in self.by_kind.get(kind, [])]
+        if len(kinds) > 1 or self.by_kind.get(MIXED_KIND):
+            selected.sort(key=lambda f: f.path)
+        return selected
+
+    def includes(self, path: Path) -> bool:
+        """True si `path` entra en los patrones `include` del corpus"""
+        relative = Path(path).relative_to(self.base_path).as_posix()
+        return any(fnmatch.fnmatchcase(relative, pattern) or fnmatch.fnmatchcase(relative, pattern.replace("**/", ""))
+                   for pattern in self.include)
+
+    def add(self, sql_file: SqlFile):
+        self.files.append(sql_file)
+        self.by_path[sql_file.path] = sql_file
+        self.by_kind.setdefault(sql_file.kind, []).append(sql_file)
+
+    def discard(self, path: Path) -> Optional[SqlFile]:
+        """Quita un archivo del índice (devuelve el que había, si había)"""
+        sql_file = self.by_path.pop(Path(path), None)
+        if sql_file is not None:
+            self.files.remove(sql_file)
+            self.by_kind[sql_file.kind].remove(sql_file)
+        return sql_file
+
+    def replace(self, sql_file: SqlFile):
+        """Agrega o reemplaza un archivo conservando el orden por path"""
+        self.discard(sql_file.path)
+        by_path = lambda f: f.path
+        insort(self.files, sql_file, key=by_path)
+        insort(self.by_kind.setdefault(sql_file.kind, []), sql_file, key=by_path)
+        self.by_path[sql_file.path] = sql_file
+
+
+def schema_of(path: Path, base_path: Path) -> str:
+    """Schema al que pertenece un archivo según su ruta (ddl/schemas/<schema>/...)"""
+    parts = path.relative_to(base_path).parts
+    if len(parts) > 2 and parts[0] == "schemas":
+        return parts[1]
+    return "public"
+
+
+def is_live(path: Path, base_path: Path) -> bool:
+    """False para archivos fuera del build (_deprecated/, _migrations/, tests/)"""
+    parts = path.relative_to(base_path).parts[:-1]
+    return not any(part.startswith("_") or part == "tests" for part in parts)
+
+
+def kind_of(path: Path, base_path: Path) -> str:
+    """Tipo de objetos de un archivo: su directorio en schemas/<schema>/<tipo>/,
+    o MIXED_KIND si está fuera de ese layout (salvo prerequisites y archivos
+    fuera del build, que conservan el nombre de su directorio)"""
+    parts = path.relative_to(base_path).parts
+    if (len(parts) > 3 and parts[0] == "schemas") or parts == (PREREQUISITES_FILE,) or not is_live(path, base_path):
+        return path.parent.name
+    return MIXED_KIND
+
+
+def qualify(name: str, schema: str) -> str:
+    """Agrega el schema a un nombre sin calificar"""
+    return name if "." in name else f"{schema}.{name}"
+
+
+def defined_objects(facts: Dict[str, list], schema: str) -> Set[str]:
+    """Nombres de los objetos (tablas, ENUMs, funciones) que define un archivo"""
+    objects = set()
+    for table_name, _ in facts.get("tables", []):
+        objects.add(qualify(table_name, schema))
+    for enum_name, _, _ in facts.get("enums", []):
+        full_name = qualify(enum_name, schema)
+        objects.update({full_name, full_name.split(".", 1)[1]})
+    for func_name, _ in facts.get("functions", []):
+        objects.update({func_name, qualify(func_name, schema)})
+    return objects
+
+
+def read_file(path: Path, base_path: Path) -> SqlFile:
+    """Lee un archivo del corpus (sin extraer todavía sus objetos)"""
+    global bytes_read
+    data = path.read_bytes()
+    bytes_read += len(data)
+    return SqlFile(
+        path=path,
+        schema=schema_of(path, base_path),
+        kind=kind_of(path, base_path),
+        content=data.decode().replace("\r\n", "\n").replace("\r", "\n"),  # como read_text()
+        is_prerequisites=(path == base_path / PREREQUISITES_FILE),
+        live=is_live(path, base_path),
+    )
+
+
+def load_corpus(base_path: Path, executor: Optional[Executor] = None, jobs: int = 1, cache=None,
+                include: Sequence[str] = DEFAULT_INCLUDE) -> DDLCorpus:
+    """Recorre ddl/ una sola vez y construye el índice compartido
+
+    Si se recibe un `executor` (con `jobs` workers), la extracción por archivo
+    se reparte entre sus procesos; el índice conserva el orden de los paths.
+    Con una `cache` (ver ddl_cache.FactsCache) solo se re-parsean los archivos
+    cuyo contenido cambió desde la última ejecución. `include` son patrones
+    glob relativos a `base_path` (default: todos los .sql del árbol).
+    """
+    base_path = Path(base_path)
+    corpus = DDLCorpus(base_path=base_path, include=tuple(include))
+
+    paths = {path for pattern in include for path in base_path.glob(pattern)}
+    for path in sorted(paths):
+        if path.is_file():
+            corpus.add(read_file(path, base_path))
+
+    pending = []
+    for sql_file in corpus.files:
+        facts = cache.get(sql_file) if cache is not None else None
+        if facts is None:
+            pending.append(sql_file)
+        else:
+            sql_file.facts = facts
+
+    contents = [sql_file.content for sql_file in pending]
+    if executor is None or len(pending) < 2:
+        extracted = map(extract_facts, contents)
+    else:
+        extracted = executor.map(extract_facts, contents, chunksize=max(1, len(pending) // (jobs * 4)))
+
+    for sql_file, facts in zip(pending, extracted):
+        sql_file.facts = facts
+        if cache is not None:
+            cache.put(sql_file, facts)
+
+    corpus.parsed_count = len(pending)
+    corpus.schemas = sorted({sql_file.schema for sql_file in corpus.files})
+    return corpus
+
+
+def reload_files(corpus: DDLCorpus, paths, cache=None) -> Dict[Path, Optional[SqlFile]]:
+    """Vuelve a leer `paths` en un corpus ya cargado (modo --watch)
+
+    Los archivos borrados se quitan del índice. Devuelve, por path, la versión
+    anterior del archivo (None si es nuevo) para calcular qué objetos cambiaron.
+    """
+    previous = {}
+    for path in sorted(Path(p) for p in paths):
+        if path not in corpus.by_path and not corpus.includes(path):
+            continue
+        if path.is_file():
+            sql_file = read_file(path, corpus.base_path)
+            facts = cache.get(sql_file) if cache is not None else None
+            if facts is None:
+                facts = extract_facts(sql_file.content)
+                if cache is not None:
+                    cache.put(sql_file, facts)
+            sql_file.facts = facts
+            previous[path] = corpus.get(path)
+            corpus.replace(sql_file)
+        else:
+            previous[path] = corpus.discard(path)
+    corpus.schemas = sorted({sql_file.schema for sql_file in corpus.files})
+    return previous
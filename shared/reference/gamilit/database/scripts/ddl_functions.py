@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Análisis de volatilidad, paralelismo e inlining de las funciones del DDL de GAMILIT
+
+Compara lo que cada función declara (IMMUTABLE/STABLE/VOLATILE, PARALLEL,
+LANGUAGE, SECURITY DEFINER, SET) con lo que hace su cuerpo (tablas que lee o
+escribe, funciones que llama, CURRENT_TIMESTAMP y similares, SQL dinámico) y
+con dónde se usa (índices, policies, vistas):
+
+- volatilidad más estricta de lo que el cuerpo permite (IMMUTABLE que lee la
+  hora o tablas, STABLE que escribe): resultados incorrectos o errores,
+- volatilidad más laxa de lo necesario (VOLATILE por omisión): impide usar
+  índices, el caché de planes y el initplan en policies,
+- funciones usadas en índices que no son IMMUTABLE (CREATE INDEX falla) y
+  funciones VOLATILE en policies,
+- plpgsql de un solo RETURN o SELECT ... INTO + RETURN que, como LANGUAGE sql,
+  el planner podría inlinear,
+- funciones seguras para consultas paralelas sin PARALLEL SAFE.
+
+Uso:
+    python3 scripts/ddl_functions.py                        # reporte por función
+    python3 scripts/ddl_functions.py --function gamilit.now_mexico
+Fecha: 2025-11-10
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+from ddl_corpus import DDLCorpus, SqlFile, qualify
+from ddl_graph import DDLGraph, search_path_of
+
+# Tipos de hallazgo
+TOO_STRICT = "FUNC_VOLATILITY_TOO_STRICT"
+TOO_LAX = "FUNC_VOLATILITY_TOO_LAX"
+INDEX_NOT_IMMUTABLE = "FUNC_INDEX_NOT_IMMUTABLE"
+POLICY_VOLATILE = "FUNC_POLICY_VOLATILE"
+INLINABLE = "FUNC_INLINABLE"
+PARALLEL_SAFE = "FUNC_PARALLEL_SAFE"
+
+VOLATILITY_ORDER = {"IMMUTABLE": 0, "STABLE": 1, "VOLATILE": 2}
+
+# Volatilidad de funciones del sistema que no son IMMUTABLE (las demás se asumen IMMUTABLE)
+BUILTIN_VOLATILITY = {
+    "now": "STABLE", "current_setting": "STABLE", "statement_timestamp": "STABLE",
+    "transaction_timestamp": "STABLE", "age": "STABLE", "to_char": "STABLE", "date_trunc": "STABLE",
+    "to_timestamp": "STABLE", "unaccent": "STABLE", "current_schemas": "STABLE", "has_table_privilege": "STABLE",
+    "clock_timestamp": "VOLATILE", "timeofday": "VOLATILE", "random": "VOLATILE", "gen_random_uuid": "VOLATILE",
+    "uuid_generate_v4": "VOLATILE", "nextval": "VOLATILE", "currval": "VOLATILE", "setval": "VOLATILE",
+    "lastval": "VOLATILE", "set_config": "VOLATILE", "pg_notify": "VOLATILE", "pg_sleep": "VOLATILE",
+    "pg_advisory_lock": "VOLATILE", "pg_advisory_xact_lock": "VOLATILE", "txid_current": "VOLATILE",
+}
+
+# Funciones del sistema que no pueden ejecutarse en un worker paralelo
+PARALLEL_UNSAFE_BUILTINS = {"nextval", "currval", "setval", "lastval", "set_config", "pg_notify",
+                            "pg_advisory_lock", "pg_advisory_xact_lock", "txid_current"}
+
+# Dónde se usa una función, según el tipo del objeto que la llama
+USAGE_KINDS = {"index": "índices", "policy": "policies", "view": "vistas", "materialized_view": "vistas materializadas"}
+
+
+@dataclass
+class FunctionDef:
+    """Una definición (CREATE FUNCTION) con lo que declara y lo que hace su cuerpo"""
+    name: str
+    file: str
+    line: int
+    attrs: dict
+    reasons: Dict[str, List[str]] = field(default_factory=lambda: defaultdict(list))  # volatilidad -> motivos
+    unknown: List[str] = field(default_factory=list)          # motivos por los que no se puede inferir
+    parallel_blockers: List[str] = field(default_factory=list)
+    used_in: Dict[str, List[str]] = field(default_factory=lambda: defaultdict(list))  # tipo -> objetos
+
+    @property
+    def declared(self) -> str:
+        return self.attrs.get("volatility", "VOLATILE")
+
+    @property
+    def required(self) -> str:
+        """Volatilidad mínima que admite el cuerpo"""
+        if self.reasons.get("VOLATILE"):
+            return "VOLATILE"
+        return "STABLE" if self.reasons.get("STABLE") else "IMMUTABLE"
+
+    @property
+    def is_trigger(self) -> bool:
+        return (self.attrs.get("returns") or "").lower() in ("trigger", "event_trigger")
+
+
+@dataclass
+class FunctionFinding:
+    kind: str
+    severity: str
+    function: FunctionDef
+    message: str
+
+
+def _builtin(name: str) -> str:
+    return name[len("pg_catalog."):] if name.startswith("pg_catalog.") else name
+
+
+def _analyze(sql_file: SqlFile, obj: dict, graph: DDLGraph, search_path: List[str]) -> FunctionDef:
+    name = qualify(obj["name"], sql_file.schema)
+    function = FunctionDef(name, str(sql_file.path), obj["line"], obj)
+    if obj.get("dynamic_sql"):
+        function.unknown.append("SQL dinámico (EXECUTE)")
+    if obj.get("session_keywords"):
+        function.reasons["STABLE"].append("usa CURRENT_TIMESTAMP/CURRENT_USER o similares")
+    for label, target, _ in obj["deps"]:
+        if label == "writes":
+            function.reasons["VOLATILE"].append(f"escribe en {target}")
+            function.parallel_blockers.append(f"escribe en {target}")
+        elif label == "refreshes":
+            function.reasons["VOLATILE"].append(f"refresca {target}")
+            function.parallel_blockers.append(f"refresca {target}")
+        elif label == "reads":
+            function.reasons["STABLE"].append(f"lee {target}")
+        elif label == "calls":
+            node_id = graph.resolve(target, ("function",), search_path)
+            if node_id is not None:
+                if node_id == f"function:{name}":
+                    continue
+                callee = graph.nodes[node_id].data
+                volatility = callee.get("volatility", "VOLATILE")
+                if callee.get("parallel", "UNSAFE") != "SAFE":
+                    function.parallel_blockers.append(f"llama a {graph.nodes[node_id].name} (PARALLEL "
+                                                      f"{callee.get('parallel', 'UNSAFE')})")
+                if volatility != "IMMUTABLE":
+                    function.reasons[volatility].append(f"llama a {graph.nodes[node_id].name} ({volatility})")
+            else:
+                builtin = _builtin(target)
+                if builtin in BUILTIN_VOLATILITY:
+                    volatility = BUILTIN_VOLATILITY[builtin]
+                    function.reasons[volatility].append(f"llama a {builtin}() ({volatility})")
+                if builtin in PARALLEL_UNSAFE_BUILTINS:
+                    function.parallel_blockers.append(f"llama a {builtin}()")
+    return function
+
+
+def collect_functions(corpus: DDLCorpus, graph: DDLGraph) -> List[FunctionDef]:
+    """Funciones del build (la última definición de cada firma) con su cuerpo analizado y sus usos"""
+    definitions: Dict[tuple, FunctionDef] = {}
+    for sql_file in corpus.files:
+        if not sql_file.live:
+            continue
+        search_path = search_path_of(sql_file)
+        for obj in sql_file.facts["objects"]:
+            if obj["kind"] == "function":
+                function = _analyze(sql_file, obj, graph, search_path)
+                definitions[(function.name, " ".join(obj.get("args", "").lower().split()))] = function
+    functions = list(definitions.values())
+
+    for function in functions:
+        node_id = f"function:{function.name}"
+        for dependent, edge in graph.dependents.get(node_id, {}).items():
+            node = graph.nodes[dependent]
+            if "calls" in edge.labels and node.kind in USAGE_KINDS:
+                function.used_in[node.kind].append(node.name)
+    return functions
+
+
+def _usage(function: FunctionDef) -> str:
+    return ", ".join(f"{len(names)} {USAGE_KINDS[kind]}" for kind, names in sorted(function.used_in.items()))
+
+
+def _reasons(function: FunctionDef, volatility: str) -> str:
+    reasons = function.reasons.get(volatility, [])
+    return "; ".join(reasons[:3]) + (f" (+{len(reasons) - 3})" if len(reasons) > 3 else "")
+
+
+def analyze_functions(functions: List[FunctionDef]) -> List[FunctionFinding]:
+    findings = []
+    for function in functions:
+        findings += _volatility_findings(function)
+        findings += _inlining_findings(function)
+        findings += _parallel_findings(function)
+    return findings
+
+
+def _volatility_findings(function: FunctionDef) -> List[FunctionFinding]:
+    findings = []
+    declared, required = function.declared, function.required
+    used = _usage(function)
+
+    if function.used_in.get("index") and declared != "IMMUTABLE":
+        findings.append(FunctionFinding(
+            INDEX_NOT_IMMUTABLE, "CRÍTICO", function,
+            f"{function.name} se usa en índices ({', '.join(function.used_in['index'])}) pero es {declared}: "
+            f"CREATE INDEX exige IMMUTABLE"))
+    if function.used_in.get("policy") and declared == "VOLATILE":
+        findings.append(FunctionFinding(
+            POLICY_VOLATILE, "MEDIO", function,
+            f"{function.name} es VOLATILE y se usa en {len(function.used_in['policy'])} policies: "
+            f"se evalúa por fila y no puede usarse en un índice ni envolverse como initplan"))
+
+    if function.unknown:
+        return findings
+    if VOLATILITY_ORDER[declared] < VOLATILITY_ORDER[required]:
+        findings.append(FunctionFinding(
+            TOO_STRICT, "ALTO", function,
+            f"{function.name} se declara {declared} pero su cuerpo requiere {required}: {_reasons(function, required)}"))
+    elif (declared == "VOLATILE" and required != "VOLATILE" and not function.is_trigger
+          and (function.attrs.get("returns") or "void").lower() != "void"):
+        findings.append(FunctionFinding(
+            TOO_LAX, "MEDIO" if used else "BAJO", function,
+            f"{function.name} es VOLATILE (declarado o por omisión) pero su cuerpo admite {required}"
+            + (f"; se usa en {used}" if used else "")))
+    return findings
+
+
+def _inlining_findings(function: FunctionDef) -> List[FunctionFinding]:
+    attrs = function.attrs
+    blockers = []
+    if attrs.get("security_definer"):
+        blockers.append("SECURITY DEFINER")
+    if attrs.get("config"):
+        blockers.append("SET " + ", ".join(attrs["config"]))
+    if function.declared == "VOLATILE":
+        blockers.append("VOLATILE")
+    used = _usage(function)
+    severity = "MEDIO" if function.used_in.get("policy") or function.used_in.get("view") else "BAJO"
+
+    if (attrs.get("language") == "plpgsql" and attrs.get("body_shape") in ("return", "select_into")
+            and not attrs.get("handles_exceptions") and not function.is_trigger
+            and not (attrs.get("declares") and attrs.get("body_shape") == "return")):
+        body = "un solo RETURN" if attrs["body_shape"] == "return" else "un SELECT ... INTO y su RETURN"
+        note = f" (además quitar {', '.join(blockers)})" if blockers else ""
+        return [FunctionFinding(
+            INLINABLE, severity, function,
+            f"{function.name} es plpgsql con {body}: como LANGUAGE sql el planner podría inlinearla{note}"
+            + (f"; se usa en {used}" if used else ""))]
+    if attrs.get("language") == "sql" and attrs.get("body_shape") == "select" and blockers and used:
+        return [FunctionFinding(
+            INLINABLE, severity, function,
+            f"{function.name} es LANGUAGE sql de un solo SELECT pero no se inlinea por {', '.join(blockers)}; "
+            f"se usa en {used}")]
+    return []
+
+
+def _parallel_findings(function: FunctionDef) -> List[FunctionFinding]:
+    if (function.attrs.get("parallel", "UNSAFE") == "SAFE" or function.unknown or function.parallel_blockers
+            or function.is_trigger or function.declared == "VOLATILE" or function.required == "VOLATILE"):
+        return []
+    if not (function.used_in.get("view") or function.used_in.get("materialized_view")
+            or function.used_in.get("policy")):
+        return []
+    return [FunctionFinding(
+        PARALLEL_SAFE, "BAJO", function,
+        f"{function.name} ({function.declared}) no escribe ni llama funciones PARALLEL UNSAFE pero se declara "
+        f"PARALLEL {function.attrs.get('parallel', 'UNSAFE')}: impide planes paralelos en {_usage(function)}")]
+
+
+# CLI
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Volatilidad, paralelismo e inlining de las funciones del DDL")
+    parser.add_argument("--ddl", type=Path, help="Directorio ddl/ (default: el de validate_integrity.py)")
+    parser.add_argument("--function", help="Limitar el reporte a una función (schema.nombre)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from ddl_cache import DEFAULT_CACHE_FILE, FactsCache
+    from ddl_corpus import load_corpus
+    from ddl_graph import build_graph
+    from validate_integrity import BASE_PATH, Colors, print_ok, print_section
+
+    args = parse_args(argv)
+    cache = FactsCache(DEFAULT_CACHE_FILE)
+    corpus = load_corpus(args.ddl or BASE_PATH, cache=cache)
+    cache.save()
+    functions = collect_functions(corpus, build_graph(corpus))
+    if args.function:
+        functions = [function for function in functions if function.name == args.function]
+    findings = analyze_functions(functions)
+
+    print_section("VOLATILIDAD E INLINING DE FUNCIONES")
+    by_function = defaultdict(list)
+    for finding in findings:
+        by_function[(finding.function.name, finding.function.file, finding.function.line)].append(finding)
+    for (name, file, line), function_findings in sorted(by_function.items()):
+        attrs = function_findings[0].function.attrs
+        print(f"{Colors.BOLD}{name}{Colors.ENDC} ({attrs.get('language')}, {attrs.get('volatility')}, "
+              f"PARALLEL {attrs.get('parallel')})  {file}:{line}")
+        for finding in function_findings:
+            color = Colors.FAIL if finding.severity in ("CRÍTICO", "ALTO") else Colors.WARNING
+            print(f"  {color}[{finding.kind}]{Colors.ENDC} {finding.message}")
+    if not findings:
+        print_ok("Las funciones declaran la volatilidad y el paralelismo que su cuerpo admite")
+        return 0
+
+    counts = defaultdict(int)
+    for finding in findings:
+        counts[finding.kind] += 1
+    print(f"\n✓ {len(findings)} hallazgos en {len(by_function)} definiciones: "
+          + ", ".join(f"{kind} {count}" for kind, count in sorted(counts.items())))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Grafo de dependencias entre objetos del DDL de GAMILIT
+
+Construye, a partir de los `objects` extraídos por ddl_parser, un grafo con un
+nodo por tabla, tipo, función, trigger, vista, vista materializada, índice,
+policy RLS y FK diferido (fk-constraints/), indexado en ambos sentidos:
+`dependencies[x]` son los objetos que x necesita y `dependents[x]` los que
+necesitan a x, de modo que "qué depende de X" cuesta O(grado).
+
+Sobre el grafo ofrece orden topológico de creación (por niveles, para builds
+en paralelo), detección de ciclos y de ciclos de FKs entre tablas, incluido
+el de profiles ↔ schools que create-database.sh resuelve en la FASE 9.5.
+
+Uso:
+    python3 scripts/ddl_graph.py                       # resumen
+    python3 scripts/ddl_graph.py --levels              # niveles de creación
+    python3 scripts/ddl_graph.py --cycles
+    python3 scripts/ddl_graph.py --dependents auth_management.profiles --transitive
+Fecha: 2025-11-10
+"""
+
+import argparse
+import sys
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ddl_corpus import DDLCorpus, SqlFile, qualify
+
+RELATION_KINDS = ("table", "view", "materialized_view")
+
+# Tipos de nodo a los que puede apuntar cada etiqueta de dependencia
+LABEL_TARGETS = {
+    "table": RELATION_KINDS,     # índice, trigger, policy o FK -> tabla sobre la que se define
+    "fk": ("table",),            # REFERENCES
+    "reads": RELATION_KINDS,     # FROM / JOIN
+    "writes": RELATION_KINDS,    # INSERT INTO / UPDATE / DELETE FROM
+    "calls": ("function",),
+    "executes": ("function",),   # EXECUTE FUNCTION de un trigger
+    "refreshes": ("materialized_view",),  # REFRESH MATERIALIZED VIEW dentro de una función
+    "type": ("type",),
+}
+
+# Objetos cuyas dependencias no se verifican al crearlos (cuerpos plpgsql):
+# cuentan para "qué depende de X" pero no restringen el orden de creación
+SOFT_KINDS = {"function"}
+
+# Objetos que pertenecen a una tabla (su nombre es único solo dentro de ella)
+TABLE_SCOPED_KINDS = {"trigger", "policy", "constraint"}
+
+# Objetos que CREATE OR REPLACE redefine: rige su última definición del build
+REPLACEABLE_KINDS = {"function", "view"}
+
+
+@dataclass
+class Node:
+    """Un objeto del DDL"""
+    id: str
+    kind: str
+    name: str
+    file: str
+    line: int
+    table: Optional[str] = None
+    data: dict = field(default_factory=dict)
+    also_defined_in: List[str] = field(default_factory=list)
+
+    def __str__(self):
+        return f"{self.kind} {self.name}"
+
+
+@dataclass
+class Edge:
+    """Dependencia entre dos nodos; `hard` si restringe el orden de creación"""
+    labels: Set[str] = field(default_factory=set)
+    hard: bool = False
+
+
+@dataclass
+class FKCycle:
+    """Tablas con FKs mutuos y los FKs diferidos (ALTER TABLE) que rompen el ciclo"""
+    tables: List[str]
+    deferred: List[str]
+    resolved: bool
+
+
+class DDLGraph:
+    """Grafo de objetos con adyacencia en ambos sentidos"""
+
+    def __init__(self):
+        self.nodes: Dict[str, Node] = {}
+        self.dependencies: Dict[str, Dict[str, Edge]] = {}
+        self.dependents: Dict[str, Dict[str, Edge]] = {}
+        self.by_name: Dict[str, Dict[str, str]] = {}  # nombre calificado -> {kind: id}
+        self.unresolved: List[Tuple[str, str, str]] = []  # (id, etiqueta, nombre)
+
+    # --- construcción ---
+    def add_node(self, kind: str, name: str, file: str, line: int, table: Optional[str] = None,
+                 data: Optional[dict] = None) -> Node:
+        node_id = f"{kind}:{name}"
+        node = self.nodes.get(node_id)
+        if node is not None:
+            node.also_defined_in.append(file)
+            if data and kind in REPLACEABLE_KINDS:
+                node.data = data
+            return node
+        node = Node(node_id, kind, name, file, line, table, data or {})
+        self.nodes[node_id] = node
+        self.dependencies[node_id] = {}
+        self.dependents[node_id] = {}
+        self.by_name.setdefault(name, {})[kind] = node_id
+        return node
+
+    def add_edge(self, source: str, target: str, label: str, hard: bool):
+        """`source` depende de `target`"""
+        edge = self.dependencies[source].get(target)
+        if edge is None:
+            edge = Edge()
+            self.dependencies[source][target] = edge
+            self.dependents[target][source] = edge
+        edge.labels.add(label)
+        edge.hard = edge.hard or hard
+
+    def resolve(self, name: str, kinds: Iterable[str], search_path: List[str]) -> Optional[str]:
+        """Id del nodo al que se refiere `name` (los nombres sin schema se buscan en search_path)"""
+        candidates = [name] if "." in name else [f"{schema}.{name}" for schema in search_path]
+        for candidate in candidates:
+            entry = self.by_name.get(candidate)
+            if entry:
+                for kind in kinds:
+                    if kind in entry:
+                        return entry[kind]
+        return None
+
+    # --- consultas ---
+    def find(self, name: str) -> List[str]:
+        """Ids que coinciden con `kind:nombre`, un nombre calificado o uno sin schema"""
+        if name in self.nodes:
+            return [name]
+        if name in self.by_name:
+            return sorted(self.by_name[name].values())
+        suffix = "." + name
+        return sorted(node_id for node_id, node in self.nodes.items() if node.name.endswith(suffix))
+
+    def direct_dependencies(self, node_id: str, hard_only: bool = False) -> List[str]:
+        return sorted(t for t, edge in self.dependencies[node_id].items() if edge.hard or not hard_only)
+
+    def direct_dependents(self, node_id: str, hard_only: bool = False) -> List[str]:
+        return sorted(s for s, edge in self.dependents[node_id].items() if edge.hard or not hard_only)
+
+    def transitive_dependents(self, node_ids: Iterable[str], hard_only: bool = False) -> Set[str]:
+        """Todos los objetos afectados si cambian `node_ids` (sin incluirlos)"""
+        start = set(node_ids)
+        seen: Set[str] = set()
+        queue = deque(start)
+        while queue:
+            for dependent, edge in self.dependents[queue.popleft()].items():
+                if (edge.hard or not hard_only) and dependent not in seen:
+                    seen.add(dependent)
+                    queue.append(dependent)
+        return seen - start
+
+    def edge_count(self) -> int:
+        return sum(len(targets) for targets in self.dependencies.values())
+
+    # --- orden y ciclos ---
+    def topological_levels(self) -> Tuple[List[List[str]], List[str]]:
+        """Niveles de creación (Kahn): cada nivel solo depende de los anteriores,
+        así que sus objetos pueden crearse en paralelo. Devuelve también los nodos
+        bloqueados por un ciclo."""
+        pending = {node_id: sum(1 for edge in targets.values() if edge.hard)
+                   for node_id, targets in self.dependencies.items()}
+        level = sorted(node_id for node_id, count in pending.items() if count == 0)
+        levels = []
+        while level:
+            levels.append(level)
+            following = []
+            for node_id in level:
+                for dependent, edge in self.dependents[node_id].items():
+                    if edge.hard:
+                        pending[dependent] -= 1
+                        if pending[dependent] == 0:
+                            following.append(dependent)
+            level = sorted(following)
+        blocked = sorted(node_id for node_id, count in pending.items() if count > 0)
+        return levels, blocked
+
+    def topological_order(self) -> Tuple[List[str], List[str]]:
+        levels, blocked = self.topological_levels()
+        return [node_id for level in levels for node_id in level], blocked
+
+    def cycles(self, hard_only: bool = True) -> List[List[str]]:
+        """Componentes fuertemente conexas con más de un nodo"""
+        return _strongly_connected(sorted(self.nodes), lambda node_id: self.direct_dependencies(node_id, hard_only))
+
+    def fk_cycles(self) -> List[FKCycle]:
+        """Ciclos de FKs entre tablas contando también los FKs diferidos
+
+        Un ciclo está resuelto si todos sus FKs mutuos no pueden ir inline y al
+        menos uno se agrega con ALTER TABLE después de crear ambas tablas.
+        """
+        references: Dict[str, Set[str]] = {}
+        deferred: Dict[Tuple[str, str], List[str]] = {}
+        for node_id, node in self.nodes.items():
+            if node.kind == "table":
+                source = node_id
+            elif node.kind == "constraint":
+                source = self.by_name.get(node.table, {}).get("table")
+                if source is None:
+                    continue
+            else:
+                continue
+            for target, edge in self.dependencies[node_id].items():
+                if "fk" in edge.labels and target != source:
+                    references.setdefault(source, set()).add(target)
+                    if node.kind == "constraint":
+                        deferred.setdefault((source, target), []).append(node_id)
+
+        tables = sorted(node_id for node_id, node in self.nodes.items() if node.kind == "table")
+        hard_cycles = {node_id for component in self.cycles() for node_id in component}
+        result = []
+        for component in _strongly_connected(tables, lambda node_id: sorted(references.get(node_id, ()))):
+            members = set(component)
+            constraints = sorted(constraint for (source, target), ids in deferred.items()
+                                 if source in members and target in members for constraint in ids)
+            result.append(FKCycle(
+                tables=[self.nodes[node_id].name for node_id in component],
+                deferred=[self.nodes[node_id].name for node_id in constraints],
+                resolved=bool(constraints) and not (members & hard_cycles),
+            ))
+        return result
+
+
+def _strongly_connected(node_ids: List[str], successors: Callable[[str], List[str]]) -> List[List[str]]:
+    """Tarjan iterativo; devuelve solo las componentes de más de un nodo"""
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    result = []
+
+    for root in node_ids:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors(root)))]
+        while work:
+            node_id, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors(child))))
+                    break
+                if child in on_stack:
+                    low[node_id] = min(low[node_id], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node_id])
+                if low[node_id] == index[node_id]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node_id:
+                            break
+                    if len(component) > 1:
+                        result.append(sorted(component))
+    return result
+
+
+def search_path_of(sql_file: SqlFile) -> List[str]:
+    """Schemas en los que se resuelven los nombres sin calificar del archivo"""
+    path = [sql_file.schema]
+    for schema in sql_file.facts.get("search_path", []) + ["public"]:
+        if schema not in path:
+            path.append(schema)
+    return path
+
+
+def build_graph(corpus: DDLCorpus) -> DDLGraph:
+    """Grafo de los archivos que forman parte del build (excluye _deprecated/, tests/...)"""
+    graph = DDLGraph()
+    pending = []
+
+    for sql_file in corpus.files:
+        if not sql_file.live:
+            continue
+        search_path = search_path_of(sql_file)
+        for obj in sql_file.facts.get("objects", []):
+            kind = obj["kind"]
+            table = qualify(obj["table"], sql_file.schema) if obj.get("table") else None
+            if kind in TABLE_SCOPED_KINDS:
+                name = f"{table}.{obj['name']}"
+            elif kind == "index":
+                name = qualify(obj["name"], table.split(".", 1)[0])
+            else:
+                name = qualify(obj["name"], sql_file.schema)
+            data = {key: value for key, value in obj.items() if key not in ("kind", "name", "line", "deps")}
+            node = graph.add_node(kind, name, str(sql_file.path), obj["line"], table, data)
+            pending.append((node, obj["deps"], search_path))
+
+    for node, deps, search_path in pending:
+        for label, name, _ in deps:
+            target = graph.resolve(name, LABEL_TARGETS[label], search_path)
+            if target is None:
+                if label not in ("calls", "type"):  # builtins y tipos nativos no están en el corpus
+                    graph.unresolved.append((node.id, label, name))
+            elif target != node.id:
+                graph.add_edge(node.id, target, label, hard=node.kind not in SOFT_KINDS)
+
+    return graph
+
+
+# CLI
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Grafo de dependencias entre objetos del DDL de GAMILIT")
+    parser.add_argument("--ddl", type=Path, help="Directorio ddl/ (default: el de validate_integrity.py)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--order", action="store_true", help="Orden topológico de creación")
+    group.add_argument("--levels", action="store_true", help="Niveles de creación (objetos creables en paralelo)")
+    group.add_argument("--cycles", action="store_true", help="Ciclos de dependencias y de FKs")
+    group.add_argument("--dependents", metavar="OBJETO", help="Objetos que dependen de OBJETO")
+    group.add_argument("--dependencies", metavar="OBJETO", help="Objetos de los que depende OBJETO")
+    parser.add_argument("--transitive", action="store_true", help="Con --dependents: incluir dependientes indirectos")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from ddl_cache import DEFAULT_CACHE_FILE, FactsCache
+    from ddl_corpus import load_corpus
+    from validate_integrity import BASE_PATH, Colors, print_ok, print_section
+
+    args = parse_args(argv)
+    cache = FactsCache(DEFAULT_CACHE_FILE)
+    corpus = load_corpus(args.ddl or BASE_PATH, cache=cache)
+    cache.save()
+    graph = build_graph(corpus)
+
+    def show(node_id, prefix="  "):
+        node = graph.nodes[node_id]
+        print(f"{prefix}{node}  ({node.file}:{node.line})")
+
+    if args.order or args.levels:
+        levels, blocked = graph.topological_levels()
+        print_section("ORDEN DE CREACIÓN")
+        if args.levels:
+            for number, level in enumerate(levels, 1):
+                print(f"{Colors.BOLD}Nivel {number} ({len(level)} objetos){Colors.ENDC}")
+                for node_id in level:
+                    show(node_id)
+        else:
+            for node_id in (node_id for level in levels for node_id in level):
+                show(node_id, "")
+        if blocked:
+            print(f"\n{Colors.FAIL}{len(blocked)} objetos bloqueados por ciclos (ver --cycles){Colors.ENDC}")
+        return 1 if blocked else 0
+
+    if args.cycles:
+        print_section("CICLOS DE DEPENDENCIAS")
+        cycles = graph.cycles()
+        for component in cycles:
+            print(f"{Colors.FAIL}Ciclo: {' → '.join(graph.nodes[n].name for n in component)}{Colors.ENDC}")
+        for cycle in graph.fk_cycles():
+            status = (f"{Colors.OKGREEN}resuelto con FK diferido: {', '.join(cycle.deferred)}"
+                      if cycle.resolved else f"{Colors.FAIL}sin resolver")
+            print(f"Ciclo de FKs: {' ↔ '.join(cycle.tables)} ({status}{Colors.ENDC})")
+        if not cycles:
+            print_ok("El orden de creación no tiene ciclos")
+        return 1 if cycles else 0
+
+    target = args.dependents or args.dependencies
+    if target:
+        matches = graph.find(target)
+        if not matches:
+            print(f"{Colors.FAIL}Objeto no encontrado: {target}{Colors.ENDC}")
+            return 1
+        for node_id in matches:
+            if args.dependencies:
+                print_section(f"DEPENDENCIAS DE {graph.nodes[node_id]}")
+                related = graph.direct_dependencies(node_id)
+            elif args.transitive:
+                print_section(f"DEPENDIENTES (TRANSITIVOS) DE {graph.nodes[node_id]}")
+                related = sorted(graph.transitive_dependents([node_id]))
+            else:
+                print_section(f"DEPENDIENTES DE {graph.nodes[node_id]}")
+                related = graph.direct_dependents(node_id)
+            for other in related:
+                show(other)
+            print(f"\n{len(related)} objetos")
+        return 0
+
+    print_section("GRAFO DE DEPENDENCIAS DDL")
+    for kind, count in sorted(Counter(node.kind for node in graph.nodes.values()).items()):
+        print(f"  {kind}: {count}")
+    levels, blocked = graph.topological_levels()
+    print(f"\n✓ {len(graph.nodes)} objetos, {graph.edge_count()} dependencias")
+    print(f"✓ {len(levels)} niveles de creación, {len(blocked)} objetos bloqueados por ciclos")
+    print(f"✓ {len(graph.unresolved)} referencias sin resolver")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Análisis de índices redundantes y solapados del DDL de GAMILIT
+
+Reúne cada CREATE INDEX del árbol (columnas, expresiones, WHERE parcial,
+INCLUDE y método) más los índices implícitos de PRIMARY KEY y UNIQUE, y marca:
+
+- duplicados exactos (mismo método, elementos, WHERE e INCLUDE),
+- btree redundantes por prefijo izquierdo (idx(a) junto a idx(a, b)),
+- índices parciales ya cubiertos por uno más amplio sin WHERE.
+
+Los índices UNIQUE solo se reportan si otro índice único ya garantiza lo
+mismo. El reporte estima, por tabla, cuántas escrituras de índice por INSERT
+(y por UPDATE no-HOT) se ahorran al eliminar los redundantes.
+
+Uso:
+    python3 scripts/ddl_indexes.py                     # reporte por tabla
+    python3 scripts/ddl_indexes.py --table gamification_system.user_stats
+Fecha: 2025-11-10
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ddl_corpus import DDLCorpus, qualify
+from ddl_graph import DDLGraph
+
+# Tipos de hallazgo, de más a menos grave
+DUPLICATE = "duplicado"
+PREFIX = "prefijo"
+PARTIAL = "parcial cubierto"
+
+
+@dataclass
+class IndexDef:
+    """Un índice (explícito o implícito de una restricción) sobre una tabla"""
+    name: str
+    table: str
+    method: str
+    elements: Tuple[str, ...]
+    unique: bool = False
+    where: Optional[str] = None
+    include: Tuple[str, ...] = ()
+    constraint: bool = False          # PRIMARY KEY / UNIQUE: no se puede eliminar sin la restricción
+    file: str = ""
+    line: int = 0
+    columns: List[Optional[str]] = field(default_factory=list)
+
+    def __str__(self):
+        where = f" WHERE {self.where}" if self.where else ""
+        return f"{self.name} {self.method} ({', '.join(self.elements)}){where}"
+
+
+@dataclass
+class IndexFinding:
+    """`index` es redundante porque `covered_by` ya sirve las mismas búsquedas"""
+    kind: str
+    index: IndexDef
+    covered_by: IndexDef
+
+
+def _normalize(element: str) -> str:
+    """Elemento sin el orden por defecto (ASC NULLS LAST; DESC implica NULLS FIRST)"""
+    for suffix, replacement in ((" desc nulls first", " desc"), (" asc nulls last", ""), (" asc", "")):
+        if element.endswith(suffix):
+            return element[:-len(suffix)] + replacement
+    if element.endswith(" nulls last") and not element.endswith(" desc nulls last"):
+        return element[:-len(" nulls last")]
+    return element
+
+
+def _bare(element: str) -> str:
+    """Elemento sin dirección: un índice de una columna se recorre en ambos sentidos"""
+    element = _normalize(element)
+    return element[:-len(" desc")] if element.endswith(" desc") else element
+
+
+def collect_indexes(corpus: DDLCorpus, graph: DDLGraph) -> Dict[str, List[IndexDef]]:
+    """Índices del build por tabla: nodos `index` del grafo más PRIMARY KEY/UNIQUE"""
+    indexes: Dict[str, List[IndexDef]] = defaultdict(list)
+    for node in graph.nodes.values():
+        if node.kind != "index":
+            continue
+        data = node.data
+        indexes[node.table].append(IndexDef(
+            name=node.name, table=node.table, method=data["method"],
+            elements=tuple(_normalize(element) for element in data["elements"]),
+            unique=data["unique"], where=data["where"], include=tuple(data["include"]),
+            file=node.file, line=node.line, columns=list(data["columns"]),
+        ))
+    for sql_file in corpus.files:
+        if not sql_file.live:
+            continue
+        for table, columns, kind, line in sql_file.facts["keys"]:
+            table = qualify(table, sql_file.schema)
+            name = f"{table}_{'pkey' if kind == 'primary' else '_'.join(columns) + '_key'}"
+            indexes[table].append(IndexDef(
+                name=name, table=table, method="btree", elements=tuple(columns), unique=True,
+                constraint=True, file=str(sql_file.path), line=line, columns=list(columns),
+            ))
+    for table_indexes in indexes.values():
+        table_indexes.sort(key=lambda index: (not index.constraint, index.name))
+    return indexes
+
+
+def _preferred(a: IndexDef, b: IndexDef) -> bool:
+    """Entre dos índices equivalentes se conserva la restricción, luego el único, luego el primero por nombre"""
+    return (not a.constraint, not a.unique, a.name) < (not b.constraint, not b.unique, b.name)
+
+
+def redundancy(index: IndexDef, other: IndexDef) -> Optional[str]:
+    """Por qué `other` hace innecesario a `index` (None si no lo hace)"""
+    if index is other or index.constraint:
+        return None
+    if index.unique and not (other.unique and other.elements == index.elements and other.where == index.where):
+        return None
+    if not set(index.include) <= set(other.include) | {_bare(e) for e in other.elements}:
+        return None
+
+    if (index.method == other.method and index.elements == other.elements and index.where == other.where
+            and set(index.include) == set(other.include)):
+        return DUPLICATE if _preferred(other, index) else None
+    if index.method != "btree" or other.method != "btree" or other.where not in (None, index.where):
+        return None
+
+    size = len(index.elements)
+    if size > len(other.elements):
+        return None
+    if size == 1:
+        prefix_matches = _bare(index.elements[0]) == _bare(other.elements[0])
+    else:
+        prefix_matches = index.elements == other.elements[:size]
+    if not prefix_matches:
+        return None
+    if index.where is not None and other.where is None:
+        return PARTIAL
+    return PREFIX if size < len(other.elements) else DUPLICATE
+
+
+def analyze_indexes(indexes: Dict[str, List[IndexDef]]) -> List[IndexFinding]:
+    """Un hallazgo por índice redundante (con el índice que lo cubre)"""
+    order = {DUPLICATE: 0, PREFIX: 1, PARTIAL: 2}
+    findings = []
+    for table in sorted(indexes):
+        table_indexes = indexes[table]
+        for index in table_indexes:
+            candidates = [(kind, other) for other in table_indexes
+                          for kind in [redundancy(index, other)] if kind]
+            if candidates:
+                kind, other = min(candidates, key=lambda c: (order[c[0]], not c[1].constraint, len(c[1].elements)))
+                findings.append(IndexFinding(kind, index, other))
+    return _drop_mutual(findings)
+
+
+def _drop_mutual(findings: List[IndexFinding]) -> List[IndexFinding]:
+    """Si dos índices se cubren mutuamente solo se elimina uno"""
+    removed = set()
+    kept = []
+    for finding in findings:
+        if id(finding.covered_by) in removed:
+            continue
+        removed.add(id(finding.index))
+        kept.append(finding)
+    return kept
+
+
+@dataclass
+class TableSavings:
+    """Escrituras de índice por fila insertada antes y después de eliminar los redundantes"""
+    table: str
+    indexes: int
+    redundant: int
+
+    @property
+    def writes_before(self) -> int:
+        return 1 + self.indexes          # tupla en el heap + una entrada por índice
+
+    @property
+    def writes_after(self) -> int:
+        return self.writes_before - self.redundant
+
+    @property
+    def saving(self) -> float:
+        return self.redundant / self.writes_before
+
+
+def write_savings(indexes: Dict[str, List[IndexDef]], findings: List[IndexFinding]) -> List[TableSavings]:
+    """Ahorro estimado por tabla, de mayor a menor"""
+    redundant = defaultdict(int)
+    for finding in findings:
+        redundant[finding.index.table] += 1
+    savings = [TableSavings(table, len(indexes[table]), count) for table, count in redundant.items()]
+    return sorted(savings, key=lambda s: (-s.saving, s.table))
+
+
+# CLI
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Índices redundantes y solapados del DDL de GAMILIT")
+    parser.add_argument("--ddl", type=Path, help="Directorio ddl/ (default: el de validate_integrity.py)")
+    parser.add_argument("--table", help="Limitar el reporte a una tabla (schema.tabla)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from ddl_cache import DEFAULT_CACHE_FILE, FactsCache
+    from ddl_corpus import load_corpus
+    from ddl_graph import build_graph
+    from validate_integrity import BASE_PATH, Colors, print_ok, print_section
+
+    args = parse_args(argv)
+    cache = FactsCache(DEFAULT_CACHE_FILE)
+    corpus = load_corpus(args.ddl or BASE_PATH, cache=cache)
+    cache.save()
+    indexes = collect_indexes(corpus, build_graph(corpus))
+    findings = analyze_indexes(indexes)
+    if args.table:
+        findings = [finding for finding in findings if finding.index.table == args.table]
+
+    print_section("ÍNDICES REDUNDANTES")
+    by_table = defaultdict(list)
+    for finding in findings:
+        by_table[finding.index.table].append(finding)
+    for table, table_findings in sorted(by_table.items()):
+        print(f"{Colors.BOLD}{table}{Colors.ENDC}")
+        for finding in table_findings:
+            print(f"  {Colors.WARNING}[{finding.kind}]{Colors.ENDC} {finding.index}")
+            print(f"      cubierto por {finding.covered_by}")
+            print(f"      {finding.index.file}:{finding.index.line}")
+    if not findings:
+        print_ok("No hay índices redundantes")
+        return 0
+
+    print_section("AHORRO ESTIMADO DE ESCRITURAS")
+    print(f"{'tabla':<50} {'índices':>8} {'redund.':>8} {'escrituras/INSERT':>18} {'ahorro':>7}")
+    for saving in write_savings(indexes, findings):
+        print(f"{saving.table:<50} {saving.indexes:>8} {saving.redundant:>8} "
+              f"{f'{saving.writes_before} → {saving.writes_after}':>18} {saving.saving:>7.0%}")
+    total = len(findings)
+    print(f"\n✓ {total} índices redundantes en {len(by_table)} tablas "
+          f"(cada uno es una escritura menos por INSERT y por UPDATE no-HOT)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
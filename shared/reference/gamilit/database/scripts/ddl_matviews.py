@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Plan de refresh de las vistas materializadas del DDL de GAMILIT
+
+Para cada vista materializada reúne sus tablas base (atravesando vistas
+normales), las vistas materializadas de las que lee, sus índices y quién la
+refresca, y arma un plan:
+
+- elegibilidad para REFRESH MATERIALIZED VIEW CONCURRENTLY (requiere un índice
+  UNIQUE sobre columnas simples, sin WHERE, y la vista ya poblada),
+- orden de refresh por niveles (una MV se refresca después de las MVs que lee;
+  las de un mismo nivel pueden refrescarse en paralelo),
+- grupos de MVs que comparten tablas base (se desactualizan con las mismas
+  escrituras y conviene refrescarlas en el mismo lote),
+- objetos que un DROP ... CASCADE de la MV eliminaría junto con ella.
+
+Uso:
+    python3 scripts/ddl_matviews.py                 # plan
+    python3 scripts/ddl_matviews.py --sql           # sentencias REFRESH en orden
+Fecha: 2025-11-10
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from ddl_corpus import DDLCorpus, qualify
+from ddl_graph import DDLGraph
+from ddl_indexes import IndexDef, collect_indexes
+
+# Objetos que PostgreSQL elimina con DROP ... CASCADE de una relación que leen
+CASCADE_KINDS = ("view", "materialized_view")
+
+
+@dataclass
+class MatView:
+    """Una vista materializada con lo necesario para planificar su refresh"""
+    name: str
+    file: str
+    line: int
+    populated: bool = True                      # False si se crea WITH NO DATA
+    unique_index: Optional[IndexDef] = None     # índice que habilita CONCURRENTLY
+    base_tables: Set[str] = field(default_factory=set)
+    sources: Set[str] = field(default_factory=set)        # otras MVs que lee
+    cascade: List[str] = field(default_factory=list)      # ids que DROP ... CASCADE eliminaría
+    refreshed_by: List[str] = field(default_factory=list)  # funciones que la refrescan
+
+    @property
+    def blocker(self) -> Optional[str]:
+        """Por qué no admite CONCURRENTLY (None si lo admite)"""
+        if self.unique_index is None:
+            return "sin índice UNIQUE sobre columnas simples y sin WHERE"
+        if not self.populated:
+            return "se crea WITH NO DATA: el primer refresh no puede ser CONCURRENTLY"
+        return None
+
+
+def concurrency_index(indexes: List[IndexDef]) -> Optional[IndexDef]:
+    """Primer índice que sirve a REFRESH ... CONCURRENTLY (UNIQUE, solo columnas, sin WHERE)"""
+    for index in indexes:
+        if index.unique and index.where is None and index.columns and None not in index.columns:
+            return index
+    return None
+
+
+def _reads(graph: DDLGraph, node_id: str, mv: MatView, seen: Set[str]):
+    """Tablas base y MVs que lee `node_id`, atravesando vistas normales"""
+    for target, edge in graph.dependencies[node_id].items():
+        if "reads" not in edge.labels or target in seen:
+            continue
+        seen.add(target)
+        node = graph.nodes[target]
+        if node.kind == "table":
+            mv.base_tables.add(node.name)
+        elif node.kind == "materialized_view":
+            mv.sources.add(node.name)
+        elif node.kind == "view":
+            _reads(graph, target, mv, seen)
+
+
+def _cascade(graph: DDLGraph, node_id: str) -> List[str]:
+    """Vistas y MVs que dependen (transitivamente) de `node_id`; sus índices caen con ellas"""
+    result = set()
+    queue = [node_id]
+    while queue:
+        for dependent, edge in graph.dependents[queue.pop()].items():
+            if edge.hard and graph.nodes[dependent].kind in CASCADE_KINDS and dependent not in result:
+                result.add(dependent)
+                queue.append(dependent)
+    return sorted(result)
+
+
+def analyze_matviews(corpus: DDLCorpus, graph: DDLGraph) -> List[MatView]:
+    """Vistas materializadas del build, ordenadas por nombre"""
+    indexes = collect_indexes(corpus, graph)
+    matviews = []
+    for node_id, node in sorted(graph.nodes.items()):
+        if node.kind != "materialized_view":
+            continue
+        mv = MatView(node.name, node.file, node.line, populated=node.data.get("populated", True),
+                     unique_index=concurrency_index(indexes.get(node.name, [])))
+        _reads(graph, node_id, mv, {node_id})
+        mv.cascade = _cascade(graph, node_id)
+        mv.refreshed_by = sorted(graph.nodes[source].name for source, edge in graph.dependents[node_id].items()
+                                 if "refreshes" in edge.labels)
+        matviews.append(mv)
+    return matviews
+
+
+def refresh_levels(matviews: List[MatView]) -> List[List[str]]:
+    """Niveles de refresh: cada MV va después de las MVs que lee (las de un nivel, en paralelo)"""
+    names = {mv.name for mv in matviews}
+    pending = {mv.name: len(mv.sources & names) for mv in matviews}
+    readers = defaultdict(list)
+    for mv in matviews:
+        for source in mv.sources & names:
+            readers[source].append(mv.name)
+    level = sorted(name for name, count in pending.items() if count == 0)
+    levels = []
+    while level:
+        levels.append(level)
+        following = []
+        for name in level:
+            for reader in readers[name]:
+                pending[reader] -= 1
+                if pending[reader] == 0:
+                    following.append(reader)
+        level = sorted(following)
+    cyclic = sorted(name for name, count in pending.items() if count > 0)
+    if cyclic:
+        levels.append(cyclic)    # un ciclo entre MVs no se puede crear; se reporta al final
+    return levels
+
+
+def refresh_groups(matviews: List[MatView]) -> List[List[MatView]]:
+    """MVs que comparten tablas base, directa o transitivamente (componentes conexas, union-find),
+    de los grupos más grandes a los más chicos"""
+    parent = list(range(len(matviews)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    owner: Dict[str, int] = {}
+    for i, mv in enumerate(matviews):
+        for table in mv.base_tables:
+            if table in owner:
+                parent[find(i)] = find(owner[table])
+            else:
+                owner[table] = i
+    groups: Dict[int, List[MatView]] = defaultdict(list)
+    for i, mv in enumerate(matviews):
+        groups[find(i)].append(mv)
+    return sorted(groups.values(), key=lambda group: (-len(group), group[0].name))
+
+
+def group_tables(group: List[MatView]) -> Set[str]:
+    """Tablas base de todas las MVs de un grupo"""
+    return {table for mv in group for table in mv.base_tables}
+
+
+def refresh_statements(corpus: DDLCorpus) -> List[tuple]:
+    """(archivo, MV, concurrently, top_level, línea) de cada REFRESH MATERIALIZED VIEW del build"""
+    statements = []
+    for sql_file in corpus.files:
+        if not sql_file.live:
+            continue
+        for name, concurrently, top_level, line in sql_file.facts["refreshes"]:
+            statements.append((sql_file, qualify(name, sql_file.schema), concurrently, top_level, line))
+    return statements
+
+
+def cascade_drops(corpus: DDLCorpus) -> List[tuple]:
+    """(archivo, MV, línea) de cada DROP MATERIALIZED VIEW ... CASCADE del build"""
+    return [(sql_file, qualify(name, sql_file.schema), line)
+            for sql_file in corpus.files if sql_file.live
+            for kind, name, cascade, line in sql_file.facts["drops"]
+            if kind == "materialized_view" and cascade]
+
+
+# CLI
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Plan de refresh de las vistas materializadas del DDL de GAMILIT")
+    parser.add_argument("--ddl", type=Path, help="Directorio ddl/ (default: el de validate_integrity.py)")
+    parser.add_argument("--sql", action="store_true", help="Imprimir solo las sentencias REFRESH del plan")
+    return parser.parse_args(argv)
+
+
+def print_sql(matviews: List[MatView]):
+    """Sentencias REFRESH por nivel; dentro de cada nivel, agrupadas por tablas base"""
+    by_name = {mv.name: mv for mv in matviews}
+    groups = refresh_groups(matviews)
+    for number, level in enumerate(refresh_levels(matviews), 1):
+        print(f"-- Nivel {number}" + (" (en paralelo)" if len(level) > 1 else ""))
+        for group in groups:
+            names = [mv.name for mv in group if mv.name in level]
+            if not names:
+                continue
+            print(f"-- tablas base: {', '.join(sorted(group_tables(group))) or '-'}")
+            for name in names:
+                concurrently = "CONCURRENTLY " if by_name[name].blocker is None else ""
+                print(f"REFRESH MATERIALIZED VIEW {concurrently}{name};")
+
+
+def main(argv=None):
+    from ddl_cache import DEFAULT_CACHE_FILE, FactsCache
+    from ddl_corpus import load_corpus
+    from ddl_graph import build_graph
+    from validate_integrity import BASE_PATH, Colors, print_ok, print_section
+
+    args = parse_args(argv)
+    cache = FactsCache(DEFAULT_CACHE_FILE)
+    corpus = load_corpus(args.ddl or BASE_PATH, cache=cache)
+    cache.save()
+    graph = build_graph(corpus)
+    matviews = analyze_matviews(corpus, graph)
+    if args.sql:
+        print_sql(matviews)
+        return 0
+    if not matviews:
+        print_ok("No hay vistas materializadas")
+        return 0
+
+    print_section("VISTAS MATERIALIZADAS")
+    for mv in matviews:
+        if mv.blocker is None:
+            mode = f"{Colors.OKGREEN}CONCURRENTLY{Colors.ENDC} (índice {mv.unique_index.name})"
+        else:
+            mode = f"{Colors.WARNING}bloqueante{Colors.ENDC}: {mv.blocker}"
+        print(f"{Colors.BOLD}{mv.name}{Colors.ENDC}  {mode}")
+        print(f"  tablas base: {', '.join(sorted(mv.base_tables)) or '-'}")
+        if mv.sources:
+            print(f"  lee las MVs: {', '.join(sorted(mv.sources))}")
+        if mv.refreshed_by:
+            print(f"  refrescada por: {', '.join(mv.refreshed_by)}")
+        if mv.cascade:
+            names = ", ".join(graph.nodes[node_id].name for node_id in mv.cascade)
+            print(f"  {Colors.FAIL}DROP ... CASCADE elimina también:{Colors.ENDC} {names}")
+        print(f"  {mv.file}:{mv.line}")
+
+    print_section("ORDEN DE REFRESH")
+    for number, level in enumerate(refresh_levels(matviews), 1):
+        print(f"Nivel {number}" + (" (en paralelo)" if len(level) > 1 else "") + ":")
+        for name in level:
+            print(f"  {name}")
+
+    print_section("GRUPOS POR TABLAS BASE")
+    for number, group in enumerate(refresh_groups(matviews), 1):
+        print(f"Grupo {number}: {', '.join(sorted(group_tables(group))) or '(sin tablas base)'}")
+        for mv in group:
+            print(f"  {mv.name}")
+
+    concurrent = sum(1 for mv in matviews if mv.blocker is None)
+    print(f"\n✓ {len(matviews)} vistas materializadas, {concurrent} admiten CONCURRENTLY "
+          f"(python3 scripts/ddl_matviews.py --sql para las sentencias)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
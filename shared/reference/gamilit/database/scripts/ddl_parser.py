@@ -0,0 +1,748 @@
+#!/usr/bin/env python3
+"""
+Extractores de objetos DDL sobre el flujo de tokens de sql_lexer
+
+Cada archivo se tokeniza una sola vez; los extractores recorren ese flujo por
+sentencias y registran tablas, columnas, ENUMs, REFERENCES, FKs con sus
+columnas, PRIMARY KEY/UNIQUE, funciones, vistas, tablas usadas en cuerpos de
+funciones y funciones llamadas por triggers, cada uno con su línea (y columna
+en las referencias). Comentarios y literales nunca generan referencias.
+
+Además, `objects` lista cada objeto creado (tabla, tipo, función, trigger,
+vista, vista materializada, índice, policy RLS y FK diferido) con sus
+dependencias [etiqueta, nombre, línea]; ddl_graph.py construye el grafo a
+partir de ellas.
+Fecha: 2025-11-07
+"""
+
+from typing import Dict, List, Optional, Set
+
+from sql_lexer import (DOLLAR, IDENT, OP, PAREN_KEYWORDS, QIDENT, STRING, Token, expand, is_op, is_word, matching_paren,
+                       names, read_name, split_statements, split_top_level, sql_text, tokenize)
+
+# Incrementar cuando cambie lo que extrae extract_facts (invalida la caché)
+PARSER_VERSION = 13
+
+FACT_KEYS = ("enums", "tables", "columns", "references", "foreign_keys", "keys", "type_refs", "functions",
+             "views", "table_usages", "trigger_calls", "search_path", "objects", "drops", "refreshes")
+
+# Tipos que implican un DEFAULT nextval(...)
+SERIAL_TYPES = {"smallserial", "serial", "bigserial", "serial2", "serial4", "serial8"}
+
+# Palabras que abren una restricción dentro de la definición de una columna
+COLUMN_CONSTRAINT_WORDS = {"NOT", "NULL", "DEFAULT", "CHECK", "UNIQUE", "PRIMARY", "REFERENCES",
+                           "CONSTRAINT", "GENERATED", "COLLATE"}
+TABLE_CONSTRAINT_WORDS = {"CONSTRAINT", "PRIMARY", "UNIQUE", "CHECK", "FOREIGN", "EXCLUDE", "LIKE"}
+
+# Funciones SQL cuya sintaxis usa FROM como separador de argumentos
+FROM_ARGUMENT_FUNCTIONS = {"EXTRACT", "SUBSTRING", "TRIM", "OVERLAY", "POSITION"}
+
+# Tokens previos que indican que UPDATE no es una sentencia DML
+NON_DML_UPDATE_PREFIXES = {"BEFORE", "AFTER", "OR", "FOR", "DO", "ON", "OF", "KEY", "INSERT", "INSTEAD", ","}
+
+# Palabras reservadas que nunca son nombres de tabla tras FROM/JOIN/UPDATE
+RESERVED_WORDS = {"SELECT", "LATERAL", "ONLY", "SET", "ON", "OF", "WHERE", "VALUES", "RETURNING",
+                  "DEFAULT", "AND", "OR", "NOT", "NULL", "TRUE", "FALSE", "CASE", "WHEN", "THEN",
+                  "END", "AS", "IN", "IS", "BY", "GROUP", "ORDER", "LIMIT", "USING", "ALL"}
+
+# Sentencias de nivel superior que no contienen código SQL con referencias
+NON_CODE_STATEMENTS = {"COMMENT", "GRANT", "REVOKE", "DROP"}
+
+# Tokens previos a `nombre(` que indican que no es una llamada a función
+NON_CALL_PREFIXES = {"REFERENCES", "INTO", "TABLE", "ON", "INDEX", "VIEW", "FUNCTION", "PROCEDURE",
+                     "TRIGGER", "TYPE", "USING", "KEY", "UPDATE", "INCLUDE", "OF", "EXISTS"}
+
+# Palabras que terminan el tipo de RETURNS en CREATE FUNCTION (inician otro atributo)
+FUNCTION_ATTRIBUTE_WORDS = {"LANGUAGE", "IMMUTABLE", "STABLE", "VOLATILE", "STRICT", "CALLED", "SECURITY",
+                            "EXTERNAL", "PARALLEL", "LEAKPROOF", "NOT", "COST", "ROWS", "SUPPORT", "SET", "AS",
+                            "WINDOW", "TRANSFORM", "BEGIN", "RETURN"}
+
+# Palabras clave que leen el estado de la sesión o de la transacción (obligan a STABLE)
+SESSION_KEYWORDS = {"CURRENT_DATE", "CURRENT_TIME", "CURRENT_TIMESTAMP", "LOCALTIME", "LOCALTIMESTAMP",
+                    "CURRENT_USER", "SESSION_USER", "CURRENT_ROLE", "CURRENT_SCHEMA"}
+
+# Modificadores entre CREATE y el tipo de objeto
+CREATE_MODIFIERS = {"OR", "REPLACE", "GLOBAL", "LOCAL", "TEMP", "TEMPORARY", "UNLOGGED", "UNIQUE",
+                    "RECURSIVE", "MATERIALIZED", "CONSTRAINT"}
+
+
+def _qualified_type(tokens: List[Token], i: int) -> Optional[str]:
+    """Nombre calificado (schema.tipo) que empieza en tokens[i], si lo hay"""
+    name, _ = read_name(tokens, i)
+    if name and "." in name:
+        return name
+    return None
+
+
+def _type_text(tokens: List[Token]) -> str:
+    """Texto normalizado de un tipo (p. ej. 'numeric(5,2)', 'timestamp with time zone')"""
+    text = ""
+    for token in tokens:
+        value = token.value.lower() if token.kind == IDENT else token.value
+        if token.kind == OP or not text or text[-1] in "(.[,":
+            text += value
+        else:
+            text += " " + value
+    return text
+
+
+def _set_columns(stmt: List[Token], k: int) -> List[str]:
+    """Columnas asignadas por el SET que empieza en stmt[k] (UPDATE ... SET / DO UPDATE SET)"""
+    end = k + 1
+    depth = 0
+    while end < len(stmt):
+        if is_op(stmt[end], "("):
+            depth += 1
+        elif is_op(stmt[end], ")"):
+            depth -= 1
+        elif depth == 0 and is_word(stmt[end], "FROM", "WHERE", "RETURNING"):
+            break
+        end += 1
+    columns = []
+    for part in split_top_level(stmt[k + 1:end]):
+        if part and is_op(part[0], "("):   # SET (a, b) = (...)
+            columns += names(part[1:matching_paren(part, 0)])
+        elif part:
+            columns.append(part[0].value.lower())
+    return columns
+
+
+def _function_body(tokens: List[Token], language: Optional[str]) -> dict:
+    """Forma del cuerpo de una función: sentencias, DECLARE, EXCEPTION, SQL dinámico y
+    si es un solo RETURN, un SELECT ... INTO seguido de RETURN o (en SQL) un solo SELECT"""
+    statements = [statement for statement in split_statements(tokens)]
+    declares = False
+    if language == "plpgsql":
+        start = next((k for k, statement in enumerate(statements) if is_word(statement[0], "BEGIN")),
+                     len(statements))
+        declares = start > 0 and is_word(statements[0][0], "DECLARE")
+        body = statements[start:]
+        if body:
+            body[0] = body[0][1:]
+        body = [statement for statement in body if statement and not (is_word(statement[0], "END") and len(statement) <= 2)]
+    else:
+        body = statements
+
+    shape = None
+    if language == "plpgsql":
+        if len(body) == 1 and is_word(body[0][0], "RETURN") and not (len(body[0]) > 1 and is_word(body[0][1], "NEXT")):
+            shape = "return"
+        elif (len(body) == 2 and is_word(body[0][0], "SELECT") and any(is_word(t, "INTO") for t in body[0])
+              and is_word(body[1][0], "RETURN")):
+            shape = "select_into"
+    elif len(body) == 1 and is_word(body[0][0], "SELECT", "WITH", "VALUES"):
+        shape = "select"
+
+    n = len(tokens)
+    return {
+        "body_statements": len(body),
+        "body_shape": shape,
+        "declares": declares,
+        "handles_exceptions": any(is_word(t, "EXCEPTION") and k + 1 < n and is_word(tokens[k + 1], "WHEN")
+                                  for k, t in enumerate(tokens)),
+        "dynamic_sql": language == "plpgsql" and any(
+            is_word(t, "EXECUTE") and not (k + 1 < n and is_word(tokens[k + 1], "FUNCTION", "PROCEDURE"))
+            for k, t in enumerate(tokens)),
+        "session_keywords": any(is_word(t, *SESSION_KEYWORDS) for t in tokens),
+        "trigger_depth_guard": any(is_word(t, "PG_TRIGGER_DEPTH") for t in tokens),
+    }
+
+
+class _Extractor:
+    """Recorre las sentencias de un archivo y acumula sus objetos"""
+
+    def __init__(self):
+        self.facts: Dict[str, list] = {key: [] for key in FACT_KEYS}
+        self.current: Optional[dict] = None  # objeto al que se atribuyen las dependencias
+
+    # --- recorrido ---
+    def statements(self, tokens, top_level: bool):
+        for statement in split_statements(tokens):
+            self.statement(statement, top_level)
+
+    def statement(self, stmt: List[Token], top_level: bool):
+        head = stmt[0]
+        if top_level and is_word(head, "DROP"):
+            self.drop(stmt)
+        if top_level and is_word(head, *NON_CODE_STATEMENTS):
+            return
+        for i, token in enumerate(stmt[:-1]):  # también tras BEGIN / THEN en cuerpos plpgsql
+            if is_word(token, "REFRESH") and is_word(stmt[i + 1], "MATERIALIZED"):
+                self.refresh(stmt, i, top_level)
+        if top_level and is_word(head, "SET") and len(stmt) > 1 and is_word(stmt[1], "SEARCH_PATH"):
+            self.facts["search_path"] = names([t for t in stmt[2:] if not is_word(t, "TO") and not is_op(t, "=")])
+            return
+
+        outer = self.current
+        try:
+            for i, token in enumerate(stmt):
+                if is_word(token, "CREATE"):
+                    self.create(stmt, i)
+                elif is_word(token, "ALTER") and i + 1 < len(stmt) and is_word(stmt[i + 1], "TABLE"):
+                    self.alter_table(stmt, i + 2)
+
+            self.scan_casts(stmt)
+            if is_word(head, "DO"):
+                self.current = outer
+                for token in stmt:
+                    if token.kind == DOLLAR:
+                        self.statements(expand(token), top_level=False)
+            elif not self.is_create(stmt, "FUNCTION", "PROCEDURE"):
+                self.scan_usages(stmt)
+                self.scan_calls(stmt)
+        finally:
+            self.current = outer
+
+    @staticmethod
+    def is_create(stmt: List[Token], *objects: str) -> bool:
+        if not is_word(stmt[0], "CREATE"):
+            return False
+        for token in stmt[1:6]:
+            if is_word(token, *objects):
+                return True
+        return False
+
+    def new_object(self, kind: str, name: str, line: int, **extra) -> dict:
+        """Registra un objeto creado; las dependencias siguientes se le atribuyen"""
+        obj = {"kind": kind, "name": name, "line": line, **extra, "deps": []}
+        self.facts["objects"].append(obj)
+        self.current = obj
+        return obj
+
+    def depend(self, label: str, name: str, line: int):
+        if self.current is not None:
+            self.current["deps"].append([label, name, line])
+
+    # --- CREATE ---
+    def create(self, stmt: List[Token], i: int):
+        j = i + 1
+        modifiers = set()
+        while j < len(stmt) and is_word(stmt[j], *CREATE_MODIFIERS):
+            modifiers.add(stmt[j].value.upper())
+            j += 1
+        if j >= len(stmt):
+            return
+        obj = stmt[j].value.upper() if stmt[j].kind == IDENT else ""
+        j += 1
+        while j < len(stmt) and is_word(stmt[j], "IF", "NOT", "EXISTS"):
+            j += 1
+
+        if obj == "TABLE":
+            self.create_table(stmt, j)
+        elif obj == "TYPE":
+            self.create_type(stmt, j)
+        elif obj in ("FUNCTION", "PROCEDURE"):
+            self.create_function(stmt, j)
+        elif obj == "TRIGGER":
+            self.create_trigger(stmt, j)
+        elif obj == "VIEW":
+            name, _ = read_name(stmt, j)
+            if name:
+                self.facts["views"].append([name, stmt[j].line])
+                if "MATERIALIZED" in modifiers:
+                    populated = not (len(stmt) >= 3 and is_word(stmt[-3], "WITH") and is_word(stmt[-2], "NO")
+                                     and is_word(stmt[-1], "DATA"))
+                    self.new_object("materialized_view", name, stmt[j].line, populated=populated)
+                else:
+                    self.new_object("view", name, stmt[j].line)
+        elif obj == "INDEX":
+            self.create_index(stmt, j, unique="UNIQUE" in modifiers)
+        elif obj == "POLICY":
+            self.create_policy(stmt, j)
+
+    def create_table(self, stmt: List[Token], i: int):
+        name, j = read_name(stmt, i)
+        if not name:
+            return
+        self.facts["tables"].append([name, stmt[i].line])
+        self.new_object("table", name, stmt[i].line)
+        if j >= len(stmt) or not is_op(stmt[j], "("):
+            return
+        end = matching_paren(stmt, j)
+        for element in split_top_level(stmt[j + 1:end]):
+            column = None
+            if element and not is_word(element[0], *TABLE_CONSTRAINT_WORDS):
+                column = self.column(name, element)
+            self.keys(name, element, column)
+            self.scan_references(element, name, column)
+
+    def column(self, table: str, element: List[Token]) -> Optional[str]:
+        col_name, k = read_name(element, 0)
+        if not col_name:
+            return None
+        type_tokens = []
+        depth = 0
+        for token in element[k:]:
+            if depth == 0 and is_word(token, *COLUMN_CONSTRAINT_WORDS):
+                break
+            if is_op(token, "("):
+                depth += 1
+            elif is_op(token, ")"):
+                depth -= 1
+            type_tokens.append(token)
+        col_type = _type_text(type_tokens)
+        # Solo las palabras fuera de paréntesis: CHECK (a IS NOT NULL OR ...) no hace la columna NOT NULL
+        constraints = []
+        depth = 0
+        for token in element[k + len(type_tokens):]:
+            if is_op(token, "("):
+                depth += 1
+            elif is_op(token, ")"):
+                depth -= 1
+            elif depth == 0:
+                constraints.append(token)
+        not_null = any(is_word(token, "NULL") and j and is_word(constraints[j - 1], "NOT")
+                       for j, token in enumerate(constraints)) or any(is_word(token, "PRIMARY") for token in constraints)
+        has_default = (col_type in SERIAL_TYPES
+                       or any(is_word(token, "DEFAULT", "GENERATED") for token in constraints))
+        self.facts["columns"].append([table, col_name, col_type, element[0].line, not_null, has_default])
+        type_ref = _qualified_type(element, k)
+        if type_ref:
+            self.facts["type_refs"].append([type_ref, element[k].line, element[k].col])
+        type_name, _ = read_name(element, k)
+        if type_name:
+            self.depend("type", type_name, element[k].line)
+        return col_name
+
+    def keys(self, table: str, element: List[Token], column: Optional[str]):
+        """PRIMARY KEY y UNIQUE de columna o de tabla (cada uno crea un índice btree)"""
+        depth = 0
+        for k, token in enumerate(element):
+            if is_op(token, "("):
+                depth += 1
+            elif is_op(token, ")"):
+                depth -= 1
+            elif depth == 0 and is_word(token, "PRIMARY", "UNIQUE"):
+                kind = "primary" if is_word(token, "PRIMARY") else "unique"
+                start = k + 2 if kind == "primary" else k + 1
+                if start < len(element) and is_op(element[start], "("):
+                    columns = names(element[start + 1:matching_paren(element, start)])
+                elif column:
+                    columns = [column]
+                else:
+                    continue
+                self.facts["keys"].append([table, columns, kind, token.line])
+
+    def create_type(self, stmt: List[Token], i: int):
+        name, j = read_name(stmt, i)
+        if not name:
+            return
+        self.new_object("type", name, stmt[i].line)
+        if j + 2 >= len(stmt):
+            return
+        if is_word(stmt[j], "AS") and is_word(stmt[j + 1], "ENUM") and is_op(stmt[j + 2], "("):
+            end = matching_paren(stmt, j + 2)
+            values = [token.value for token in stmt[j + 3:end] if token.kind == STRING]
+            self.facts["enums"].append([name, values, stmt[i].line])
+
+    def create_function(self, stmt: List[Token], i: int):
+        name, j = read_name(stmt, i)
+        bodies = [list(expand(token)) for token in stmt[i:] if token.kind == DOLLAR]
+        if name:
+            self.facts["functions"].append([name, stmt[i].line])
+            attrs = self.function_attributes(stmt, j)
+            if bodies:
+                attrs.update(_function_body(bodies[0], attrs["language"]))
+            self.new_object("function", name, stmt[i].line, **attrs)
+        for body in bodies:
+            self.statements(body, top_level=False)
+
+    @staticmethod
+    def function_attributes(stmt: List[Token], j: int) -> dict:
+        """Argumentos, RETURNS y atributos declarados (LANGUAGE, volatilidad, STRICT, SECURITY, PARALLEL, SET)"""
+        attrs = {"args": "", "returns": None, "language": None, "volatility": "VOLATILE", "strict": False,
+                 "security_definer": False, "parallel": "UNSAFE", "leakproof": False, "config": [],
+                 "write_events": []}
+        n = len(stmt)
+        if j < n and is_op(stmt[j], "("):
+            close = matching_paren(stmt, j)
+            attrs["args"] = sql_text(stmt[j + 1:close])
+            j = close + 1
+        while j < n:
+            token = stmt[j]
+            if is_word(token, "RETURNS"):
+                if j + 1 < n and is_word(stmt[j + 1], "NULL"):  # RETURNS NULL ON NULL INPUT
+                    attrs["strict"] = True
+                    j += 5
+                    continue
+                k = j + 1
+                while k < n and not is_word(stmt[k], *FUNCTION_ATTRIBUTE_WORDS) and stmt[k].kind != DOLLAR:
+                    if is_op(stmt[k], "("):
+                        k = matching_paren(stmt, k)
+                    k += 1
+                attrs["returns"] = sql_text(stmt[j + 1:k])
+                j = k
+                continue
+            if is_word(token, "LANGUAGE") and j + 1 < n:
+                attrs["language"] = stmt[j + 1].value.lower()
+                j += 1
+            elif is_word(token, "IMMUTABLE", "STABLE", "VOLATILE"):
+                attrs["volatility"] = token.value.upper()
+            elif is_word(token, "STRICT"):
+                attrs["strict"] = True
+            elif is_word(token, "SECURITY") and j + 1 < n:
+                attrs["security_definer"] = is_word(stmt[j + 1], "DEFINER")
+                j += 1
+            elif is_word(token, "PARALLEL") and j + 1 < n:
+                attrs["parallel"] = stmt[j + 1].value.upper()
+                j += 1
+            elif is_word(token, "SET") and j + 1 < n and stmt[j + 1].kind in (IDENT, QIDENT):
+                attrs["config"].append(stmt[j + 1].value.lower())   # SET param = valor / FROM CURRENT
+                j += 1
+            elif is_word(token, "LEAKPROOF"):
+                attrs["leakproof"] = not is_word(stmt[j - 1], "NOT")
+            elif is_word(token, "BEGIN"):  # cuerpo SQL estándar (BEGIN ATOMIC ... END)
+                break
+            j += 1
+        return attrs
+
+    def create_trigger(self, stmt: List[Token], i: int):
+        """CREATE TRIGGER nombre {BEFORE|AFTER|INSTEAD OF} eventos ON tabla ... EXECUTE FUNCTION f()"""
+        name, j = read_name(stmt, i)
+        if not name:
+            return
+        trigger = {"timing": None, "events": [], "columns": [], "table": None, "level": "STATEMENT",
+                   "when": None, "function": None}
+        n = len(stmt)
+        while j < n:
+            token = stmt[j]
+            if is_word(token, "BEFORE", "AFTER") and trigger["table"] is None:
+                trigger["timing"] = token.value.upper()
+            elif is_word(token, "INSTEAD") and trigger["table"] is None:
+                trigger["timing"] = "INSTEAD OF"
+                j += 1
+            elif is_word(token, "INSERT", "UPDATE", "DELETE", "TRUNCATE") and trigger["table"] is None:
+                trigger["events"].append(token.value.upper())
+                if j + 1 < n and is_word(stmt[j + 1], "OF"):
+                    k = j + 2
+                    while k < n and not is_word(stmt[k], "OR", "ON"):
+                        k += 1
+                    trigger["columns"] = names(stmt[j + 2:k])
+                    j = k
+                    continue
+            elif is_word(token, "ON") and trigger["table"] is None:
+                trigger["table"], j = read_name(stmt, j + 1)
+                continue
+            elif is_word(token, "ROW", "STATEMENT") and is_word(stmt[j - 1], "EACH", "FOR"):
+                trigger["level"] = token.value.upper()
+            elif is_word(token, "WHEN") and j + 1 < n and is_op(stmt[j + 1], "("):
+                close = matching_paren(stmt, j + 1)
+                trigger["when"] = sql_text(stmt[j + 2:close])
+                j = close
+            elif is_word(token, "EXECUTE") and j + 2 < n and is_word(stmt[j + 1], "FUNCTION", "PROCEDURE"):
+                func, _ = read_name(stmt, j + 2)
+                if func:
+                    trigger["function"] = func
+                    self.facts["trigger_calls"].append([func, stmt[j + 2].line, stmt[j + 2].col])
+                break
+            j += 1
+
+        if trigger["table"] is None:
+            return
+        self.new_object("trigger", name, stmt[i].line, **trigger)
+        self.depend("table", trigger["table"], stmt[i].line)
+        if trigger["function"]:
+            self.depend("executes", trigger["function"], stmt[i].line)
+
+    def create_index(self, stmt: List[Token], i: int, unique: bool):
+        """CREATE [UNIQUE] INDEX [CONCURRENTLY] [nombre] ON tabla [USING método] (...) [INCLUDE (...)] [WHERE ...]"""
+        n = len(stmt)
+        while i < n and is_word(stmt[i], "CONCURRENTLY", "IF", "NOT", "EXISTS"):
+            i += 1
+        name = None
+        if i < n and not is_word(stmt[i], "ON"):
+            name, i = read_name(stmt, i)
+        if i >= n or not is_word(stmt[i], "ON"):
+            return
+        i += 1
+        if i < n and is_word(stmt[i], "ONLY"):
+            i += 1
+        table, i = read_name(stmt, i)
+        if not table:
+            return
+        line = stmt[i - 1].line
+        method = "btree"
+        if i + 1 < n and is_word(stmt[i], "USING"):
+            method = stmt[i + 1].value.lower()
+            i += 2
+        if i >= n or not is_op(stmt[i], "("):
+            return
+
+        end = matching_paren(stmt, i)
+        elements = split_top_level(stmt[i + 1:end])
+        columns = []
+        for element in elements:
+            simple = element[0].kind in (IDENT, QIDENT) and (len(element) == 1 or element[1].kind == IDENT)
+            columns.append(read_name(element, 0)[0] if simple else None)
+
+        include, where = [], None
+        i = end + 1
+        while i < n:
+            if is_word(stmt[i], "INCLUDE") and i + 1 < n and is_op(stmt[i + 1], "("):
+                close = matching_paren(stmt, i + 1)
+                include = names(stmt[i + 2:close])
+                i = close
+            elif is_word(stmt[i], "WITH") and i + 1 < n and is_op(stmt[i + 1], "("):
+                i = matching_paren(stmt, i + 1)
+            elif is_word(stmt[i], "WHERE"):
+                where = sql_text(stmt[i + 1:])
+                break
+            i += 1
+
+        if name is None:
+            # Nombre que asigna PostgreSQL a un índice sin nombre
+            parts = [table.rsplit(".", 1)[-1]] + [c for c in columns if c] + ["idx"]
+            name = "_".join(parts)
+        self.new_object("index", name, line, table=table, unique=unique, method=method,
+                        elements=[sql_text(element) for element in elements], columns=columns,
+                        include=include, where=where)
+        self.depend("table", table, line)
+
+    def create_policy(self, stmt: List[Token], i: int):
+        """CREATE POLICY nombre ON tabla [AS ...] [FOR comando] [TO roles] [USING (...)] [WITH CHECK (...)]"""
+        name, j = read_name(stmt, i)
+        n = len(stmt)
+        if not name or j >= n or not is_word(stmt[j], "ON"):
+            return
+        table, j = read_name(stmt, j + 1)
+        if not table:
+            return
+        policy = {"table": table, "permissive": True, "command": "ALL", "roles": [], "using": None,
+                  "check": None}
+        while j < n:
+            token = stmt[j]
+            if is_word(token, "AS") and j + 1 < n:
+                policy["permissive"] = not is_word(stmt[j + 1], "RESTRICTIVE")
+                j += 1
+            elif is_word(token, "FOR") and j + 1 < n:
+                policy["command"] = stmt[j + 1].value.upper()
+                j += 1
+            elif is_word(token, "TO"):
+                k = j + 1
+                while k < n and not is_word(stmt[k], "USING", "WITH"):
+                    k += 1
+                policy["roles"] = names(stmt[j + 1:k])
+                j = k
+                continue
+            elif is_word(token, "USING") and j + 1 < n and is_op(stmt[j + 1], "("):
+                close = matching_paren(stmt, j + 1)
+                policy["using"] = sql_text(stmt[j + 2:close])
+                j = close
+            elif (is_word(token, "WITH") and j + 2 < n and is_word(stmt[j + 1], "CHECK")
+                  and is_op(stmt[j + 2], "(")):
+                close = matching_paren(stmt, j + 2)
+                policy["check"] = sql_text(stmt[j + 3:close])
+                j = close
+            j += 1
+
+        self.new_object("policy", name, stmt[i].line, **policy)
+        self.depend("table", table, stmt[i].line)
+
+    # --- DROP / REFRESH ---
+    def drop(self, stmt: List[Token]):
+        """DROP {TABLE|VIEW|MATERIALIZED VIEW} [IF EXISTS] nombres [CASCADE]"""
+        n = len(stmt)
+        if n > 2 and is_word(stmt[1], "MATERIALIZED") and is_word(stmt[2], "VIEW"):
+            kind, j = "materialized_view", 3
+        elif n > 1 and is_word(stmt[1], "VIEW", "TABLE"):
+            kind, j = stmt[1].value.lower(), 2
+        else:
+            return
+        while j < n and is_word(stmt[j], "IF", "EXISTS"):
+            j += 1
+        cascade = is_word(stmt[-1], "CASCADE")
+        for name in names(stmt[j:]):
+            self.facts["drops"].append([kind, name, cascade, stmt[0].line])
+
+    def refresh(self, stmt: List[Token], i: int, top_level: bool):
+        """REFRESH MATERIALIZED VIEW [CONCURRENTLY] nombre (stmt[i] es REFRESH)"""
+        j = i + 3
+        concurrently = j < len(stmt) and is_word(stmt[j], "CONCURRENTLY")
+        name, _ = read_name(stmt, j + 1 if concurrently else j)
+        if name:
+            self.facts["refreshes"].append([name, concurrently, top_level, stmt[i].line])
+            self.depend("refreshes", name, stmt[i].line)
+
+    # --- ALTER TABLE ---
+    def alter_table(self, stmt: List[Token], i: int):
+        while i < len(stmt) and is_word(stmt[i], "IF", "EXISTS", "ONLY"):
+            i += 1
+        table, j = read_name(stmt, i)
+        if not table:
+            return
+        for action in split_top_level(stmt[j:]):
+            if action and is_word(action[0], "ADD"):
+                k = 1
+                if k < len(action) and is_word(action[k], "COLUMN"):
+                    k += 1
+                while k < len(action) and is_word(action[k], "IF", "NOT", "EXISTS"):
+                    k += 1
+                column = None
+                if k < len(action) and not is_word(action[k], *TABLE_CONSTRAINT_WORDS):
+                    column = self.column(table, action[k:])
+                self.keys(table, action[k:], column)
+                if any(is_word(token, "REFERENCES") for token in action):
+                    self.fk_constraint(table, action)
+                self.scan_references(action, table, column)
+            else:
+                self.scan_references(action)
+
+    def fk_constraint(self, table: str, action: List[Token]):
+        """FK agregado con ALTER TABLE (p. ej. los FKs diferidos de fk-constraints/)"""
+        name = None
+        for k, token in enumerate(action[:-1]):
+            if is_word(token, "CONSTRAINT"):
+                name, _ = read_name(action, k + 1)
+                break
+        if name is None:
+            column, _ = read_name(action, 2 if is_word(action[1], "COLUMN") else 1)
+            name = f"{table.rsplit('.', 1)[-1]}_{column}_fkey"
+        self.new_object("constraint", name, action[0].line, table=table)
+        self.depend("table", table, action[0].line)
+
+    # --- referencias ---
+    def scan_references(self, tokens: List[Token], table: Optional[str] = None, column: Optional[str] = None):
+        """REFERENCES de una columna, restricción o acción de ALTER TABLE sobre `table`"""
+        for j, token in enumerate(tokens[:-1]):
+            if is_word(token, "REFERENCES"):
+                ref, after = read_name(tokens, j + 1)
+                if ref:
+                    self.facts["references"].append([ref, tokens[j + 1].line, tokens[j + 1].col])
+                    self.depend("fk", ref, tokens[j + 1].line)
+                    if table is not None:
+                        self.foreign_key(table, column, tokens, j, ref, after)
+
+    def foreign_key(self, table: str, column: Optional[str], tokens: List[Token], j: int, ref: str, after: int):
+        """`col tipo REFERENCES t(x)` o `FOREIGN KEY (a, b) REFERENCES t(x, y)` con su ON DELETE"""
+        columns = [column] if column else []
+        for k in range(j - 2):
+            if is_word(tokens[k], "FOREIGN") and is_word(tokens[k + 1], "KEY") and is_op(tokens[k + 2], "("):
+                columns = names(tokens[k + 3:matching_paren(tokens, k + 2)])
+        if not columns:
+            return
+        ref_columns = []
+        if after < len(tokens) and is_op(tokens[after], "("):
+            ref_columns = names(tokens[after + 1:matching_paren(tokens, after)])
+        on_delete = None
+        for k in range(after, len(tokens) - 2):
+            if is_word(tokens[k], "ON") and is_word(tokens[k + 1], "DELETE"):
+                words = tokens[k + 2:k + 4] if is_word(tokens[k + 2], "SET", "NO") else tokens[k + 2:k + 3]
+                on_delete = " ".join(word.value.upper() for word in words)
+                break
+        self.facts["foreign_keys"].append([table, columns, ref, ref_columns, on_delete,
+                                           tokens[j + 1].line, tokens[j + 1].col])
+
+    def scan_casts(self, stmt: List[Token]):
+        for j, token in enumerate(stmt[:-1]):
+            if is_op(token, "::"):
+                type_ref = _qualified_type(stmt, j + 1)
+                if type_ref:
+                    self.facts["type_refs"].append([type_ref, stmt[j + 1].line, stmt[j + 1].col])
+                    self.depend("type", type_ref, stmt[j + 1].line)
+
+    def scan_calls(self, stmt: List[Token]):
+        """Funciones invocadas como `nombre(...)` (las no definidas en el corpus se ignoran al resolver)"""
+        n = len(stmt)
+        for j, token in enumerate(stmt):
+            if token.kind not in (IDENT, QIDENT):
+                continue
+            prev = stmt[j - 1] if j else None
+            if prev is not None and (is_op(prev, ".") or is_word(prev, *NON_CALL_PREFIXES)):
+                continue
+            if is_word(token, *PAREN_KEYWORDS):
+                continue
+            name, after = read_name(stmt, j)
+            if after < n and is_op(stmt[after], "("):
+                self.depend("calls", name, token.line)
+
+    def scan_usages(self, stmt: List[Token]):
+        """Tablas usadas por FROM, JOIN, INSERT INTO, UPDATE y DELETE FROM"""
+        ctes: Set[str] = set()
+        calls: List[str] = []  # funciones de los paréntesis abiertos
+        n = len(stmt)
+
+        for j, token in enumerate(stmt):
+            if token.kind == OP:
+                if token.value == "(":
+                    prev = stmt[j - 1] if j else None
+                    calls.append(prev.value.upper() if prev is not None and prev.kind == IDENT else "")
+                elif token.value == ")" and calls:
+                    calls.pop()
+                continue
+            if token.kind != IDENT:
+                continue
+
+            word = token.value.upper()
+            prev = stmt[j - 1] if j else None
+            target = None
+            label = "reads"
+
+            if word == "AS" and j + 1 < n and is_op(stmt[j + 1], "(") and prev is not None and prev.kind == IDENT:
+                before = stmt[j - 2] if j >= 2 else None
+                if before is not None and (is_word(before, "WITH", "RECURSIVE") or is_op(before, ",")):
+                    ctes.add(prev.value.lower())
+            elif word == "FROM":
+                if prev is not None and is_word(prev, "DISTINCT"):
+                    continue
+                if calls and calls[-1] in FROM_ARGUMENT_FUNCTIONS:
+                    continue
+                target = j + 1
+                if prev is not None and is_word(prev, "DELETE"):
+                    label = "writes"
+            elif word == "JOIN":
+                target = j + 1
+                if target < n and is_word(stmt[target], "LATERAL"):
+                    continue
+            elif word == "INTO" and prev is not None and is_word(prev, "INSERT"):
+                target = j + 1
+                label = "writes"
+            elif word == "UPDATE":
+                if prev is not None and (is_op(prev, ",") or is_word(prev, *NON_DML_UPDATE_PREFIXES)):
+                    continue
+                target = j + 1
+                label = "writes"
+
+            if target is None or target >= n:
+                continue
+            if is_word(stmt[target], "ONLY"):
+                target += 1
+            name, after = read_name(stmt, target)
+            if not name or name.upper() in RESERVED_WORDS:
+                continue
+            if after < n and is_op(stmt[after], "(") and not is_word(token, "INTO"):
+                continue  # llamada a función (FROM unnest(...)); INSERT INTO t (...) lleva columnas
+            if "." not in name and name in ctes:
+                continue
+            self.facts["table_usages"].append([name, stmt[target].line, stmt[target].col])
+            self.depend(label, name, stmt[target].line)
+            if label == "writes":
+                self.write_events(stmt, word, name, after)
+
+    def write_events(self, stmt: List[Token], word: str, name: str, after: int):
+        """Evento de cada escritura de una función (para la cascada de triggers):
+        [tabla, INSERT|UPDATE|DELETE, columnas del SET o None, línea]"""
+        if self.current is None or "write_events" not in self.current:
+            return
+        events = self.current["write_events"]
+        line = stmt[after - 1].line
+        if word == "FROM":
+            events.append([name, "DELETE", None, line])
+        elif word == "INTO":
+            events.append([name, "INSERT", None, line])
+            for k in range(after, len(stmt) - 2):   # INSERT ... ON CONFLICT ... DO UPDATE SET
+                if is_word(stmt[k], "DO") and is_word(stmt[k + 1], "UPDATE") and is_word(stmt[k + 2], "SET"):
+                    events.append([name, "UPDATE", _set_columns(stmt, k + 2), stmt[k + 1].line])
+                    break
+        else:
+            k = after
+            while k < len(stmt) and not is_word(stmt[k], "SET") and k < after + 3:   # alias
+                k += 1
+            columns = _set_columns(stmt, k) if k < len(stmt) and is_word(stmt[k], "SET") else None
+            events.append([name, "UPDATE", columns, line])
+
+
+def extract_facts(content: str) -> Dict[str, list]:
+    """Extrae los objetos de un archivo con una sola pasada del tokenizador"""
+    extractor = _Extractor()
+    extractor.statements(tokenize(content), top_level=True)
+    return extractor.facts
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Proyectos (árboles DDL) que valida validate_integrity.py en una sola ejecución
+
+Cada proyecto es una raíz más los patrones glob de los .sql a incluir. Se
+declaran con --root [NOMBRE=]RUTA (repetible) o en un archivo TOML con --config,
+donde las rutas son relativas al archivo:
+
+    [[project]]
+    name = "gamilit"
+    root = "ddl"
+    rules = "integrity_rules.toml"   # reglas del tracking (solo GAMILIT; ver ddl_rules.py)
+
+    [[project]]
+    name = "erp-construccion"
+    root = "../../../../projects/erp-construccion"
+    include = ["apps/database/ddl/**/*.sql", "docs/**/implementacion/*.sql"]
+
+Sin --root ni --config se valida el ddl/ que está junto a scripts/.
+Fecha: 2025-11-10
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from ddl_corpus import DEFAULT_INCLUDE
+from ddl_rules import DEFAULT_RULES
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# ddl/ del repositorio (hermano de scripts/)
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent / "ddl"
+
+# Directorios que no dan nombre al proyecto (…/gamilit/apps/database/ddl → gamilit)
+GENERIC_DIRS = {"ddl", "database", "apps", "db", "sql"}
+
+PROJECT_KEYS = {"name", "root", "include", "rules"}
+
+
+@dataclass(frozen=True)
+class Project:
+    """Un árbol DDL a validar"""
+    name: str
+    root: Path
+    include: Tuple[str, ...] = DEFAULT_INCLUDE
+    rules: Optional[Path] = None     # reglas de validate_corrections (el tracking es del DDL de GAMILIT)
+
+
+def project_name(root: Path) -> str:
+    """Primer directorio con nombre propio subiendo desde `root`"""
+    for part in reversed(Path(root).resolve().parts):
+        if part.lower() not in GENERIC_DIRS:
+            return part
+    return Path(root).name
+
+
+def is_default_root(root: Path) -> bool:
+    return Path(root).resolve() == DEFAULT_ROOT
+
+
+def default_projects() -> List[Project]:
+    return [Project(project_name(DEFAULT_ROOT), DEFAULT_ROOT, rules=DEFAULT_RULES)]
+
+
+def parse_root(spec: str) -> Project:
+    """Proyecto de un argumento --root: RUTA o NOMBRE=RUTA"""
+    name, sep, path = spec.partition("=")
+    if not sep or "/" in name:
+        name, path = "", spec
+    root = Path(path)
+    if not root.is_dir():
+        raise ValueError(f"no es un directorio: {root}")
+    return Project(name or project_name(root), root, rules=DEFAULT_RULES if is_default_root(root) else None)
+
+
+def load_config(path: Path) -> List[Project]:
+    """Proyectos declarados en un archivo TOML ([[project]] con name, root, include, rules)"""
+    if tomllib is None:
+        raise ValueError("leer --config requiere Python 3.11+ o el paquete tomli (alternativa: --root)")
+    path = Path(path)
+    try:
+        with path.open("rb") as f:
+            data = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise ValueError(f"no se pudo leer {path}: {e}")
+
+    projects = []
+    for number, entry in enumerate(data.get("project", []), 1):
+        unknown = set(entry) - PROJECT_KEYS
+        if unknown:
+            raise ValueError(f"{path}: proyecto {number} con claves desconocidas: {', '.join(sorted(unknown))}")
+        if "root" not in entry:
+            raise ValueError(f"{path}: proyecto {number} sin 'root'")
+        root = (path.parent / entry["root"]).resolve()
+        if not root.is_dir():
+            raise ValueError(f"{path}: proyecto {number}: no es un directorio: {root}")
+        include = entry.get("include", list(DEFAULT_INCLUDE))
+        if isinstance(include, str):
+            include = [include]
+        if "rules" in entry:
+            rules = (path.parent / entry["rules"]).resolve()
+        else:
+            rules = DEFAULT_RULES if is_default_root(root) else None
+        projects.append(Project(
+            name=entry.get("name") or project_name(root),
+            root=root,
+            include=tuple(include),
+            rules=rules,
+        ))
+    if not projects:
+        raise ValueError(f"{path}: no declara ningún [[project]]")
+    return projects
+
+
+def unique_names(projects: List[Project]):
+    """Error si dos proyectos comparten nombre (agrupan sus resultados por nombre)"""
+    seen = set()
+    for project in projects:
+        if project.name in seen:
+            raise ValueError(f"proyecto duplicado: {project.name} (usar NOMBRE=RUTA)")
+        seen.add(project.name)
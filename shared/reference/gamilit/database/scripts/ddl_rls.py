@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Linter de rendimiento de las policies RLS del DDL de GAMILIT
+
+PostgreSQL evalúa las expresiones USING / WITH CHECK de una policy sobre cada
+fila que lee o escribe la consulta. El linter re-analiza esas expresiones,
+resuelve cada llamada a función contra el índice de funciones del grafo
+(volatilidad, lenguaje y SECURITY DEFINER declarados) y marca:
+
+- llamadas STABLE/VOLATILE sin envolver en (SELECT fn()): se ejecutan una vez
+  por fila en lugar de una vez por consulta (initplan); las plpgsql y las
+  SECURITY DEFINER además no se pueden inlinear,
+- subconsultas correlacionadas con la fila de la policy (una ejecución por fila),
+- predicados = / IN sobre columnas sin un índice que empiece por ellas.
+
+Uso:
+    python3 scripts/ddl_rls.py                                  # reporte por tabla
+    python3 scripts/ddl_rls.py --table social_features.classroom_members
+Fecha: 2025-11-10
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from ddl_corpus import DDLCorpus, qualify
+from ddl_graph import RELATION_KINDS, DDLGraph, Node, search_path_of
+from ddl_indexes import collect_indexes
+from ddl_parser import RESERVED_WORDS
+from sql_lexer import IDENT, PAREN_KEYWORDS, QIDENT, Token, is_op, is_word, read_name, tokenize
+
+# Tipos de hallazgo
+PER_ROW_CALL = "RLS_PER_ROW_CALL"
+CORRELATED_SUBQUERY = "RLS_CORRELATED_SUBQUERY"
+UNINDEXED_PREDICATE = "RLS_UNINDEXED_PREDICATE"
+
+# Funciones del sistema frecuentes en policies (no están en el corpus)
+BUILTIN_FUNCTIONS = {
+    "current_setting": "STABLE",
+    "now": "STABLE",
+    "auth.uid": "STABLE",
+    "auth.jwt": "STABLE",
+    "auth.role": "STABLE",
+}
+
+# Palabras que pueden aparecer como identificadores sueltos en una expresión
+EXPRESSION_WORDS = RESERVED_WORDS | PAREN_KEYWORDS | {
+    "ELSE", "DISTINCT", "INTERVAL", "CURRENT_USER", "SESSION_USER", "CURRENT_ROLE", "CURRENT_DATE",
+    "CURRENT_TIMESTAMP", "LOCALTIMESTAMP", "USER", "LEFT", "RIGHT", "INNER", "OUTER", "FULL", "CROSS",
+    "NATURAL", "HAVING", "OFFSET", "UNION", "EXCEPT", "INTERSECT",
+}
+
+
+@dataclass
+class Scope:
+    """Nivel superior de una expresión o una subconsulta (SELECT ...) entre paréntesis"""
+    parent: Optional[int]
+    tables: Dict[str, str] = field(default_factory=dict)   # alias o nombre -> tabla calificada
+    correlated: bool = False
+
+    @property
+    def subquery(self) -> bool:
+        return self.parent is not None
+
+
+@dataclass
+class ColumnRef:
+    """Columna de una tabla referenciada en la expresión (tokens[start:end])"""
+    table: str
+    column: str
+    start: int
+    end: int
+    scope: int
+    owner: int          # scope cuyo FROM aporta la tabla (distinto de `scope` si es correlacionada)
+
+
+@dataclass
+class PolicyFinding:
+    """Un patrón costoso en una cláusula de una policy"""
+    kind: str
+    severity: str
+    policy: Node
+    clause: str             # USING o WITH CHECK
+    message: str
+
+
+def table_columns(corpus: DDLCorpus) -> Dict[str, Set[str]]:
+    """Columnas de cada tabla del build"""
+    columns: Dict[str, Set[str]] = defaultdict(set)
+    for sql_file in corpus.files:
+        if not sql_file.live:
+            continue
+        for table, column, *_ in sql_file.facts["columns"]:
+            columns[qualify(table, sql_file.schema)].add(column)
+    return columns
+
+
+def _scopes(tokens: List[Token]) -> Tuple[List[Scope], List[int]]:
+    """Scopes de la expresión y el scope al que pertenece cada token"""
+    scopes = [Scope(None)]
+    owner = []
+    stack = [0]
+    for i, token in enumerate(tokens):
+        if is_op(token, "("):
+            owner.append(stack[-1])
+            if i + 1 < len(tokens) and is_word(tokens[i + 1], "SELECT", "WITH"):
+                scopes.append(Scope(stack[-1]))
+                stack.append(len(scopes) - 1)
+            else:
+                stack.append(stack[-1])
+        elif is_op(token, ")") and len(stack) > 1:
+            stack.pop()
+            owner.append(stack[-1])
+        else:
+            owner.append(stack[-1])
+    return scopes, owner
+
+
+def _add_table(scope: Scope, table: str, alias: Optional[str] = None):
+    if alias:
+        scope.tables[alias] = table
+    else:
+        scope.tables[table] = table
+        scope.tables[table.rsplit(".", 1)[-1]] = table
+
+
+class PolicyLinter:
+    """Analiza las cláusulas de las policies con el grafo, las columnas y los índices del build"""
+
+    def __init__(self, corpus: DDLCorpus, graph: DDLGraph):
+        self.corpus = corpus
+        self.graph = graph
+        self.columns = table_columns(corpus)
+        self.leading: Dict[str, Set[str]] = {
+            table: {index.columns[0] for index in indexes if index.columns and index.columns[0]}
+            for table, indexes in collect_indexes(corpus, graph).items()
+        }
+        self.search_paths = {str(sql_file.path): search_path_of(sql_file)
+                             for sql_file in corpus.files if sql_file.live}
+
+    def lint(self) -> List[PolicyFinding]:
+        findings = []
+        for node in sorted(self.graph.nodes.values(), key=lambda n: (n.table or "", n.name)):
+            if node.kind != "policy":
+                continue
+            seen = set()
+            for clause, key in (("USING", "using"), ("WITH CHECK", "check")):
+                if not node.data.get(key):
+                    continue
+                for finding in self.lint_clause(node, clause, node.data[key]):
+                    if (finding.kind, finding.message) not in seen:
+                        seen.add((finding.kind, finding.message))
+                        findings.append(finding)
+        return findings
+
+    # --- análisis de una cláusula ---
+    def lint_clause(self, policy: Node, clause: str, text: str) -> List[PolicyFinding]:
+        search_path = self.search_paths.get(policy.file, ["public"])
+        tokens = list(tokenize(text))
+        scopes, owner = _scopes(tokens)
+        _add_table(scopes[0], policy.table)
+        skip = self._from_tables(tokens, scopes, owner, search_path)
+
+        refs, calls = [], []
+        n = len(tokens)
+        i = 0
+        while i < n:
+            token = tokens[i]
+            if (i in skip or token.kind not in (IDENT, QIDENT)
+                    or (i > 0 and is_op(tokens[i - 1], ".", "::"))):
+                i += 1
+                continue
+            name, j = read_name(tokens, i)
+            if j < n and is_op(tokens[j], "("):
+                if not (token.kind == IDENT and "." not in name and is_word(token, *EXPRESSION_WORDS)):
+                    calls.append((name, i, j, self._close(tokens, j)))
+            elif not (token.kind == IDENT and "." not in name and is_word(token, *EXPRESSION_WORDS)):
+                ref = self._column(name, i, j, owner[i], scopes)
+                if ref is not None:
+                    refs.append(ref)
+            i = j
+
+        findings = []
+        findings += self._calls(policy, clause, calls, refs, scopes, owner, search_path)
+        findings += self._correlated(policy, clause, scopes)
+        findings += self._unindexed(policy, clause, tokens, refs, scopes)
+        return findings
+
+    def _from_tables(self, tokens, scopes, owner, search_path) -> Set[int]:
+        """Registra las tablas de cada FROM / JOIN en su scope; devuelve las posiciones a ignorar"""
+        skip = set()
+        n = len(tokens)
+        for i, token in enumerate(tokens):
+            if not is_word(token, "FROM", "JOIN"):
+                continue
+            name, j = read_name(tokens, i + 1)
+            if not name or is_word(tokens[i + 1], *EXPRESSION_WORDS):
+                continue
+            node_id = self.graph.resolve(name, RELATION_KINDS, search_path)
+            table = self.graph.nodes[node_id].name if node_id else qualify(name, search_path[0])
+            skip.update(range(i + 1, j))
+            if j < n and is_word(tokens[j], "AS"):
+                skip.add(j)
+                j += 1
+            alias = None
+            if j < n and tokens[j].kind in (IDENT, QIDENT) and not is_word(tokens[j], *EXPRESSION_WORDS):
+                alias = tokens[j].value.lower() if tokens[j].kind == IDENT else tokens[j].value
+                skip.add(j)
+            _add_table(scopes[owner[i]], table, alias)
+        return skip
+
+    @staticmethod
+    def _close(tokens: List[Token], open_index: int) -> int:
+        depth = 0
+        for k in range(open_index, len(tokens)):
+            if is_op(tokens[k], "("):
+                depth += 1
+            elif is_op(tokens[k], ")"):
+                depth -= 1
+                if depth == 0:
+                    return k
+        return len(tokens)
+
+    def _column(self, name: str, start: int, end: int, scope_id: int, scopes: List[Scope]) -> Optional[ColumnRef]:
+        """Resuelve `name` (col o alias.col) subiendo por los scopes; marca las subconsultas correlacionadas"""
+        qualifier, _, column = name.rpartition(".")
+        s = scope_id
+        while s is not None:
+            scope = scopes[s]
+            table = None
+            if qualifier:
+                table = scope.tables.get(qualifier)
+            else:
+                matches = {t for t in scope.tables.values() if column in self.columns.get(t, ())}
+                if len(matches) > 1:
+                    return None  # ambigua: PostgreSQL la rechazaría
+                table = matches.pop() if matches else None
+            if table is not None:
+                if column not in self.columns.get(table, ()):
+                    return None
+                k = scope_id
+                while k != s:
+                    scopes[k].correlated = True
+                    k = scopes[k].parent
+                return ColumnRef(table, column, start, end, scope_id, s)
+            s = scope.parent
+        return None
+
+    def _function(self, name: str, search_path: List[str]) -> Optional[dict]:
+        """Atributos declarados de la función (o de un builtin conocido)"""
+        node_id = self.graph.resolve(name, ("function",), search_path)
+        if node_id is not None:
+            return self.graph.nodes[node_id].data
+        if name in BUILTIN_FUNCTIONS:
+            return {"volatility": BUILTIN_FUNCTIONS[name], "language": "internal", "security_definer": False}
+        return None
+
+    def _calls(self, policy, clause, calls, refs, scopes, owner, search_path) -> List[PolicyFinding]:
+        findings = []
+        for name, start, open_index, close in calls:
+            attrs = self._function(name, search_path)
+            if attrs is None or attrs.get("volatility") == "IMMUTABLE":
+                continue
+            scope = scopes[owner[start]]
+            per_row = not scope.subquery or scope.correlated
+            if not per_row:
+                continue   # envuelta en (SELECT fn()) o dentro de una subconsulta que se ejecuta una vez
+            volatility = attrs.get("volatility", "VOLATILE")
+            language = attrs.get("language") or "?"
+            opaque = language == "plpgsql" or attrs.get("security_definer")
+            row_args = any(open_index < ref.start < close for ref in refs)
+            traits = f"{volatility}, {language}" + (", SECURITY DEFINER" if attrs.get("security_definer") else "")
+            where = "en una subconsulta correlacionada" if scope.subquery else "en el predicado"
+            if row_args:
+                if not opaque:
+                    continue   # LANGUAGE sql inlineable: el planner la expande
+                findings.append(PolicyFinding(
+                    PER_ROW_CALL, "MEDIO", policy, clause,
+                    f"{name}() ({traits}) recibe columnas de la fila {where}: se ejecuta por fila "
+                    f"y no se puede inlinear (reescribir como expresión o LANGUAGE sql)"))
+            else:
+                findings.append(PolicyFinding(
+                    PER_ROW_CALL, "ALTO" if opaque or volatility == "VOLATILE" else "MEDIO", policy, clause,
+                    f"{name}() ({traits}) sin envolver {where}: se evalúa por fila; "
+                    f"usar (SELECT {name}({'...' if close > open_index + 1 else ''})) "
+                    f"para evaluarla una vez por consulta"))
+        return findings
+
+    def _correlated(self, policy, clause, scopes) -> List[PolicyFinding]:
+        findings = []
+        for scope in scopes:
+            if scope.subquery and scope.correlated and scope.tables:
+                tables = ", ".join(sorted(set(scope.tables.values())))
+                findings.append(PolicyFinding(
+                    CORRELATED_SUBQUERY, "MEDIO", policy, clause,
+                    f"Subconsulta correlacionada sobre {tables}: se ejecuta por cada fila de {policy.table}"))
+        return findings
+
+    def _unindexed(self, policy, clause, tokens, refs, scopes) -> List[PolicyFinding]:
+        """Tablas filtradas por = / IN en un scope sin que ninguna de esas columnas encabece un índice"""
+        compared: Dict[Tuple[int, str], List[str]] = {}
+        n = len(tokens)
+        for ref in refs:
+            if ref.owner != ref.scope:
+                continue   # valor de la fila externa: no se busca por índice en esta tabla
+            if "table" not in self.graph.by_name.get(ref.table, {}):
+                continue   # vistas: el índice está en sus tablas base
+            if ref.end < n and (is_op(tokens[ref.end], "=") or is_word(tokens[ref.end], "IN")):
+                other = tokens[ref.end + 1] if ref.end + 1 < n else None
+            elif ref.start > 0 and is_op(tokens[ref.start - 1], "="):
+                other = tokens[ref.start - 2] if ref.start > 1 else None
+            else:
+                continue
+            if other is not None and is_word(other, "TRUE", "FALSE", "NULL"):
+                continue   # flags booleanos: baja selectividad, un índice no ayuda
+            columns = compared.setdefault((ref.scope, ref.table), [])
+            if ref.column not in columns:
+                columns.append(ref.column)
+
+        findings = []
+        for (scope_id, table), columns in compared.items():
+            if set(columns) & self.leading.get(table, set()):
+                continue   # al menos un predicado de la tabla usa un índice
+            correlated = scopes[scope_id].correlated
+            findings.append(PolicyFinding(
+                UNINDEXED_PREDICATE, "ALTO" if correlated else "MEDIO", policy, clause,
+                f"Predicado sobre {table} ({', '.join(columns)}) sin índice que empiece por esas columnas"
+                + (" (en una subconsulta correlacionada: un scan por fila)" if correlated else "")))
+        return findings
+
+
+def lint_policies(corpus: DDLCorpus, graph: DDLGraph) -> List[PolicyFinding]:
+    """Hallazgos de rendimiento de todas las policies del build"""
+    return PolicyLinter(corpus, graph).lint()
+
+
+# CLI
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Linter de rendimiento de las policies RLS del DDL de GAMILIT")
+    parser.add_argument("--ddl", type=Path, help="Directorio ddl/ (default: el de validate_integrity.py)")
+    parser.add_argument("--table", help="Limitar el reporte a una tabla (schema.tabla)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from ddl_cache import DEFAULT_CACHE_FILE, FactsCache
+    from ddl_corpus import load_corpus
+    from ddl_graph import build_graph
+    from validate_integrity import BASE_PATH, Colors, print_ok, print_section
+
+    args = parse_args(argv)
+    cache = FactsCache(DEFAULT_CACHE_FILE)
+    corpus = load_corpus(args.ddl or BASE_PATH, cache=cache)
+    cache.save()
+    graph = build_graph(corpus)
+    findings = lint_policies(corpus, graph)
+    if args.table:
+        findings = [finding for finding in findings if finding.policy.table == args.table]
+
+    print_section("RENDIMIENTO DE POLICIES RLS")
+    by_table = defaultdict(lambda: defaultdict(list))
+    for finding in findings:
+        by_table[finding.policy.table][finding.policy.id].append(finding)
+    for table, policies in sorted(by_table.items()):
+        print(f"{Colors.BOLD}{table}{Colors.ENDC}")
+        for policy_findings in policies.values():
+            policy = policy_findings[0].policy
+            print(f"  {policy.name.rsplit('.', 1)[-1]} ({policy.data.get('command', 'ALL')}) "
+                  f"{policy.file}:{policy.line}")
+            for finding in policy_findings:
+                color = Colors.FAIL if finding.severity == "ALTO" else Colors.WARNING
+                print(f"    {color}[{finding.severity}]{Colors.ENDC} {finding.clause}: {finding.message}")
+    if not findings:
+        print_ok("Las policies no tienen patrones de evaluación por fila")
+        return 0
+
+    total_policies = sum(len(policies) for policies in by_table.values())
+    print(f"\n✓ {len(findings)} hallazgos en {total_policies} policies de {len(by_table)} tablas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
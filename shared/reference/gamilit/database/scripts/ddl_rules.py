@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Reglas declarativas sobre los objetos del DDL de GAMILIT
+
+Las expectativas del tracking de correcciones (cuántos valores tiene un ENUM,
+en qué schema vive un tipo, qué tipo tiene una columna, qué índices deben
+existir) se declaran en un archivo TOML en vez de en Python:
+
+    [[enum]]
+    name = "gamification_system.notification_type"
+    count = 11
+    values = ["achievement_unlocked", "rank_up"]      # deben estar (exact = true: solo estos)
+
+    [[type]]
+    name = "achievement_category"
+    schema = "gamification_system"                   # todas sus definiciones y referencias
+
+    [[column]]
+    table = "gamification_system.achievements"
+    column = "category"
+    type = "gamification_system.achievement_category"
+
+    [[index]]
+    table = "gamification_system.user_stats"
+    columns = ["user_id"]                           # prefijo izquierdo de algún índice
+    unique = true
+
+Toda regla admite `severity` (default CRÍTICO) y `reason` (se agrega al
+mensaje). Al cargarse las reglas se compilan en diccionarios por objeto, de modo
+que la evaluación es una sola pasada por los hechos del corpus con una búsqueda
+por hecho: cientos de reglas cuestan lo mismo que una.
+
+Uso:
+    python3 scripts/ddl_rules.py                          # evalúa integrity_rules.toml
+    python3 scripts/ddl_rules.py --rules otras_reglas.toml
+Fecha: 2025-11-10
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from ddl_corpus import DDLCorpus, qualify
+from ddl_graph import DDLGraph
+from ddl_indexes import collect_indexes
+from issue_formats import SEVERITIES
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# Reglas del tracking de GAMILIT (junto a ddl/)
+DEFAULT_RULES = Path(__file__).resolve().parent.parent / "integrity_rules.toml"
+
+# Claves de cada tipo de regla: (obligatorias, opcionales)
+RULE_KEYS = {
+    "enum": ({"name"}, {"count", "values", "exact"}),
+    "type": ({"name", "schema"}, set()),
+    "column": ({"table", "column"}, {"type"}),
+    "index": ({"table", "columns"}, {"unique"}),
+}
+COMMON_KEYS = {"severity", "reason"}
+
+
+@dataclass(frozen=True)
+class Rule:
+    kind: str
+    number: int                 # posición entre las reglas de su tipo (distingue reglas iguales)
+    spec: Tuple[Tuple[str, object], ...]
+
+    def get(self, key: str, default=None):
+        return dict(self.spec).get(key, default)
+
+    @property
+    def severity(self) -> str:
+        return self.get("severity", "CRÍTICO")
+
+    def issue(self, type_: str, file: str, line: Optional[int], obj: str, message: str) -> dict:
+        reason = self.get("reason")
+        return {
+            "severity": self.severity,
+            "type": type_,
+            "file": file,
+            "line": line,
+            "object": obj,
+            "message": f"{message} ({reason})" if reason else message,
+        }
+
+
+def _normalize_type(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _type_matches(expected: str, actual: str) -> bool:
+    """Un tipo sin schema en la regla se compara contra el nombre sin schema de la columna"""
+    expected, actual = _normalize_type(expected), _normalize_type(actual)
+    return expected == actual or ("." not in expected and actual.rsplit(".", 1)[-1] == expected)
+
+
+@dataclass
+class RuleSet:
+    """Reglas compiladas en diccionarios por el objeto que revisan"""
+    path: Path
+    enums: Dict[str, List[Rule]] = field(default_factory=dict)
+    types: Dict[str, List[Rule]] = field(default_factory=dict)      # por nombre sin schema
+    columns: Dict[Tuple[str, str], List[Rule]] = field(default_factory=dict)
+    indexes: Dict[str, List[Rule]] = field(default_factory=dict)
+    count: int = 0
+
+    def add(self, rule: Rule):
+        self.count += 1
+        if rule.kind == "enum":
+            self.enums.setdefault(rule.get("name"), []).append(rule)
+        elif rule.kind == "type":
+            self.types.setdefault(rule.get("name"), []).append(rule)
+        elif rule.kind == "column":
+            self.columns.setdefault((rule.get("table"), rule.get("column").lower()), []).append(rule)
+        else:
+            self.indexes.setdefault(rule.get("table"), []).append(rule)
+
+    # --- evaluación ---
+    def evaluate(self, corpus: DDLCorpus, graph: DDLGraph) -> List[dict]:
+        """Issues de todas las reglas con una pasada por los hechos del corpus"""
+        issues = []
+        found: Set[Rule] = set()
+        for sql_file in corpus.files:
+            if not sql_file.live:
+                continue
+            path = str(sql_file.path)
+            facts = sql_file.facts
+            for name, values, line in facts["enums"]:
+                name = qualify(name, sql_file.schema)
+                for rule in self.enums.get(name, ()):
+                    found.add(rule)
+                    issues += self._check_enum(rule, name, values, path, line)
+                schema, _, bare = name.rpartition(".")
+                for rule in self.types.get(bare, ()):
+                    if schema == rule.get("schema"):
+                        found.add(rule)
+                    else:
+                        issues.append(rule.issue("ENUM_SCHEMA", path, line, name,
+                                                 f"{bare} se define en {schema} (debe ser {rule.get('schema')})"))
+            for type_ref, line, _ in facts["type_refs"]:
+                schema, _, bare = type_ref.rpartition(".")
+                for rule in self.types.get(bare, ()):
+                    if schema and schema != rule.get("schema"):
+                        issues.append(rule.issue("ENUM_SCHEMA", path, line, f"{rule.get('schema')}.{bare}",
+                                                 f"Se usa {type_ref} (debe ser {rule.get('schema')}.{bare})"))
+            for table, column, type_text, line, *_ in facts["columns"]:
+                table = qualify(table, sql_file.schema)
+                for rule in self.columns.get((table, column.lower()), ()):
+                    found.add(rule)
+                    expected = rule.get("type")
+                    if expected and not _type_matches(expected, type_text):
+                        issues.append(rule.issue("COLUMN_TYPE", path, line, f"{table}.{column}",
+                                                 f"{table}.{column} es {type_text}, se espera {expected}"))
+
+        if self.indexes:
+            indexes = collect_indexes(corpus, graph)
+            for table, rules in self.indexes.items():
+                node = graph.nodes.get(f"table:{table}")
+                location = (node.file, node.line) if node is not None else ("N/A", None)
+                for rule in rules:
+                    found.add(rule)
+                    issues += self._check_index(rule, table, indexes.get(table, []), location)
+
+        return issues + self._missing(found)
+
+    @staticmethod
+    def _check_enum(rule: Rule, name: str, values: List[str], path: str, line: int) -> List[dict]:
+        issues = []
+        count = rule.get("count")
+        if count is not None and len(values) != count:
+            issues.append(rule.issue("ENUM_VALUES", path, line, name,
+                                     f"{name} tiene {len(values)} valores, esperados {count}"))
+        expected = rule.get("values") or []
+        missing = [value for value in expected if value not in values]
+        if missing:
+            issues.append(rule.issue("ENUM_VALUES", path, line, name, f"{name} falta valores: {', '.join(missing)}"))
+        if rule.get("exact") and expected:
+            extra = [value for value in values if value not in expected]
+            if extra:
+                issues.append(rule.issue("ENUM_VALUES", path, line, name,
+                                         f"{name} tiene valores no declarados: {', '.join(extra)}"))
+        return issues
+
+    @staticmethod
+    def _check_index(rule: Rule, table: str, indexes, location: Tuple[str, Optional[int]]) -> List[dict]:
+        columns = [column.lower() for column in rule.get("columns")]
+        for index in indexes:
+            if index.where is None and index.columns[:len(columns)] == columns and (
+                    index.unique or not rule.get("unique")):
+                return []
+        unique = "UNIQUE " if rule.get("unique") else ""
+        return [rule.issue("INDEX_MISSING", *location, table,
+                           f"{table} no tiene un índice {unique}que empiece por ({', '.join(columns)})")]
+
+    def _missing(self, found: Set[Rule]) -> List[dict]:
+        """Reglas cuyo objeto no aparece en ningún archivo del build"""
+        issues = []
+        for name, rules in self.enums.items():
+            for rule in rules:
+                if rule not in found:
+                    issues.append(rule.issue("ENUM_MISSING", "N/A", None, name, f"{name} no existe"))
+        for bare, rules in self.types.items():
+            for rule in rules:
+                if rule not in found:
+                    name = f"{rule.get('schema')}.{bare}"
+                    issues.append(rule.issue("ENUM_MISSING", "N/A", None, name,
+                                             f"{bare} no existe en {rule.get('schema')}"))
+        for (table, column), rules in self.columns.items():
+            for rule in rules:
+                if rule not in found:
+                    issues.append(rule.issue("COLUMN_MISSING", "N/A", None, f"{table}.{column}",
+                                             f"{table}.{column} no existe"))
+        return issues
+
+
+def _freeze(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+@lru_cache(maxsize=None)
+def load_rules(path: Path) -> RuleSet:
+    """Lee y compila las reglas de un TOML ([[enum]], [[type]], [[column]], [[index]])"""
+    if tomllib is None:
+        raise ValueError("leer reglas requiere Python 3.11+ o el paquete tomli")
+    path = Path(path)
+    try:
+        with path.open("rb") as f:
+            data = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise ValueError(f"no se pudo leer {path}: {e}")
+
+    unknown = set(data) - set(RULE_KEYS)
+    if unknown:
+        raise ValueError(f"{path}: tipos de regla desconocidos: {', '.join(sorted(unknown))}")
+    rules = RuleSet(path)
+    for kind, (required, optional) in RULE_KEYS.items():
+        for number, entry in enumerate(data.get(kind, []), 1):
+            where = f"{path}: [[{kind}]] {number}"
+            missing = required - set(entry)
+            if missing:
+                raise ValueError(f"{where} sin {', '.join(sorted(missing))}")
+            extra = set(entry) - required - optional - COMMON_KEYS
+            if extra:
+                raise ValueError(f"{where} con claves desconocidas: {', '.join(sorted(extra))}")
+            if entry.get("severity", "CRÍTICO") not in SEVERITIES:
+                raise ValueError(f"{where}: severity debe ser una de {', '.join(SEVERITIES)}")
+            rules.add(Rule(kind, number, tuple(sorted((key, _freeze(value)) for key, value in entry.items()))))
+    return rules
+
+
+# CLI
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Reglas declarativas sobre los objetos del DDL de GAMILIT")
+    parser.add_argument("--ddl", type=Path, help="Directorio ddl/ (default: el de validate_integrity.py)")
+    parser.add_argument("--rules", type=Path, default=DEFAULT_RULES,
+                        help=f"Archivo TOML de reglas (default: {DEFAULT_RULES.name})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from ddl_cache import DEFAULT_CACHE_FILE, FactsCache
+    from ddl_corpus import load_corpus
+    from ddl_graph import build_graph
+    from validate_integrity import BASE_PATH, Colors, print_error, print_ok, print_section
+
+    args = parse_args(argv)
+    try:
+        rules = load_rules(args.rules)
+    except ValueError as e:
+        print(f"{Colors.FAIL}{e}{Colors.ENDC}", file=sys.stderr)
+        return 2
+    cache = FactsCache(DEFAULT_CACHE_FILE)
+    corpus = load_corpus(args.ddl or BASE_PATH, cache=cache)
+    cache.save()
+    issues = rules.evaluate(corpus, build_graph(corpus))
+
+    print_section(f"REGLAS DE {args.rules.name}")
+    for issue in issues:
+        location = issue["file"] if issue["line"] is None else f"{issue['file']}:{issue['line']}"
+        print_error(issue["severity"], f"{issue['message']}\n  Archivo: {location}")
+    if not issues:
+        print_ok(f"Las {rules.count} reglas se cumplen")
+        return 0
+    print(f"\n✓ {rules.count} reglas evaluadas, {len(issues)} incumplimientos")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
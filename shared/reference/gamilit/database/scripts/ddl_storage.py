@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Ancho de fila y espacio en disco estimados de las tablas del DDL de GAMILIT
+
+Para planear capacidad de las tablas que solo crecen (audit_logging,
+ml_coins_transactions, exercise_attempts...) estima, a partir de los tipos de
+las columnas de tables/*.sql y de los índices de indexes/*.sql (más los de
+PRIMARY KEY y UNIQUE), el tamaño de cada fila como lo guarda PostgreSQL:
+
+- header de la tupla (23 bytes + bitmap de NULLs, alineado a 8) y puntero de
+  línea (4 bytes) por fila
+- cada columna con su tamaño y alineación (typlen/typalign); los varlena
+  cortos (< 127 bytes) llevan header de 1 byte y no se alinean
+- TEXT/JSONB/arrays con un tamaño promedio por defecto o, con --seeds, el
+  promedio de los valores de los seeds
+- índices btree: header de 8 bytes + claves alineadas, hojas al 90% (fillfactor)
+
+Reporta bytes por fila, bytes por millón de filas (heap + índices) y el
+orden de columnas que minimiza el relleno de alineación (fijas de mayor a
+menor alineación y los varlena al final). Es una estimación sin TOAST ni
+compresión, útil para comparar tablas y órdenes de columnas.
+
+Uso:
+    python3 scripts/ddl_storage.py                               # tablas por espacio estimado
+    python3 scripts/ddl_storage.py --table audit_logging.audit_logs --seeds
+Fecha: 2025-11-10
+"""
+
+import argparse
+import math
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ddl_corpus import DDLCorpus
+from ddl_graph import DDLGraph
+from ddl_indexes import IndexDef, collect_indexes
+from seed_parser import DEFAULT_SEEDS, LITERAL, iter_inserts, read_seed, seed_files
+from validate_seeds import SeedColumn, SeedSchema, SeedTable, build_schema
+
+BLOCK_SIZE = 8192
+PAGE_HEADER = 24
+BTREE_SPECIAL = 16               # BTPageOpaqueData al final de cada página de índice
+ITEM_ID = 4                      # puntero de línea por tupla
+TUPLE_HEADER = 23                # HeapTupleHeaderData
+INDEX_TUPLE_HEADER = 8           # IndexTupleData
+MAXALIGN = 8
+MAX_HEAP_TUPLES_PER_PAGE = 291
+BTREE_FILLFACTOR = 0.9
+SHORT_VARLENA = 127              # hasta este tamaño el varlena lleva header de 1 byte y no se alinea
+
+# (typlen, typalign) de los tipos de largo fijo
+FIXED_TYPES = {
+    "boolean": (1, 1), "bool": (1, 1), '"char"': (1, 1),
+    "smallint": (2, 2), "int2": (2, 2), "smallserial": (2, 2),
+    "integer": (4, 4), "int": (4, 4), "int4": (4, 4), "serial": (4, 4), "real": (4, 4), "float4": (4, 4),
+    "date": (4, 4), "oid": (4, 4),
+    "bigint": (8, 8), "int8": (8, 8), "bigserial": (8, 8), "double precision": (8, 8), "float8": (8, 8),
+    "timestamp": (8, 8), "timestamp with time zone": (8, 8), "timestamp without time zone": (8, 8),
+    "timestamptz": (8, 8), "time": (8, 8), "time without time zone": (8, 8), "money": (8, 8),
+    "time with time zone": (12, 8), "timetz": (12, 8),
+    "interval": (16, 8), "uuid": (16, 1), "point": (16, 8), "macaddr": (6, 4),
+}
+ENUM_TYPE = (4, 4)               # los ENUM se guardan como el OID del valor
+
+# Bytes de datos promedio (sin header) de los varlena sin muestra de los seeds
+DEFAULT_VARLENA = {
+    "text": 32, "character varying": 32, "varchar": 32, "json": 128, "jsonb": 128, "bytea": 64,
+    "numeric": 8, "decimal": 8, "inet": 7, "cidr": 7, "tsvector": 128, "xml": 256, "citext": 32,
+}
+DEFAULT_ARRAY_ELEMENTS = 3
+ARRAY_HEADER = 20                # dimensiones, flags y tipo de elemento de un array de una dimensión
+
+
+def align(offset: int, alignment: int) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def _varlena(data: float) -> Tuple[int, int]:
+    """(bytes, alineación) de un varlena con `data` bytes de contenido"""
+    data = int(round(data))
+    return (data + 1, 1) if data + 1 <= SHORT_VARLENA else (data + 4, 4)
+
+
+def type_storage(type_text: str, column: Optional[SeedColumn] = None,
+                 sample: Optional[float] = None) -> Tuple[int, int, bool]:
+    """(bytes, alineación, largo variable) de un valor del tipo; `sample`: bytes promedio de los seeds"""
+    if column is not None and column.enum:
+        return (*ENUM_TYPE, False)
+    base = re.sub(r"\s*\(.*?\)", "", type_text).strip()
+    if base.endswith("[]"):
+        if sample is not None:
+            return (*_varlena(sample), True)
+        element = base[:-2]
+        size, alignment = ENUM_TYPE if "." in element else type_storage(element)[:2]   # schema.tipo[]: ENUM
+        return (*_varlena(ARRAY_HEADER + DEFAULT_ARRAY_ELEMENTS * align(size, alignment)), True)
+    if base in FIXED_TYPES:
+        return (*FIXED_TYPES[base], False)
+    if base in ("character", "char", "bpchar"):
+        length = re.search(r"\((\d+)\)", type_text)
+        return (*_varlena(int(length.group(1)) if length else 1), True)
+    if sample is not None:
+        return (*_varlena(sample), True)
+    length = re.search(r"\((\d+)(?:\s*,\s*\d+)?\)", type_text)
+    if base in ("numeric", "decimal") and length:
+        return (*_varlena(2 + 2 * math.ceil(int(length.group(1)) / 4)), True)
+    if base in ("character varying", "varchar") and length:
+        return (*_varlena(min(int(length.group(1)), DEFAULT_VARLENA["varchar"])), True)
+    return (*_varlena(DEFAULT_VARLENA.get(base, DEFAULT_VARLENA["text"])), True)
+
+
+@dataclass
+class ColumnStorage:
+    name: str
+    type: str
+    size: int
+    alignment: int
+    variable: bool
+    sampled: bool = False
+    offset: int = 0
+    padding: int = 0
+
+
+@dataclass
+class IndexStorage:
+    index: IndexDef
+    tuple_size: int
+    bytes_per_row: float
+
+
+@dataclass
+class TableStorage:
+    table: SeedTable
+    columns: List[ColumnStorage]
+    header: int                      # t_hoff: header + bitmap de NULLs, alineado
+    data: int                        # bytes de datos con el orden actual
+    padding: int
+    indexes: List[IndexStorage] = field(default_factory=list)
+    suggested: List[ColumnStorage] = field(default_factory=list)
+    suggested_data: int = 0
+    suggested_padding: int = 0
+
+    @property
+    def tuple_size(self) -> int:
+        return align(self.header + self.data, MAXALIGN)
+
+    @property
+    def suggested_tuple_size(self) -> int:
+        return align(self.header + self.suggested_data, MAXALIGN)
+
+    @property
+    def row_bytes(self) -> float:
+        """Bytes de heap por fila: tupla + puntero de línea, repartiendo el espacio libre de cada página"""
+        rows_per_page = min(MAX_HEAP_TUPLES_PER_PAGE, (BLOCK_SIZE - PAGE_HEADER) // (self.tuple_size + ITEM_ID))
+        return BLOCK_SIZE / max(1, rows_per_page)
+
+    @property
+    def index_bytes(self) -> float:
+        return sum(index.bytes_per_row for index in self.indexes)
+
+    def per_rows(self, rows: int) -> Tuple[float, float]:
+        """(heap, índices) en bytes para `rows` filas"""
+        return self.row_bytes * rows, self.index_bytes * rows
+
+
+def layout(columns: List[ColumnStorage]) -> Tuple[int, int]:
+    """Asigna offset y relleno a cada columna; devuelve (bytes de datos, relleno total)"""
+    offset = padding = 0
+    for column in columns:
+        start = align(offset, column.alignment)
+        column.offset, column.padding = start, start - offset
+        padding += start - offset
+        offset = start + column.size
+    return offset, padding
+
+
+def _preserved(column: ColumnStorage) -> int:
+    """Alineación que conserva el offset tras la columna (un uuid de 16 bytes se ubica como uno de 8)"""
+    return max(column.alignment, min(MAXALIGN, column.size & -column.size))
+
+
+def suggest_order(columns: List[ColumnStorage]) -> List[ColumnStorage]:
+    """Fijas de mayor a menor alineación conservada y varlena al final (primero los alineados a 4)"""
+    order = sorted(columns, key=lambda c: (c.variable, -c.alignment if c.variable else -_preserved(c)))
+    return [ColumnStorage(c.name, c.type, c.size, c.alignment, c.variable, c.sampled) for c in order]
+
+
+def index_storage(index: IndexDef, columns: Dict[str, ColumnStorage]) -> Optional[IndexStorage]:
+    """Tamaño de cada entrada de hoja de un índice btree (los hash guardan un hash de 4 bytes)"""
+    if index.method == "brin":
+        return None
+    offset = INDEX_TUPLE_HEADER
+    if index.method == "hash":
+        offset += 4
+    else:
+        for element in list(index.columns) + list(index.include):
+            column = columns.get(element) if element else None
+            size, alignment = (column.size, column.alignment) if column else (8, 8)   # expresión: 8 bytes
+            offset = align(offset, alignment) + size
+    tuple_size = align(offset, MAXALIGN)
+    usable = (BLOCK_SIZE - PAGE_HEADER - BTREE_SPECIAL) * BTREE_FILLFACTOR
+    rows_per_page = max(1, int(usable // (tuple_size + ITEM_ID)))
+    return IndexStorage(index, tuple_size, BLOCK_SIZE / rows_per_page)
+
+
+def sample_seeds(schema: SeedSchema, seeds_path: Path = DEFAULT_SEEDS,
+                 environments=("prod",)) -> Dict[Tuple[str, str], float]:
+    """Bytes promedio de los literales de cada (tabla, columna) en los INSERT de los seeds"""
+    totals: Dict[Tuple[str, str], List[int]] = {}
+    for seed_file in seed_files(seeds_path, environments):
+        for insert in iter_inserts(read_seed(seed_file.path), seed_file.schema):
+            table = schema.table(insert)
+            if table is None or insert.select:
+                continue
+            columns = insert.columns if insert.columns is not None else list(table.columns)
+            for row in insert.rows:
+                for name, value in zip(columns, row):
+                    if value.kind == LITERAL:
+                        entry = totals.setdefault((table.name, name), [0, 0])
+                        entry[0] += len(value.value.encode())
+                        entry[1] += 1
+    return {key: total / count for key, (total, count) in totals.items()}
+
+
+def estimate_table(table: SeedTable, indexes: List[IndexDef],
+                   samples: Optional[Dict[Tuple[str, str], float]] = None) -> TableStorage:
+    samples = samples or {}
+    columns = []
+    for name, column in table.columns.items():
+        sample = samples.get((table.name, name))
+        size, alignment, variable = type_storage(column.type, column, sample)
+        columns.append(ColumnStorage(name, column.type, size, alignment, variable, sample is not None and variable))
+    nullable = any(not column.not_null for column in table.columns.values())
+    header = align(TUPLE_HEADER + (math.ceil(len(columns) / 8) if nullable else 0), MAXALIGN)
+    data, padding = layout(columns)
+    storage = TableStorage(table, columns, header, data, padding)
+
+    by_name = {column.name: column for column in columns}
+    for index in indexes:
+        estimate = index_storage(index, by_name)
+        if estimate is not None:
+            storage.indexes.append(estimate)
+    storage.suggested = suggest_order(columns)
+    storage.suggested_data, storage.suggested_padding = layout(storage.suggested)
+    return storage
+
+
+def estimate_storage(corpus: DDLCorpus, graph: DDLGraph,
+                     samples: Optional[Dict[Tuple[str, str], float]] = None,
+                     schema: Optional[SeedSchema] = None) -> List[TableStorage]:
+    """Estimación de cada tabla del build, de mayor a menor espacio por fila (heap + índices)"""
+    schema = schema or build_schema(corpus, graph)
+    indexes = collect_indexes(corpus, graph)
+    tables = [estimate_table(table, indexes.get(name, []), samples)
+              for name, table in schema.tables.items() if table.columns]
+    return sorted(tables, key=lambda t: (-(t.row_bytes + t.index_bytes), t.table.name))
+
+
+# CLI
+def human(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ancho de fila y espacio estimado de las tablas del DDL")
+    parser.add_argument("--ddl", type=Path, help="Directorio ddl/ (default: el de validate_integrity.py)")
+    parser.add_argument("--table", help="Detalle de una tabla (schema.tabla): columnas, relleno, índices y orden sugerido")
+    parser.add_argument("--schema", help="Limitar el reporte a un schema")
+    parser.add_argument("--seeds", nargs="?", type=Path, const=DEFAULT_SEEDS, metavar="DIR",
+                        help="Usar el tamaño promedio de los valores de los seeds (default: seeds/)")
+    parser.add_argument("--env", action="append", help="Ambientes de seeds a muestrear (default: prod)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Filas para el total (default: 1000000)")
+    parser.add_argument("--top", type=int, default=25, help="Tablas a listar (default: 25; 0 = todas)")
+    return parser.parse_args(argv)
+
+
+def print_detail(storage: TableStorage, rows: int):
+    print(f"Header de tupla: {storage.header} bytes; datos: {storage.data} bytes "
+          f"({storage.padding} de relleno); tupla: {storage.tuple_size} bytes; "
+          f"heap por fila: {storage.row_bytes:.1f} bytes\n")
+    print(f"  {'columna':<32} {'tipo':<32} {'offset':>6} {'bytes':>6} {'alin.':>5} {'relleno':>7}")
+    for column in storage.columns:
+        sampled = " *" if column.sampled else ""
+        print(f"  {column.name:<32} {column.type[:32]:<32} {column.offset:>6} {column.size:>6} "
+              f"{column.alignment:>5} {column.padding:>7}{sampled}")
+    if any(column.sampled for column in storage.columns):
+        print("  (* tamaño promedio de los seeds)")
+
+    print(f"\n  {'índice':<56} {'entrada':>8} {'por fila':>9} {f'{rows:,} filas':>14}")
+    for index in storage.indexes:
+        partial = " (parcial: peor caso)" if index.index.where else ""
+        print(f"  {index.index.name[:56]:<56} {index.tuple_size:>8} {index.bytes_per_row:>9.1f} "
+              f"{human(index.bytes_per_row * rows):>14}{partial}")
+
+    saved = storage.padding - storage.suggested_padding
+    if saved > 0:
+        print(f"\n  Orden sugerido (ahorra {saved} bytes de relleno por fila; tupla: "
+              f"{storage.tuple_size} → {storage.suggested_tuple_size} bytes):")
+        print("    " + ", ".join(column.name for column in storage.suggested))
+
+
+def main(argv=None):
+    from ddl_cache import DEFAULT_CACHE_FILE, FactsCache
+    from ddl_corpus import load_corpus
+    from ddl_graph import build_graph
+    from validate_integrity import BASE_PATH, Colors, print_ok, print_section
+
+    args = parse_args(argv)
+    cache = FactsCache(DEFAULT_CACHE_FILE)
+    corpus = load_corpus(args.ddl or BASE_PATH, cache=cache)
+    cache.save()
+    graph = build_graph(corpus)
+    schema = build_schema(corpus, graph)
+    samples = sample_seeds(schema, args.seeds, args.env or ("prod",)) if args.seeds else None
+    tables = estimate_storage(corpus, graph, samples, schema)
+
+    if args.table:
+        match = [storage for storage in tables if storage.table.name == args.table]
+        if not match:
+            print(f"{Colors.FAIL}La tabla {args.table} no está en el build{Colors.ENDC}", file=sys.stderr)
+            return 2
+        print_section(f"ESPACIO ESTIMADO: {args.table}")
+        print_detail(match[0], args.rows)
+        return 0
+
+    if args.schema:
+        tables = [storage for storage in tables if storage.table.name.startswith(f"{args.schema}.")]
+    shown = tables[:args.top] if args.top else tables
+    print_section(f"ESPACIO ESTIMADO POR {args.rows:,} FILAS")
+    print(f"{'tabla':<50} {'fila':>6} {'relleno':>7} {'heap':>10} {'índices':>10} {'total':>10} {'ahorro':>7}")
+    for storage in shown:
+        heap, index = storage.per_rows(args.rows)
+        saved = storage.padding - storage.suggested_padding
+        print(f"{storage.table.name:<50} {storage.tuple_size:>6} {storage.padding:>7} {human(heap):>10} "
+              f"{human(index):>10} {human(heap + index):>10} {saved or '':>7}")
+    reorder = sum(1 for storage in tables if storage.padding > storage.suggested_padding)
+    source = "promedios de los seeds" if samples else "tamaños por defecto de TEXT/JSONB"
+    print(f"\n✓ {len(tables)} tablas ({source}); {reorder} ganan reordenando columnas (--table para el detalle)")
+    if not reorder:
+        print_ok("Ninguna tabla reduce su relleno reordenando columnas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
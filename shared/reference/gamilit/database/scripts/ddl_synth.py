@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Generador determinista de árboles DDL sintéticos para benchmarks
+
+Produce un árbol con el mismo layout que ddl/ (schemas/<schema>/{enums,tables,
+functions,triggers,indexes}) y contenido con la forma del real: tablas con
+ENUMs y REFERENCES, funciones plpgsql con FROM/JOIN/INSERT/UPDATE, triggers con
+su función y EXECUTE FUNCTION, e índices. La misma semilla produce siempre el
+mismo árbol. Una fracción configurable de referencias apunta a objetos
+inexistentes para que los validadores también reporten issues.
+
+Uso:
+    python3 scripts/ddl_synth.py /tmp/synth-ddl --files 5000 --fk-density 2 --function-size 40
+Fecha: 2025-11-10
+"""
+
+import argparse
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+# Proporción aproximada de cada tipo de archivo en el ddl/ real
+KIND_SHARES = (("enums", 0.08), ("tables", 0.30), ("functions", 0.27), ("triggers", 0.17), ("indexes", 0.18))
+
+# Archivos por schema (el árbol real tiene ~25)
+FILES_PER_SCHEMA = 40
+
+
+@dataclass
+class SynthParams:
+    files: int = 485
+    fk_density: float = 1.5       # FKs promedio por tabla
+    function_size: int = 20       # sentencias por cuerpo de función
+    broken_rate: float = 0.01     # fracción de referencias rotas
+    seed: int = 42
+
+
+def _counts(files: int) -> List[Tuple[str, int]]:
+    """Archivos por tipo que suman exactamente `files`"""
+    counts = [(kind, max(1, int(files * share))) for kind, share in KIND_SHARES]
+    missing = files - sum(count for _, count in counts)
+    kind, count = counts[1]
+    counts[1] = (kind, max(1, count + missing))
+    return counts
+
+
+class _Generator:
+    def __init__(self, root: Path, params: SynthParams):
+        self.root = Path(root)
+        self.params = params
+        self.rng = random.Random(params.seed)
+        self.schemas = [f"synth_{i:03d}" for i in range(max(1, params.files // FILES_PER_SCHEMA))]
+        self.enums: List[str] = []
+        self.tables: List[str] = []
+        self.sequence = {}
+
+    def path(self, schema: str, kind: str, name: str) -> Path:
+        number = self.sequence.get((schema, kind), 0) + 1
+        self.sequence[(schema, kind)] = number
+        return self.root / "schemas" / schema / kind / f"{number:02d}-{name}.sql"
+
+    def write(self, path: Path, content: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def broken(self) -> bool:
+        return self.rng.random() < self.params.broken_rate
+
+    def table_ref(self) -> str:
+        if self.broken() or not self.tables:
+            return f"{self.rng.choice(self.schemas)}.missing_table_{self.rng.randrange(1000)}"
+        return self.rng.choice(self.tables)
+
+    # --- archivos ---
+    def enum(self, schema: str, index: int):
+        name = f"status_{index:05d}"
+        values = ", ".join(f"'v{k}'" for k in range(self.rng.randint(3, 12)))
+        self.write(self.path(schema, "enums", name),
+                   f"-- ENUM sintético {schema}.{name}\n"
+                   f"DO $$ BEGIN\n"
+                   f"    CREATE TYPE {schema}.{name} AS ENUM ({values});\n"
+                   f"EXCEPTION WHEN duplicate_object THEN null;\n"
+                   f"END $$;\n")
+        self.enums.append(f"{schema}.{name}")
+
+    def table(self, schema: str, index: int):
+        name = f"entity_{index:05d}"
+        columns = [
+            "    id UUID PRIMARY KEY DEFAULT gen_random_uuid()",
+            "    name VARCHAR(255) NOT NULL",
+            "    description TEXT",
+        ]
+        if self.enums:
+            enum = self.rng.choice(self.enums)
+            if self.broken():
+                enum = f"{schema}.missing_enum_{index}"
+            columns.append(f"    status {enum} NOT NULL DEFAULT 'v0'")
+
+        density = self.params.fk_density
+        fk_count = int(density) + (1 if self.rng.random() < density - int(density) else 0)
+        for k in range(fk_count):
+            ref = self.table_ref()
+            columns.append(f"    ref_{k}_id UUID REFERENCES {ref}(id) ON DELETE CASCADE")
+
+        columns += [
+            "    metadata JSONB DEFAULT '{}'::jsonb",
+            "    created_at TIMESTAMP WITH TIME ZONE DEFAULT now()",
+            "    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()",
+        ]
+        self.write(self.path(schema, "tables", name),
+                   f"-- Tabla sintética {schema}.{name}\n"
+                   f"CREATE TABLE IF NOT EXISTS {schema}.{name} (\n" + ",\n".join(columns) + "\n);\n\n"
+                   f"COMMENT ON TABLE {schema}.{name} IS 'Tabla sintética para benchmarks (FROM {schema}.x)';\n")
+        self.tables.append(f"{schema}.{name}")
+
+    def statements(self) -> List[str]:
+        body = []
+        for k in range(self.params.function_size):
+            choice = k % 4
+            if choice == 0:
+                body.append(f"    SELECT COUNT(*) INTO v_count\n"
+                            f"    FROM {self.table_ref()} a\n"
+                            f"    JOIN {self.table_ref()} b ON b.id = a.id\n"
+                            f"    WHERE a.id = p_id;")
+            elif choice == 1:
+                body.append(f"    UPDATE {self.table_ref()}\n"
+                            f"    SET updated_at = now(), metadata = metadata || jsonb_build_object('step', {k})\n"
+                            f"    WHERE id = p_id;")
+            elif choice == 2:
+                body.append(f"    INSERT INTO {self.table_ref()} (id, name)\n"
+                            f"    VALUES (gen_random_uuid(), 'paso {k}');")
+            else:
+                body.append(f"    -- paso {k}: SELECT * FROM tabla_en_comentario\n"
+                            f"    v_count := v_count + EXTRACT(EPOCH FROM now())::INTEGER % 7;")
+        return body
+
+    def function(self, schema: str, index: int):
+        name = f"process_{index:05d}"
+        self.write(self.path(schema, "functions", name),
+                   f"-- Función sintética {schema}.{name}\n"
+                   f"CREATE OR REPLACE FUNCTION {schema}.{name}(p_id UUID)\n"
+                   f"RETURNS INTEGER\n"
+                   f"LANGUAGE plpgsql\n"
+                   f"AS $$\n"
+                   f"DECLARE\n"
+                   f"    v_count INTEGER := 0;\n"
+                   f"BEGIN\n" + "\n".join(self.statements()) + "\n"
+                   f"    RETURN v_count;\n"
+                   f"END;\n"
+                   f"$$;\n")
+
+    def trigger(self, schema: str, index: int):
+        name = f"trg_touch_{index:05d}"
+        table = self.rng.choice(self.tables)
+        function = f"{schema}.fn_{name}"
+        if self.broken():
+            target = f"{schema}.missing_function_{index}"
+        else:
+            target = function
+        self.write(self.path(schema, "triggers", name),
+                   f"-- Trigger sintético {name}\n"
+                   f"CREATE OR REPLACE FUNCTION {function}()\n"
+                   f"RETURNS TRIGGER\n"
+                   f"LANGUAGE plpgsql\n"
+                   f"AS $$\n"
+                   f"BEGIN\n"
+                   f"    NEW.updated_at = now();\n"
+                   f"    RETURN NEW;\n"
+                   f"END;\n"
+                   f"$$;\n\n"
+                   f"DROP TRIGGER IF EXISTS {name} ON {table};\n"
+                   f"CREATE TRIGGER {name}\n"
+                   f"    BEFORE UPDATE ON {table}\n"
+                   f"    FOR EACH ROW\n"
+                   f"    EXECUTE FUNCTION {target}();\n")
+
+    def index(self, schema: str, index: int):
+        table = self.rng.choice(self.tables)
+        column = self.rng.choice(["name", "created_at", "updated_at", "status"])
+        name = f"idx_{table.split('.', 1)[1]}_{column}_{index:05d}"
+        self.write(self.path(schema, "indexes", name),
+                   f"-- Índice sintético {name}\n"
+                   f"CREATE INDEX IF NOT EXISTS {name}\n"
+                   f"    ON {table} USING btree ({column});\n")
+
+    def run(self):
+        for kind, count in _counts(self.params.files):
+            make = getattr(self, kind[:-1] if kind != "indexes" else "index")
+            for index in range(count):
+                make(self.schemas[index % len(self.schemas)], index)
+
+
+def generate_tree(root: Path, params: SynthParams) -> Path:
+    """Genera (o reutiliza, si ya existe con los mismos parámetros) un árbol sintético"""
+    root = Path(root)
+    marker = root / ".synth-params"
+    signature = repr(asdict(params))
+    if marker.exists() and marker.read_text() == signature:
+        return root
+    if root.exists() and any(root.iterdir()):
+        raise SystemExit(f"{root} ya existe y no es un árbol sintético con estos parámetros")
+    _Generator(root, params).run()
+    marker.write_text(signature)
+    return root
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un árbol ddl/ sintético y determinista")
+    parser.add_argument("root", type=Path, help="Directorio de salida (equivalente a ddl/)")
+    parser.add_argument("--files", type=int, default=SynthParams.files,
+                        help=f"Cantidad de archivos .sql a generar (default: {SynthParams.files})")
+    parser.add_argument("--fk-density", type=float, default=SynthParams.fk_density,
+                        help="FKs promedio por tabla")
+    parser.add_argument("--function-size", type=int, default=SynthParams.function_size,
+                        help="Sentencias por cuerpo de función")
+    parser.add_argument("--broken-rate", type=float, default=SynthParams.broken_rate,
+                        help="Fracción de referencias a objetos inexistentes")
+    parser.add_argument("--seed", type=int, default=SynthParams.seed,
+                        help="Semilla del generador: misma semilla, mismo árbol")
+    args = parser.parse_args(argv)
+
+    params = SynthParams(args.files, args.fk_density, args.function_size, args.broken_rate, args.seed)
+    root = generate_tree(args.root, params)
+    print(f"✓ {params.files} archivos sintéticos en {root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Cascadas de triggers y amplificación de escrituras del DDL de GAMILIT
+
+Enlaza cada trigger con su función y las tablas que esa función (y las
+funciones que llama) escribe, y expande la cadena transitivamente: un INSERT
+en progress_tracking.exercise_attempts dispara un trigger que actualiza
+gamification_system.user_stats, cuyo UPDATE dispara a su vez los triggers de
+nivel, rango y logros, y así sucesivamente.
+
+Por tabla y evento reporta el peor caso por fila escrita: cuántas filas se
+escriben en total y cuántas funciones de trigger se ejecutan (se asume que
+cada escritura de una función afecta una fila y que todas sus ramas se
+ejecutan). Marca los ciclos (el trigger de A escribe B, cuyo trigger escribe
+A), que solo terminan por las condiciones de los datos o por un guard con
+pg_trigger_depth().
+
+Uso:
+    python3 scripts/ddl_triggers.py                                   # tablas con más amplificación
+    python3 scripts/ddl_triggers.py --table progress_tracking.exercise_attempts --tree
+Fecha: 2025-11-10
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from ddl_corpus import DDLCorpus
+from ddl_graph import RELATION_KINDS, DDLGraph, search_path_of
+
+EVENTS = ("INSERT", "UPDATE", "DELETE")
+
+# PostgreSQL ejecuta primero los BEFORE y luego los AFTER; dentro de cada uno, por nombre
+TIMING_ORDER = {"BEFORE": 0, "INSTEAD OF": 1, "AFTER": 2}
+
+# Filas escritas por fila (incluida la propia) a partir de las cuales la cascada se reporta
+AMPLIFICATION_THRESHOLD = 4
+
+
+@dataclass
+class WriteEvent:
+    """Una escritura que hace una función: tabla, evento y columnas del SET (None: desconocidas)"""
+    table: str
+    event: str
+    columns: Optional[List[str]]
+    function: str
+    line: int
+
+
+@dataclass
+class TriggerDef:
+    name: str
+    table: str
+    timing: str
+    events: List[str]
+    columns: List[str]
+    level: str
+    when: Optional[str]
+    function: Optional[str]       # id del nodo de la función (None si no está en el build)
+    file: str
+    line: int
+
+    def fires(self, event: str, columns: Optional[List[str]]) -> bool:
+        """Si una escritura `event` (con esas columnas en el SET) dispara este trigger"""
+        if event not in self.events:
+            return False
+        if event != "UPDATE" or not self.columns or columns is None:
+            return True
+        return bool(set(self.columns) & set(columns))
+
+
+@dataclass
+class Step:
+    """Un trigger disparado dentro de una cascada y las escrituras que hace su función"""
+    trigger: TriggerDef
+    depth: int
+    writes: List[WriteEvent] = field(default_factory=list)
+    cycles: List[WriteEvent] = field(default_factory=list)   # escrituras que vuelven a un evento de la cadena
+
+
+@dataclass
+class Cycle:
+    """Camino de eventos que vuelve a uno anterior; `trigger` es el que lo cierra"""
+    path: List[str]                  # "tabla EVENTO", el último repite uno anterior
+    trigger: TriggerDef
+    guarded: bool = False            # su función consulta pg_trigger_depth()
+
+    @property
+    def key(self) -> Tuple[Tuple[str, ...], str]:
+        """El mismo ciclo visto desde cualquier punto de entrada"""
+        loop = self.path[:-1]
+        start = loop.index(min(loop))
+        return tuple(loop[start:] + loop[:start]), self.trigger.name
+
+
+@dataclass
+class Cascade:
+    """Peor caso por fila escrita en `table` con `event`"""
+    table: str
+    event: str
+    writes: int = 1                 # filas escritas, incluida la que origina la cascada
+    invocations: int = 0            # funciones de trigger ejecutadas
+    depth: int = 0
+    steps: List[Step] = field(default_factory=list)
+    cycles: List[Cycle] = field(default_factory=list)
+    dynamic: List[str] = field(default_factory=list)         # funciones con SQL dinámico (escrituras desconocidas)
+
+
+class TriggerCascades:
+    """Triggers del build por tabla y escrituras (directas y vía funciones llamadas) de cada función"""
+
+    def __init__(self, corpus: DDLCorpus, graph: DDLGraph):
+        self.graph = graph
+        self.files = {str(sql_file.path): sql_file for sql_file in corpus.files}
+        self.triggers: Dict[str, List[TriggerDef]] = defaultdict(list)
+        self._writes: Dict[str, List[WriteEvent]] = {}
+        for node_id, node in graph.nodes.items():
+            if node.kind != "trigger" or not node.table:
+                continue
+            function = next((target for target, edge in graph.dependencies[node_id].items()
+                             if "executes" in edge.labels), None)
+            data = node.data
+            self.triggers[node.table].append(TriggerDef(
+                name=node.name.rsplit(".", 1)[-1], table=node.table, timing=data.get("timing") or "AFTER",
+                events=list(data.get("events", [])), columns=[c.lower() for c in data.get("columns", [])],
+                level=data.get("level", "STATEMENT"), when=data.get("when"), function=function,
+                file=node.file, line=node.line))
+        for table_triggers in self.triggers.values():
+            table_triggers.sort(key=lambda t: (TIMING_ORDER.get(t.timing, 2), t.name))
+
+    def own_writes(self, function_id: str) -> List[WriteEvent]:
+        """Escrituras del cuerpo de la función, con las tablas resueltas según su search_path"""
+        node = self.graph.nodes[function_id]
+        sql_file = self.files.get(node.file)
+        search_path = search_path_of(sql_file) if sql_file is not None else ["public"]
+        writes = []
+        for table, event, columns, line in node.data.get("write_events", []):
+            target = self.graph.resolve(table, RELATION_KINDS, search_path)
+            if target is not None:
+                writes.append(WriteEvent(self.graph.nodes[target].name, event, columns, node.name, line))
+        return writes
+
+    def writes(self, function_id: str, seen: Optional[Set[str]] = None) -> List[WriteEvent]:
+        """Escrituras de la función y, transitivamente, de las funciones que llama"""
+        if seen is None and function_id in self._writes:
+            return self._writes[function_id]
+        seen = (seen or set()) | {function_id}
+        writes = self.own_writes(function_id)
+        for target, edge in sorted(self.graph.dependencies[function_id].items()):
+            if "calls" in edge.labels and self.graph.nodes[target].kind == "function" and target not in seen:
+                writes += self.writes(target, seen)
+        if len(seen) == 1:
+            self._writes[function_id] = writes
+        return writes
+
+    def guarded(self, function_id: Optional[str]) -> bool:
+        """La función consulta pg_trigger_depth() (suele cortar la recursión)"""
+        return function_id is not None and self.graph.nodes[function_id].data.get("trigger_depth_guard", False)
+
+    def expand(self, table: str, event: str, columns: Optional[List[str]] = None) -> Cascade:
+        cascade = Cascade(table, event)
+        self._expand(cascade, table, event, columns, [(table, event)], 1)
+        return cascade
+
+    def _expand(self, cascade: Cascade, table: str, event: str, columns: Optional[List[str]],
+                path: List[Tuple[str, str]], depth: int):
+        for trigger in self.triggers.get(table, []):
+            if not trigger.fires(event, columns):
+                continue
+            step = Step(trigger, depth)
+            cascade.steps.append(step)
+            cascade.invocations += 1
+            cascade.depth = max(cascade.depth, depth)
+            if trigger.function is None:
+                continue
+            if self.graph.nodes[trigger.function].data.get("dynamic_sql"):
+                cascade.dynamic.append(self.graph.nodes[trigger.function].name)
+            for write in self.writes(trigger.function):
+                cascade.writes += 1
+                key = (write.table, write.event)
+                if key in path:
+                    step.cycles.append(write)
+                    start = path.index(key)
+                    cycle = Cycle([f"{t} {e}" for t, e in path[start:] + [key]], trigger,
+                                  self.guarded(trigger.function))
+                    if all(cycle.key != other.key for other in cascade.cycles):
+                        cascade.cycles.append(cycle)
+                    continue
+                step.writes.append(write)
+                self._expand(cascade, write.table, write.event, write.columns, path + [key], depth + 1)
+
+
+def distinct_cycles(cascades: List[Cascade]) -> List[Cycle]:
+    """Cada ciclo una sola vez aunque se alcance desde varias cascadas"""
+    cycles = {}
+    for cascade in cascades:
+        for cycle in cascade.cycles:
+            cycles.setdefault(cycle.key, cycle)
+    return [cycles[key] for key in sorted(cycles)]
+
+
+def analyze_cascades(corpus: DDLCorpus, graph: DDLGraph) -> List[Cascade]:
+    """Cascada de cada (tabla, evento) con triggers, de mayor a menor amplificación"""
+    cascades_by_table = TriggerCascades(corpus, graph)
+    cascades = []
+    for table, triggers in cascades_by_table.triggers.items():
+        events = {event for trigger in triggers for event in trigger.events if event in EVENTS}
+        for event in sorted(events):
+            cascades.append(cascades_by_table.expand(table, event))
+    return sorted(cascades, key=lambda c: (-c.writes, -c.invocations, c.table, c.event))
+
+
+# CLI
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cascadas de triggers y amplificación de escrituras del DDL")
+    parser.add_argument("--ddl", type=Path, help="Directorio ddl/ (default: el de validate_integrity.py)")
+    parser.add_argument("--table", help="Limitar el reporte a una tabla (schema.tabla)")
+    parser.add_argument("--tree", action="store_true", help="Mostrar la cadena completa de cada cascada")
+    parser.add_argument("--all", action="store_true",
+                        help=f"Incluir las cascadas de menos de {AMPLIFICATION_THRESHOLD} escrituras por fila")
+    return parser.parse_args(argv)
+
+
+def print_tree(cascade: Cascade, colors):
+    print(f"  {cascade.event} {cascade.table}")
+    for step in cascade.steps:
+        trigger = step.trigger
+        indent = "  " * (step.depth + 1)
+        when = " WHEN (...)" if trigger.when else ""
+        function = trigger.function.split(":", 1)[-1] if trigger.function else "?"
+        print(f"{indent}↳ {trigger.timing} {trigger.name}{when} → {function}()")
+        for write in step.writes:
+            columns = f" SET {', '.join(write.columns)}" if write.columns else ""
+            print(f"{indent}    {write.event} {write.table}{columns}")
+        for write in step.cycles:
+            print(f"{indent}    {colors.FAIL}{write.event} {write.table} (ciclo){colors.ENDC}")
+
+
+def main(argv=None):
+    from ddl_cache import DEFAULT_CACHE_FILE, FactsCache
+    from ddl_corpus import load_corpus
+    from ddl_graph import build_graph
+    from validate_integrity import BASE_PATH, Colors, print_ok, print_section
+
+    args = parse_args(argv)
+    cache = FactsCache(DEFAULT_CACHE_FILE)
+    corpus = load_corpus(args.ddl or BASE_PATH, cache=cache)
+    cache.save()
+    cascades = analyze_cascades(corpus, build_graph(corpus))
+    if args.table:
+        cascades = [cascade for cascade in cascades if cascade.table == args.table]
+    elif not args.all:
+        cascades = [cascade for cascade in cascades
+                    if cascade.writes >= AMPLIFICATION_THRESHOLD or cascade.cycles]
+
+    print_section("CASCADAS DE TRIGGERS")
+    if not cascades:
+        print_ok("No hay cascadas de triggers que amplifiquen las escrituras")
+        return 0
+    print(f"{'tabla':<50} {'evento':<7} {'filas':>6} {'triggers':>9} {'prof.':>6}")
+    for cascade in cascades:
+        cycle = f"  {Colors.FAIL}ciclo{Colors.ENDC}" if cascade.cycles else ""
+        print(f"{cascade.table:<50} {cascade.event:<7} {cascade.writes:>6} {cascade.invocations:>9} "
+              f"{cascade.depth:>6}{cycle}")
+
+    if args.tree:
+        print_section("CADENAS")
+        for cascade in cascades:
+            print_tree(cascade, Colors)
+            print()
+
+    cycles = distinct_cycles(cascades)
+    if cycles:
+        print_section("CICLOS")
+        for cycle in cycles:
+            guard = " (con guard pg_trigger_depth())" if cycle.guarded else ""
+            print(f"  {' → '.join(cycle.path)}  vía {cycle.trigger.name}{guard}")
+
+    print(f"\n✓ {len(cascades)} cascadas (peor caso por fila escrita; --tree para ver la cadena)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
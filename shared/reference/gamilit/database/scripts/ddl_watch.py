@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Notificaciones de cambios en ddl/ para el modo --watch de validate_integrity.py
+
+Usa watchdog (inotify/FSEvents/ReadDirectoryChanges) si está instalado; si no,
+compara periódicamente los mtime y tamaños de los .sql. En ambos casos entrega
+lotes de paths cambiados (creados, modificados o borrados), agrupando las
+ráfagas de eventos que generan los editores al guardar.
+Fecha: 2025-11-10
+"""
+
+import queue
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Set, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+
+# Espera tras el último evento antes de entregar el lote (editores que guardan en varios pasos)
+DEBOUNCE_SECONDS = 0.05
+
+
+def _snapshot(base_path: Path) -> Dict[Path, Tuple[int, int]]:
+    snapshot = {}
+    for path in base_path.rglob("*.sql"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def poll_changes(base_path: Path, interval: float) -> Iterator[Set[Path]]:
+    """Lotes de .sql cambiados comparando mtime/tamaño cada `interval` segundos"""
+    base_path = Path(base_path)
+    before = _snapshot(base_path)
+    while True:
+        time.sleep(interval)
+        after = _snapshot(base_path)
+        changed = {path for path in before.keys() | after.keys() if before.get(path) != after.get(path)}
+        before = after
+        if changed:
+            yield changed
+
+
+def notify_changes(base_path: Path) -> Iterator[Set[Path]]:
+    """Lotes de .sql cambiados según las notificaciones del sistema (watchdog)"""
+    events: "queue.Queue[Path]" = queue.Queue()
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            for attr in ("src_path", "dest_path"):
+                path = getattr(event, attr, None)
+                if path and str(path).endswith(".sql"):
+                    events.put(Path(path))
+
+    observer = Observer()
+    observer.schedule(Handler(), str(base_path), recursive=True)
+    observer.start()
+    try:
+        while True:
+            changed = {events.get()}
+            while True:
+                try:
+                    changed.add(events.get(timeout=DEBOUNCE_SECONDS))
+                except queue.Empty:
+                    break
+            yield changed
+    finally:
+        observer.stop()
+        observer.join()
+
+
+def watch_changes(base_path: Path, interval: float = 0.5) -> Iterator[Set[Path]]:
+    """Lotes de paths .sql cambiados bajo `base_path` (bloquea hasta el siguiente cambio)"""
+    if HAS_WATCHDOG:
+        return notify_changes(base_path)
+    return poll_changes(base_path, interval)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Salida legible por máquina de los issues de validate_integrity.py
+
+Cada writer recibe los issues de un validador en cuanto éste termina y los
+escribe de inmediato (sin esperar al resto), de modo que CI puede consumir los
+resultados mientras la validación avanza:
+
+- JsonlWriter: un objeto JSON por línea (con el proyecto al que pertenece).
+- SarifWriter: un documento SARIF 2.1.0 que se escribe incrementalmente, con
+  un `run` por proyecto (los `results` primero y las reglas vistas al cerrar
+  el run).
+Fecha: 2025-11-10
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Optional, TextIO
+
+# De mayor a menor severidad
+SEVERITIES = ("CRÍTICO", "ALTO", "MEDIO", "BAJO")
+
+SARIF_LEVELS = {"CRÍTICO": "error", "ALTO": "error", "MEDIO": "warning", "BAJO": "note"}
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+TOOL_NAME = "validate_integrity"
+
+
+def issue_record(issue: dict, validator, project: Optional[str] = None) -> dict:
+    """Issue normalizado: file=None si no aplica, line/column=None si no se conocen"""
+    return {
+        "project": project,
+        "severity": issue["severity"],
+        "type": issue["type"],
+        "file": None if issue["file"] == "N/A" else issue["file"],
+        "line": issue.get("line"),
+        "column": issue.get("column"),
+        "object": issue.get("object"),
+        "message": issue["message"],
+        "validation": validator.__name__,
+    }
+
+
+class JsonlWriter:
+    """Un issue por línea (JSON Lines)"""
+    machine = True
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.project_name: Optional[str] = None
+
+    def begin(self, projects):
+        pass
+
+    def project(self, project):
+        self.project_name = project.name
+
+    def validator(self, validator, output: str, issues):
+        for issue in issues:
+            record = issue_record(issue, validator, self.project_name)
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def end_project(self, project, counts: Dict[str, int]):
+        pass
+
+    def finish(self, counts: Dict[str, int]):
+        pass
+
+
+class SarifWriter:
+    """Documento SARIF 2.1.0 escrito a medida que llegan los issues"""
+    machine = True
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.base_path: Optional[Path] = None
+        self.rules: Dict[str, dict] = {}
+        self.first = True
+        self.first_run = True
+
+    def begin(self, projects):
+        self.stream.write('{"version": "2.1.0", "$schema": ' + json.dumps(SARIF_SCHEMA) + ', "runs": [\n')
+
+    def project(self, project):
+        """Abre el run del proyecto; sus URIs son relativas a su raíz (uriBaseId DDL)"""
+        self.base_path = Path(project.root)
+        self.rules = {}
+        self.first = True
+        base_uri = self.base_path.resolve().as_uri() + "/"
+        self.stream.write(("" if self.first_run else ",\n") +
+                          '{"automationDetails": ' + json.dumps({"id": f"{project.name}/"}, ensure_ascii=False) +
+                          ', "originalUriBaseIds": ' + json.dumps({"DDL": {"uri": base_uri}}) + ', "results": [\n')
+        self.first_run = False
+
+    def location(self, issue: dict) -> Optional[dict]:
+        if issue["file"] == "N/A":
+            return None
+        path = Path(issue["file"])
+        try:
+            artifact = {"uri": path.relative_to(self.base_path).as_posix(), "uriBaseId": "DDL"}
+        except ValueError:
+            artifact = {"uri": path.resolve().as_uri()}
+        location = {"artifactLocation": artifact}
+        if issue.get("line"):
+            region = {"startLine": issue["line"]}
+            if issue.get("column"):
+                region["startColumn"] = issue["column"]
+            location["region"] = region
+        return {"physicalLocation": location}
+
+    def validator(self, validator, output: str, issues):
+        for issue in issues:
+            self.rules.setdefault(issue["type"], {
+                "id": issue["type"],
+                "shortDescription": {"text": validator.title},
+                "defaultConfiguration": {"level": SARIF_LEVELS[issue["severity"]]},
+            })
+            result = {
+                "ruleId": issue["type"],
+                "level": SARIF_LEVELS[issue["severity"]],
+                "message": {"text": issue["message"]},
+                "properties": {"severity": issue["severity"], "object": issue.get("object")},
+            }
+            location = self.location(issue)
+            if location:
+                result["locations"] = [location]
+            self.stream.write(("" if self.first else ",\n") + json.dumps(result, ensure_ascii=False))
+            self.first = False
+        self.stream.flush()
+
+    def end_project(self, project, counts: Dict[str, int]):
+        driver = {"name": TOOL_NAME, "rules": [self.rules[rule_id] for rule_id in sorted(self.rules)]}
+        self.stream.write('\n], "tool": ' + json.dumps({"driver": driver}, ensure_ascii=False) + "}")
+        self.stream.flush()
+
+    def finish(self, counts: Dict[str, int]):
+        self.stream.write("\n]}\n")
+        self.stream.flush()
+
+
+def exceeds_threshold(counts: Dict[str, int], fail_on: str) -> bool:
+    """True si hay issues de severidad `fail_on` o mayor (NINGUNO: nunca)"""
+    if fail_on not in SEVERITIES:
+        return False
+    return any(counts.get(severity, 0) for severity in SEVERITIES[:SEVERITIES.index(fail_on) + 1])
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Medición por fases para los scripts de base de datos
+
+`timed()` es un context manager que mide una fase (wall, CPU, pico de RSS y los
+contadores registrados) y `Profiler` agrupa varias fases de una ejecución con
+cProfile y tracemalloc opcionales por fase:
+
+    from profiling import register_counter, timed
+    register_counter(BYTES_READ, lambda: ddl_corpus.bytes_read)
+    with timed("cargar seeds") as stats:
+        ...
+    print(stats.wall, stats.counters[BYTES_READ])
+
+Un contador es una función sin argumentos que devuelve un total acumulado; la
+fase guarda la diferencia entre el final y el inicio. Solo cuentan lo ocurrido
+en este proceso (no en workers de un ProcessPoolExecutor).
+Fecha: 2025-11-10
+"""
+
+import cProfile
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Contadores que conocen format_stats() y Profiler.report()
+BYTES_READ = "bytes_read"
+TOKENIZER_CALLS = "tokenizer_calls"
+
+_COUNTERS: Dict[str, Callable[[], int]] = {}
+
+
+def register_counter(name: str, read: Callable[[], int]):
+    """Registra (o reemplaza) un contador acumulado que se mide en cada fase"""
+    _COUNTERS[name] = read
+
+
+@dataclass
+class PhaseStats:
+    """Métricas de una fase"""
+    name: str
+    wall: float = 0.0
+    cpu: float = 0.0
+    counters: Dict[str, int] = field(default_factory=dict)
+    peak_rss_kb: int = 0                 # pico del proceso al terminar la fase
+    peak_traced: Optional[int] = None    # pico de memoria Python de la fase (solo con tracemalloc)
+    top_allocations: List[str] = field(default_factory=list)
+
+
+# Asignaciones propias de la medición que no se reportan en el top
+_OWN_FRAMES = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, cProfile.__file__),
+               tracemalloc.Filter(False, __file__)]
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_OWN_FRAMES)
+
+
+def _peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS reporta bytes
+
+
+@contextmanager
+def timed(name: str = "", stream=None, tracemalloc_top: int = 0, cprofile: Optional[cProfile.Profile] = None):
+    """Mide el bloque; si recibe `stream`, imprime una línea de resumen al terminar"""
+    stats = PhaseStats(name)
+    if tracemalloc_top and tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        snapshot_before = _snapshot()
+    counters_before = {name: read() for name, read in _COUNTERS.items()}
+    wall_before = time.perf_counter()
+    cpu_before = time.process_time()
+    if cprofile is not None:
+        cprofile.enable()
+    try:
+        yield stats
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+        stats.wall = time.perf_counter() - wall_before
+        stats.cpu = time.process_time() - cpu_before
+        stats.counters = {name: read() - counters_before[name] for name, read in _COUNTERS.items()}
+        stats.peak_rss_kb = _peak_rss_kb()
+        if tracemalloc_top and tracemalloc.is_tracing():
+            stats.peak_traced = tracemalloc.get_traced_memory()[1]
+            diff = _snapshot().compare_to(snapshot_before, "lineno")
+            stats.top_allocations = [str(entry) for entry in diff[:tracemalloc_top]]
+        if stream is not None:
+            print(format_stats(stats), file=stream)
+
+
+def format_stats(stats: PhaseStats) -> str:
+    line = (f"{stats.name}: {stats.wall * 1000:.1f} ms wall, {stats.cpu * 1000:.1f} ms CPU, "
+            f"{stats.counters.get(BYTES_READ, 0) / 1024:.0f} KB leídos, "
+            f"{stats.counters.get(TOKENIZER_CALLS, 0)} tokenizaciones, "
+            f"pico RSS {stats.peak_rss_kb / 1024:.0f} MB")
+    if stats.peak_traced is not None:
+        line += f", pico Python {stats.peak_traced / 1024:.0f} KB"
+    return line
+
+
+class Profiler:
+    """Fases de una ejecución; deshabilitado no mide nada"""
+
+    def __init__(self, enabled: bool = False, cprofile_dir: Optional[Path] = None, tracemalloc_top: int = 0):
+        self.enabled = enabled
+        self.cprofile_dir = Path(cprofile_dir) if cprofile_dir else None
+        self.tracemalloc_top = tracemalloc_top
+        self.phases: List[PhaseStats] = []
+        self.prefix = ""                  # p. ej. "proyecto/" al medir varios proyectos
+        if enabled and tracemalloc_top and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield None
+            return
+        profile = cProfile.Profile() if self.cprofile_dir else None
+        name = self.prefix + name
+        with timed(name, tracemalloc_top=self.tracemalloc_top, cprofile=profile) as stats:
+            yield stats
+        self.phases.append(stats)
+        if profile is not None:
+            self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(str(self.cprofile_dir / f"{len(self.phases):02d}-{name.replace('/', '-')}.prof"))
+
+    def report(self, stream=None):
+        """Tabla de fases (y top de asignaciones si hay tracemalloc)"""
+        stream = stream or sys.stdout
+        traced = any(stats.peak_traced is not None for stats in self.phases)
+        header = f"{'fase':<38} {'wall ms':>9} {'CPU ms':>9} {'KB leídos':>10} {'tokeniz.':>9} {'RSS MB':>7}"
+        print(header + (f" {'pico KB':>9}" if traced else ""), file=stream)
+        for stats in self.phases:
+            row = (f"{stats.name:<38} {stats.wall * 1000:>9.1f} {stats.cpu * 1000:>9.1f} "
+                   f"{stats.counters.get(BYTES_READ, 0) / 1024:>10.0f} {stats.counters.get(TOKENIZER_CALLS, 0):>9} "
+                   f"{stats.peak_rss_kb / 1024:>7.0f}")
+            if traced:
+                row += f" {(stats.peak_traced or 0) / 1024:>9.0f}"
+            print(row, file=stream)
+        total_wall = sum(stats.wall for stats in self.phases)
+        print(f"{'total':<38} {total_wall * 1000:>9.1f} {sum(s.cpu for s in self.phases) * 1000:>9.1f}", file=stream)
+
+        for stats in self.phases:
+            if stats.top_allocations:
+                print(f"\nTop asignaciones en {stats.name}:", file=stream)
+                for entry in stats.top_allocations:
+                    print(f"  {entry}", file=stream)
+        if self.cprofile_dir:
+            print(f"\nEstadísticas de cProfile en {self.cprofile_dir} (python3 -m pstats <archivo>)", file=stream)
@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""
+Compilador de seeds: INSERT fila por fila → COPY ... FROM STDIN
+
+Los seeds como seeds/prod/gamification_system/07-ml_coins_transactions.sql
+son decenas de INSERT de una fila, cada uno parseado y planificado por
+separado. Este compilador agrupa los INSERT consecutivos a la misma tabla,
+con las mismas columnas y el mismo ON CONFLICT, y los reemplaza por una sola
+carga:
+
+- si todos los valores son literales sin tipo ('texto') o NULL y no hay
+  ON CONFLICT: un COPY directo a la tabla
+- si no: un COPY a una tabla temporal cuyas columnas tienen exactamente el
+  tipo que tenía cada literal ('x'::uuid → uuid, 100 → numeric, 'x' → el de
+  la columna destino) y un solo INSERT ... SELECT ... ORDER BY con el
+  ON CONFLICT original, así que los casts, el orden de inserción y los
+  upserts se comportan igual que fila por fila
+
+Las expresiones también se compilan cuando son iguales en todas las filas
+salvo por constantes con tipo explícito (gamilit.now_mexico() - INTERVAL
+'12 days' → la constante va en una columna interval de la tabla temporal);
+jsonb_build_object(...) con argumentos literales se precalcula como JSONB.
+Los INSERT que no se pueden compilar sin cambiar su significado (subconsultas,
+RETURNING, ON CONFLICT DO UPDATE con claves repetidas o no literales, UUIDs
+inválidos que harían fallar todo el bloque, cadenas U&'...' que el tokenizador
+no decodifica, casts a varchar(n)/char(n) que recortan donde COPY fallaría,
+INSERT dentro de bloques DO...) quedan como están.
+
+Un bloque COPY es todo o nada: un seed con datos inválidos que fila por fila
+cargaba parcialmente (psql sigue después de un error) falla completo.
+Validar antes con validate_seeds.py.
+
+La salida se guarda en scripts/.cache/seed-copy/ por sha256 del seed (del
+manifiesto de seed_manifest.py: un seed sin cambios ni se vuelve a leer).
+
+Uso:
+    python3 scripts/seed_copy.py                                   # seeds/prod → scripts/.cache/seeds-copy/prod/
+    python3 scripts/seed_copy.py --env dev --env prod
+    python3 scripts/seed_copy.py seeds/prod/gamification_system/07-ml_coins_transactions.sql --stdout
+    SEEDS_COPY=1 ./create-database.sh                              # cargar los seeds compilados
+Fecha: 2025-11-10
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from seed_parser import DEFAULT, DEFAULT_SEEDS, ENVIRONMENTS, EXPRESSION, LITERAL, NULL, cast_index, classify_value
+from sql_lexer import (DOLLAR, IDENT, NUMBER, OP, QIDENT, STRING, Token, is_op, is_word, matching_paren, read_name,
+                       split_top_level, sql_text, tokenize)
+from validate_seeds import UUID_PATTERN
+
+COMPILER_VERSION = 4
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".cache" / "seed-copy"
+DEFAULT_OUT = Path(__file__).resolve().parent / ".cache" / "seeds-copy"
+STAGING = "pg_temp._seed_copy"
+MIN_ROWS = 2                        # un grupo de una sola fila se deja como INSERT
+
+# Tipos que admiten la sintaxis de constante `tipo 'texto'`
+TYPED_CONSTANTS = {"interval", "date", "time", "timestamp", "timestamptz", "uuid", "json", "jsonb", "inet",
+                   "numeric", "boolean", "text"}
+INTERVAL_FIELDS = {"YEAR", "MONTH", "DAY", "HOUR", "MINUTE", "SECOND", "TO"}
+SUBQUERY_WORDS = {"SELECT", "WITH", "VALUES", "TABLE"}
+# Tipos de texto con largo máximo (el cast explícito recorta; COPY rechaza el valor)
+LENGTH_LIMITED = re.compile(r"(?:^|\.)(?:varchar|character varying|char|character|bpchar|nchar)\(")
+# Funciones JSON que se precalculan con argumentos literales → construye un objeto
+JSON_BUILDERS = {"jsonb_build_object": True, "pg_catalog.jsonb_build_object": True,
+                 "jsonb_build_array": False, "pg_catalog.jsonb_build_array": False}
+
+# Formas de una celda (ver _cell)
+UNTYPED = ("untyped",)              # literal sin tipo: lo interpreta el tipo de la columna destino
+DEFAULT_SHAPE = ("default",)
+
+
+@dataclass
+class Cell:
+    shape: Optional[tuple]          # UNTYPED, ("typed", tipo), DEFAULT_SHAPE, ("expr", plantilla, tipos) o None (NULL)
+    data: List[Optional[str]]       # valores para el COPY (uno, o uno por constante de la plantilla)
+
+
+@dataclass
+class InsertPlan:
+    target: str                     # tabla como está escrita (con AS alias si lo tiene)
+    table: str                      # tabla sin alias
+    columns: Optional[List[str]]    # columnas como están escritas (None: sin lista)
+    rows: List[List[Cell]]
+    conflict: str                   # texto normalizado del ON CONFLICT ("" si no hay)
+    conflict_at: int                # índice del token ON del ON CONFLICT
+    conflict_keys: List[tuple]      # por fila, valores de las columnas del ON CONFLICT (DO UPDATE)
+    conflict_source: str = ""       # ON CONFLICT tal como está en el archivo
+
+
+@dataclass
+class CopyStats:
+    inserts: int = 0
+    compiled: int = 0               # INSERT reemplazados por bloques COPY
+    rows: int = 0
+    blocks: int = 0
+    kept: Dict[str, int] = field(default_factory=dict)   # motivo → INSERT que quedaron como están
+
+    def keep(self, reason: str, count: int = 1):
+        self.kept[reason] = self.kept.get(reason, 0) + count
+
+
+def copy_text(value: Optional[str]) -> str:
+    """Valor en formato texto de COPY (\\N es NULL; barra, tab y saltos de línea escapados)"""
+    if value is None:
+        return "\\N"
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _offsets(text: str):
+    """Función token → posición en text (los tokens tienen línea y columna)"""
+    line_starts = [0] + [match.end() for match in re.finditer("\n", text)]
+    return lambda token: line_starts[token.line - 1] + token.col - 1
+
+
+def iter_statements(text: str) -> Iterator[Tuple[List[Token], int, int]]:
+    """(tokens, inicio, fin) de cada sentencia; el fin incluye el `;`
+
+    Un metacomando de psql (\\ir archivo.sql) al inicio de una sentencia termina
+    con su línea y sale como una sentencia propia.
+    """
+    offset = _offsets(text)
+    statement, meta = [], False
+    for token in tokenize(text):
+        if meta and token.line != statement[-1].line:
+            line_end = text.find("\n", offset(statement[0]))
+            yield statement, offset(statement[0]), line_end if line_end >= 0 else len(text)
+            statement, meta = [], False
+        if token.kind == OP and token.value == ";" and not meta:
+            if statement:
+                yield statement, offset(statement[0]), offset(token) + 1
+            statement = []
+        else:
+            meta = meta or not statement and is_op(token, "\\")
+            statement.append(token)
+    if statement:
+        yield statement, offset(statement[0]), len(text)
+
+
+def _constant_type(text: str) -> str:
+    """Tipo de la columna temporal para una constante sin cast: numeric cubre los enteros (el destino la convierte)"""
+    return "boolean" if text in ("true", "false") else "numeric"
+
+
+def _json_build(tokens: List[Token]) -> Optional[str]:
+    """JSON de jsonb_build_object/jsonb_build_array con argumentos literales, anidados o no (None si no lo es)"""
+    name, j = read_name(tokens, 0)
+    if name not in JSON_BUILDERS or j >= len(tokens) or not is_op(tokens[j], "(") \
+            or matching_paren(tokens, j) != len(tokens) - 1:
+        return None
+    args = split_top_level(tokens[j + 1:-1]) if j + 1 < len(tokens) - 1 else []
+    is_object = JSON_BUILDERS[name]
+    if is_object and len(args) % 2:
+        return None
+    items = []
+    for position, arg in enumerate(args):
+        value = classify_value(arg)
+        key = is_object and position % 2 == 0
+        if value.kind == EXPRESSION and not key:
+            nested = _json_build(arg)
+            if nested is None:
+                return None
+            items.append(nested)
+        elif value.kind == NULL and key or value.kind not in (LITERAL, NULL) or value.cast:
+            return None
+        elif value.kind == NULL:
+            items.append("null")
+        elif value.quoted or key:
+            items.append(json.dumps(value.value, ensure_ascii=False))
+        elif value.value in ("true", "false"):
+            items.append(value.value)
+        else:
+            try:
+                items.append(str(Decimal(value.value)))
+            except InvalidOperation:
+                return None
+    if not is_object:
+        return "[" + ", ".join(items) + "]"
+    return "{" + ", ".join(f"{items[k]}: {items[k + 1]}" for k in range(0, len(items), 2)) + "}"
+
+
+def _array(tokens: List[Token]) -> Optional[Cell]:
+    """ARRAY['a', 'b'] o ARRAY['a']::tipo[] de textos como literal de arreglo {"a","b"} (None si no lo es)"""
+    start = cast_index(tokens)
+    cast = sql_text(tokens[start + 1:]) if start is not None else "text[]"
+    body = tokens[:start] if start is not None else tokens
+    if len(body) < 3 or not is_word(body[0], "ARRAY") or not is_op(body[1], "[") \
+            or not is_op(body[-1], "]") or not cast.endswith("[]"):
+        return None
+    elements = []
+    for element in (split_top_level(body[2:-1]) if len(body) > 3 else []):
+        value = classify_value(element)
+        if value.kind == NULL and not value.cast:
+            elements.append("NULL")
+        elif value.kind == LITERAL and value.quoted and not value.cast:
+            elements.append('"' + value.value.replace("\\", "\\\\").replace('"', '\\"') + '"')
+        else:
+            return None
+    if not elements and start is None:
+        return None                 # ARRAY[] sin tipo no es válido en PostgreSQL
+    return Cell(("typed", cast), ["{" + ",".join(elements) + "}"])
+
+
+def _type_end(tokens: List[Token], i: int) -> int:
+    """Fin del nombre de tipo que empieza en tokens[i] (schema.tipo, varchar(20), character varying(20),
+    timestamp with time zone, tipo[])"""
+    n = len(tokens)
+    if i >= n or tokens[i].kind not in (IDENT, QIDENT):
+        return i
+    name, i = read_name(tokens, i)
+    if i < n and (name in ("character", "char", "bit", "nchar") and is_word(tokens[i], "VARYING")
+                  or name == "double" and is_word(tokens[i], "PRECISION")):
+        i += 1
+    if i < n and is_op(tokens[i], "(") and matching_paren(tokens, i) < n and \
+            all(t.kind == NUMBER or is_op(t, ",") for t in tokens[i + 1:matching_paren(tokens, i)]):
+        i = matching_paren(tokens, i) + 1
+    if name in ("time", "timestamp") and i + 2 < n and is_word(tokens[i], "WITH", "WITHOUT") \
+            and is_word(tokens[i + 1], "TIME") and is_word(tokens[i + 2], "ZONE"):
+        i += 3
+    while i + 1 < n and is_op(tokens[i], "[") and is_op(tokens[i + 1], "]"):
+        i += 2
+    return i
+
+
+def _template(tokens: List[Token]) -> Optional[Tuple[tuple, tuple, List[str]]]:
+    """(plantilla, tipos, valores): la expresión con sus constantes con tipo explícito como parámetros"""
+    if any(is_word(token, *SUBQUERY_WORDS) for token in tokens) or any(t.kind == OP and t.value == "\\"
+                                                                       for t in tokens):
+        return None
+    pieces, types, values = [], [], []
+    i, n = 0, len(tokens)
+    while i < n:
+        token = tokens[i]
+        # INTERVAL '12 days', DATE '2025-01-01'... (sin calificador de campo: INTERVAL '1' DAY)
+        if (token.kind == IDENT and token.value.lower() in TYPED_CONSTANTS and i + 1 < n
+                and tokens[i + 1].kind == STRING and not (i + 2 < n and is_word(tokens[i + 2], *INTERVAL_FIELDS))
+                and not (i > 0 and is_op(tokens[i - 1], "."))):
+            pieces.append(len(types))
+            types.append(token.value.lower())
+            values.append(tokens[i + 1].value)
+            i += 2
+            continue
+        # 'texto'::tipo
+        if token.kind in (STRING, DOLLAR) and i + 2 < n and is_op(tokens[i + 1], "::"):
+            end = _type_end(tokens, i + 2)
+            if end > i + 2:
+                pieces.append(len(types))
+                types.append(sql_text(tokens[i + 2:end]))
+                values.append(token.value)
+                i = end
+                continue
+        pieces.append(token)
+        i += 1
+    return tuple(sql_text([piece]) if isinstance(piece, Token) else piece for piece in pieces), tuple(types), values
+
+
+def _render(template: tuple, names: List[str]) -> str:
+    """Texto de la plantilla con cada parámetro reemplazado por su columna de la tabla temporal"""
+    text = []
+    previous_word = False
+    for piece in template:
+        word = isinstance(piece, int) or not re.fullmatch(r"[^\w'\"$]+", piece)
+        if previous_word and word:
+            text.append(" ")
+        text.append(names[piece] if isinstance(piece, int) else piece)
+        previous_word = word
+    return "".join(text)
+
+
+def _cell(tokens: List[Token]) -> Optional[Cell]:
+    """Forma y datos de un valor de VALUES (None si no se puede compilar)"""
+    value = classify_value(tokens)
+    if value.kind == DEFAULT:
+        return Cell(DEFAULT_SHAPE, [])
+    if value.kind in (LITERAL, NULL):
+        start = cast_index(tokens)
+        cast = sql_text(tokens[start + 1:]) if start is not None else None
+        if value.kind == NULL:
+            return Cell(("typed", cast) if cast else None, [None])
+        if cast:
+            shape = ("typed", cast)
+        elif value.quoted:
+            shape = UNTYPED
+        else:
+            shape = ("typed", _constant_type(value.value))
+        return Cell(shape, [value.value])
+    json_text = _json_build(tokens)
+    if json_text is not None:
+        return Cell(("typed", "jsonb"), [json_text])
+    array = _array(tokens)
+    if array is not None:
+        return array
+    template = _template(tokens)
+    if template is None:
+        return None
+    pieces, types, values = template
+    return Cell(("expr", pieces, types), values)
+
+
+def _valid(cell: Cell) -> bool:
+    """False si el COPY fallaría donde el INSERT también falla (se deja el INSERT para que falle solo)"""
+    if cell.shape and cell.shape[0] == "typed" and cell.shape[1] == "uuid":
+        return cell.data[0] is None or UUID_PATTERN.fullmatch(cell.data[0]) is not None
+    if cell.shape and cell.shape[0] == "expr":
+        return all(kind != "uuid" or UUID_PATTERN.fullmatch(value)
+                   for kind, value in zip(cell.shape[2], cell.data))
+    return True
+
+
+def _truncates(cell: Cell) -> bool:
+    """True si el valor tiene un cast explícito a varchar(n)/char(n): el cast recorta el texto sin error,
+    pero COPY a una columna de ese tipo falla con "value too long" """
+    if cell.shape and cell.shape[0] == "typed":
+        return LENGTH_LIMITED.search(cell.shape[1]) is not None
+    if cell.shape and cell.shape[0] == "expr":
+        return any(LENGTH_LIMITED.search(kind) for kind in cell.shape[2])
+    return False
+
+
+def _key(cell: Cell) -> Optional[str]:
+    """Valor de una clave del ON CONFLICT como lo compara PostgreSQL (los uuid sin mayúsculas ni guiones)"""
+    value = cell.data[0]
+    if value is not None and cell.shape == ("typed", "uuid"):
+        return value.lower().replace("-", "").strip("{}")
+    return value
+
+
+def plan_insert(stmt: List[Token]) -> Tuple[Optional[InsertPlan], str]:
+    """InsertPlan de un INSERT ... VALUES compilable, o (None, motivo)"""
+    if len(stmt) < 3 or not is_word(stmt[0], "INSERT") or not is_word(stmt[1], "INTO"):
+        return None, ""
+    if any(is_op(token, "\\") for token in stmt):
+        return None, "metacomandos de psql dentro del INSERT"
+    if any(token.kind == STRING and token.tag for token in stmt):
+        # El tokenizador no decodifica U&'\0041' ni B'' / X'': el valor no es el que insertaría PostgreSQL
+        return None, "cadenas U&'...', B'...' o X'...'"
+    name, j = read_name(stmt, 2)
+    if not name:
+        return None, "sintaxis no reconocida"
+    table = sql_text(stmt[2:j])
+    if j < len(stmt) and is_word(stmt[j], "AS"):
+        j += 2
+    target = sql_text(stmt[2:j])
+    columns = None
+    if j < len(stmt) and is_op(stmt[j], "("):
+        close = matching_paren(stmt, j)
+        columns = [sql_text(part) for part in split_top_level(stmt[j + 1:close])]
+        j = close + 1
+    if j >= len(stmt) or not is_word(stmt[j], "VALUES"):
+        return None, "INSERT sin VALUES (SELECT, DEFAULT VALUES, OVERRIDING...)"
+    j += 1
+    rows = []
+    while j < len(stmt) and is_op(stmt[j], "("):
+        close = matching_paren(stmt, j)
+        cells = [_cell(part) for part in split_top_level(stmt[j + 1:close])]
+        if any(cell is None for cell in cells):
+            return None, "expresiones con subconsultas"
+        if not all(_valid(cell) for cell in cells):
+            return None, "UUID inválido"
+        if any(_truncates(cell) for cell in cells):
+            return None, "casts a varchar(n)/char(n)"
+        if columns is not None and len(cells) != len(columns):
+            return None, "filas con otra cantidad de valores"
+        rows.append(cells)
+        j = close + 1
+        if j < len(stmt) and is_op(stmt[j], ","):
+            j += 1
+
+    conflict, conflict_at, conflict_keys = "", j, []
+    if j < len(stmt):
+        if not (j + 1 < len(stmt) and is_word(stmt[j], "ON") and is_word(stmt[j + 1], "CONFLICT")) \
+                or any(is_word(token, "RETURNING") for token in stmt[j:]):
+            return None, "RETURNING u otra cláusula después de VALUES"
+        conflict = sql_text(stmt[j:])
+        if any(is_word(token, "UPDATE") for token in stmt[j:]):
+            # Un solo INSERT no puede actualizar dos veces la misma fila: las claves deben ser literales
+            k = j + 2
+            if columns is None or k >= len(stmt) or not is_op(stmt[k], "("):
+                return None, "ON CONFLICT DO UPDATE sin columnas"
+            names = [sql_text(part) for part in split_top_level(stmt[k + 1:matching_paren(stmt, k)])]
+            if any(name not in columns for name in names):
+                return None, "ON CONFLICT DO UPDATE sin columnas"
+            for cells in rows:
+                key = [cells[columns.index(name)] for name in names]
+                if any(cell.shape is None or cell.shape[0] not in ("typed", "untyped") for cell in key):
+                    return None, "ON CONFLICT DO UPDATE con claves no literales"
+                conflict_keys.append(tuple(_key(cell) for cell in key))
+    if not rows:
+        return None, "INSERT sin filas"
+    return InsertPlan(target, table, columns, rows, conflict, conflict_at, conflict_keys), ""
+
+
+class CopyGroup:
+    """INSERT consecutivos que se cargan con un solo COPY"""
+
+    def __init__(self, plan: InsertPlan, start: int):
+        self.plan = plan
+        self.shapes: List[Optional[tuple]] = [None] * len(plan.rows[0])
+        self.nulls: List[bool] = [False] * len(plan.rows[0])     # columnas con algún NULL sin cast
+        self.rows: List[List[Cell]] = []
+        self.keys = set()
+        self.start = start
+        self.end = start
+        self.statements = 0
+
+    def accepts(self, plan: InsertPlan) -> bool:
+        if (plan.target, plan.columns, plan.conflict) != (self.plan.target, self.plan.columns, self.plan.conflict):
+            return False
+        if len(plan.rows[0]) != len(self.shapes) or self.keys & set(plan.conflict_keys):
+            return False
+        if len(set(plan.conflict_keys)) != len(plan.conflict_keys):
+            return False
+        shapes, nulls = list(self.shapes), list(self.nulls)
+        for row in plan.rows:
+            if len(row) != len(shapes):
+                return False
+            for position, cell in enumerate(row):
+                shape = shapes[position]
+                if cell.shape is None:
+                    # NULL sin cast: cabe en cualquier columna de literales
+                    if shape is not None and shape[0] not in ("typed", "untyped"):
+                        return False
+                    nulls[position] = True
+                elif shape is None:
+                    if nulls[position] and cell.shape[0] not in ("typed", "untyped"):
+                        return False        # filas anteriores tenían NULL en esta columna
+                    shapes[position] = cell.shape
+                elif shape != cell.shape:
+                    return False
+        self.shapes, self.nulls = shapes, nulls
+        return True
+
+    def add(self, plan: InsertPlan, end: int):
+        self.rows.extend(plan.rows)
+        self.keys.update(plan.conflict_keys)
+        self.end = end
+        self.statements += 1
+
+    def direct(self) -> bool:
+        """COPY directo a la tabla: solo literales sin tipo o NULL, sin ON CONFLICT ni alias"""
+        return (not self.plan.conflict and self.plan.target == self.plan.table
+                and all(shape in (None, UNTYPED) for shape in self.shapes))
+
+    def emit(self) -> str:
+        plan = self.plan
+        if self.direct():
+            columns = f" ({', '.join(plan.columns)})" if plan.columns is not None else ""
+            data = "".join("\t".join(copy_text(cell.data[0]) for cell in row) + "\n" for row in self.rows)
+            return f"COPY {plan.table}{columns} FROM STDIN;\n{data}\\.\n"
+
+        # Tabla temporal con el tipo de cada literal, y un INSERT ... SELECT en el orden original
+        staging, targets, exprs = ["0 AS _n"], [], []
+        uses_table = False
+        for position, shape in enumerate(self.shapes):
+            column = plan.columns[position]
+            name = f"c{position + 1}"
+            if shape == DEFAULT_SHAPE:
+                continue
+            targets.append(column)
+            if shape is None or shape == UNTYPED:
+                staging.append(f"_t.{column} AS {name}")
+                uses_table = True
+                exprs.append(name)
+            elif shape[0] == "typed":
+                staging.append(f"NULL::{shape[1]} AS {name}")
+                exprs.append(name)
+            else:
+                names = [f"{name}_{k + 1}" for k in range(len(shape[2]))]
+                staging += [f"NULL::{kind} AS {param}" for kind, param in zip(shape[2], names)]
+                exprs.append(_render(shape[1], names))
+        source = f" FROM {plan.table} _t" if uses_table else ""
+        lines = []
+        for number, row in enumerate(self.rows, 1):
+            values = [str(number)]
+            for cell in row:
+                if cell.shape != DEFAULT_SHAPE:
+                    values += [copy_text(value) for value in cell.data]
+            lines.append("\t".join(values) + "\n")
+        conflict = f" {plan.conflict_source}" if plan.conflict else ""
+        return (f"DROP TABLE IF EXISTS {STAGING};\n"
+                f"CREATE TEMP TABLE _seed_copy AS SELECT {', '.join(staging)}{source} WITH NO DATA;\n"
+                f"COPY {STAGING} FROM STDIN;\n{''.join(lines)}\\.\n"
+                f"INSERT INTO {plan.target} ({', '.join(targets)})\n"
+                f"SELECT {', '.join(exprs)} FROM {STAGING} ORDER BY _n{conflict};\n"
+                f"DROP TABLE {STAGING};\n")
+
+
+def compile_text(text: str) -> Tuple[str, CopyStats]:
+    """Seed con los INSERT agrupables reemplazados por bloques COPY"""
+    stats = CopyStats()
+    output = []
+    position = 0                    # texto ya copiado a la salida
+    group: Optional[CopyGroup] = None
+    offset = _offsets(text)
+
+    def flush():
+        nonlocal group, position
+        if group is None:
+            return
+        if len(group.rows) < MIN_ROWS:
+            stats.keep("una sola fila", group.statements)
+        else:
+            output.append(text[position:group.start])
+            output.append(group.emit())
+            position = group.end
+            stats.compiled += group.statements
+            stats.rows += len(group.rows)
+            stats.blocks += 1
+        group = None
+
+    for stmt, start, end in iter_statements(text):
+        plan, reason = plan_insert(stmt)
+        if is_word(stmt[0], "INSERT"):
+            stats.inserts += 1
+        if plan is not None and plan.conflict:
+            plan.conflict_source = text[offset(stmt[plan.conflict_at]):end - 1]
+        if plan is None:
+            flush()
+            if reason:
+                stats.keep(reason)
+            continue
+        if group is not None and (plan.columns is None and not _all_literal(plan) or not group.accepts(plan)):
+            flush()
+        if group is None:
+            if plan.columns is None and not _all_literal(plan):
+                stats.keep("sin lista de columnas")
+                continue
+            group = CopyGroup(plan, start)
+            if not group.accepts(plan):
+                group = None
+                stats.keep("columnas con valores de distinto tipo")
+                continue
+        group.add(plan, end)
+    flush()
+    output.append(text[position:])
+    return "".join(output), stats
+
+
+def _all_literal(plan: InsertPlan) -> bool:
+    """Sin lista de columnas solo se puede hacer el COPY directo"""
+    return not plan.conflict and all(cell.shape in (None, UNTYPED) for row in plan.rows for cell in row)
+
+
+def compile_seed(data: bytes, digest: str = "") -> Tuple[bytes, CopyStats]:
+    """Compila un seed conservando su codificación (los seeds en latin-1 siguen en latin-1)"""
+    try:
+        text, encoding = data.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        text, encoding = data.decode("latin-1"), "latin-1"
+    compiled, stats = compile_text(text)
+    header = (f"-- Compilado por scripts/seed_copy.py v{COMPILER_VERSION} (sha256 {digest or '-'}): "
+              f"{stats.compiled} de {stats.inserts} INSERT en {stats.blocks} bloques COPY. No editar.\n")
+    return (header + compiled).encode(encoding), stats
+
+
+def compile_cached(path: Path, digest: str, cache_dir: Optional[Path] = DEFAULT_CACHE_DIR
+                   ) -> Tuple[bytes, CopyStats, bool]:
+    """(salida, estadísticas, vino del cache) de un seed, por sha256"""
+    if cache_dir is not None:
+        cached = cache_dir / f"{digest}.v{COMPILER_VERSION}.sql"
+        meta = cached.with_suffix(".json")
+        if cached.exists() and meta.exists():
+            try:
+                return cached.read_bytes(), CopyStats(**json.loads(meta.read_text())), True
+            except (OSError, ValueError, TypeError):
+                pass
+    output, stats = compile_seed(path.read_bytes(), digest)
+    if cache_dir is not None:
+        _write(cache_dir / f"{digest}.v{COMPILER_VERSION}.sql", output)
+        _write(cache_dir / f"{digest}.v{COMPILER_VERSION}.json", json.dumps(asdict(stats)).encode())
+    return output, stats, False
+
+
+def _write(path: Path, data: bytes) -> bool:
+    """Escritura atómica, solo si el contenido cambió (no toca el mtime de lo que ya está igual)"""
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=path.suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+# CLI
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compila los INSERT de los seeds a bloques COPY ... FROM STDIN")
+    parser.add_argument("paths", nargs="*", type=Path, help="Seeds a compilar (default: todos los del ambiente)")
+    parser.add_argument("--env", action="append", choices=ENVIRONMENTS, help="Ambiente (repetible; default: prod)")
+    parser.add_argument("--seeds", type=Path, default=DEFAULT_SEEDS, help="Directorio seeds/ (default: %(default)s)")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT,
+                        help="Directorio de salida, con la misma estructura que seeds/ (default: %(default)s)")
+    parser.add_argument("--stdout", action="store_true", help="Imprimir la salida de un solo seed")
+    parser.add_argument("--no-cache", action="store_true", help="Compilar aunque el seed esté en el cache")
+    parser.add_argument("--quiet", action="store_true", help="Solo errores")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from seed_manifest import SeedManifest, seed_paths, sha256_file
+    from validate_integrity import Colors, print_section
+
+    args = parse_args(argv)
+    cache_dir = None if args.no_cache else DEFAULT_CACHE_DIR
+
+    if args.stdout:
+        if len(args.paths) != 1:
+            print("--stdout requiere un solo seed", file=sys.stderr)
+            return 2
+        output, _, _ = compile_cached(args.paths[0], sha256_file(args.paths[0]), cache_dir)
+        sys.stdout.buffer.write(output)
+        return 0
+
+    environments = args.env or ["prod"]
+    totals = CopyStats()
+    compiled = written = 0
+    for environment in environments:
+        manifest = SeedManifest(environment, args.seeds)
+        relatives = seed_paths(args.seeds, environment)
+        if args.paths:
+            wanted = {path.resolve() for path in args.paths}
+            relatives = [name for name in relatives if (manifest.root / name).resolve() in wanted]
+        if not args.quiet:
+            print_section(f"SEEDS → COPY: {environment} ({len(relatives)} archivos)")
+        for relative in relatives:
+            output, stats, cached = compile_cached(manifest.root / relative, manifest.digest(relative), cache_dir)
+            compiled += not cached
+            written += _write(args.out / environment / relative, output)
+            totals.inserts += stats.inserts
+            totals.compiled += stats.compiled
+            totals.rows += stats.rows
+            totals.blocks += stats.blocks
+            for reason, count in stats.kept.items():
+                totals.keep(reason, count)
+            if not args.quiet and stats.inserts:
+                kept = sum(stats.kept.values())
+                color = Colors.OKGREEN if not kept else Colors.WARNING
+                detail = f"; {kept} sin compilar ({', '.join(sorted(stats.kept))})" if kept else ""
+                print(f"{color}{relative}: {stats.compiled}/{stats.inserts} INSERT → {stats.blocks} COPY "
+                      f"({stats.rows} filas){detail}{Colors.ENDC}")
+        manifest.save()
+
+    if not args.quiet:
+        print_section("RESUMEN DE COMPILACIÓN")
+        print(f"{totals.compiled} de {totals.inserts} INSERT en {totals.blocks} bloques COPY ({totals.rows} filas); "
+              f"{compiled} seeds compilados, el resto del cache; {written} archivos escritos en {args.out}")
+        for reason, count in sorted(totals.kept.items(), key=lambda item: -item[1]):
+            print(f"  {count} INSERT sin compilar: {reason}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
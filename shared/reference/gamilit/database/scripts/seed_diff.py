@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Diff por filas entre seeds de dos ambientes
+
+Compara dos seeds como datos y no como texto: cada fila de cada
+INSERT ... VALUES se identifica por la tabla y su primary key (del DDL; si no es
+literal, las columnas del ON CONFLICT o la columna id) y se reporta como agregada,
+eliminada o modificada, con las columnas que cambiaron. Espacios,
+comentarios, orden de filas y orden de columnas no cuentan; los JSON/JSONB
+se comparan como estructura (orden de claves y formato no cuentan) y los
+cambios se muestran por ruta (content.options[2].text).
+
+Los archivos se leen en streaming: del primero solo se guardan dos digests
+de 16 bytes por fila (clave y contenido); del segundo, solo las filas
+modificadas, que se detallan por columna en una segunda lectura del primero.
+
+Uso:
+    python3 scripts/seed_diff.py educational_content/04-exercises-module3.sql              # prod → dev
+    python3 scripts/seed_diff.py auth_management/01-tenants.sql --from prod --to staging
+    python3 scripts/seed_diff.py seeds/prod/auth/01-demo-users.sql /tmp/01-demo-users.sql
+Fecha: 2025-11-10
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from seed_parser import (DEFAULT, DEFAULT_SEEDS, ENVIRONMENTS, EXPRESSION, NULL, SeedFile, SeedInsert,
+                         SeedValue, iter_inserts, read_seed)
+
+JSON_TYPES = ("json", "jsonb")
+
+# Expresiones que no sirven de clave: dan un valor distinto en cada fila
+VOLATILE_PATTERN = re.compile(r"\b(gen_random_uuid|uuid_generate_v\w*|random|clock_timestamp)\b")
+
+# Clases de cambio
+ADDED = "agregada"
+REMOVED = "eliminada"
+CHANGED = "modificada"
+
+
+@dataclass
+class ColumnChange:
+    column: str                     # columna, o columna.ruta dentro de un JSON
+    old: object
+    new: object
+
+
+@dataclass
+class RowChange:
+    kind: str
+    table: str
+    key: str                        # primary key para mostrar ("id=…")
+    line: int                       # en el archivo donde está la fila (el nuevo si existe)
+    columns: List[ColumnChange] = field(default_factory=list)
+
+
+@dataclass
+class DiffStats:
+    rows_old: int = 0
+    rows_new: int = 0
+    unchanged: int = 0
+    selects: int = 0                # INSERT ... SELECT (sin filas que comparar)
+
+
+@dataclass
+class SeedRow:
+    table: str
+    key: tuple
+    values: Dict[str, object]       # columna → valor canónico
+    line: int
+
+
+def canonical(value: SeedValue, column_type: Optional[str]) -> object:
+    """Valor comparable: JSON parseado, UUID en minúsculas, expresiones como texto normalizado"""
+    if value.kind == NULL:
+        return None
+    if value.kind == DEFAULT:
+        return ("DEFAULT",)
+    if value.kind == EXPRESSION:
+        return ("expr", value.value)
+    type_text = value.cast or column_type or ""
+    if type_text in JSON_TYPES:
+        try:
+            return json.loads(value.value)
+        except ValueError:
+            return value.value
+    if type_text == "uuid":
+        return value.value.lower()
+    return value.value
+
+
+def _table_columns(schema, insert: SeedInsert):
+    """(tabla calificada, columnas de la tabla con su tipo o None, primary key)"""
+    table = schema.table(insert) if schema is not None else None
+    if table is None:
+        return insert.candidates()[0] if insert.candidates() else insert.table, None, []
+    return table.name, table.columns, table.primary_key
+
+
+def iter_rows(path: Path, file_schema: str, schema=None, stats: DiffStats = None) -> Iterator[SeedRow]:
+    """Filas de VALUES de un seed con su clave, una a la vez"""
+    for insert in iter_inserts(read_seed(path), file_schema):
+        if insert.select:
+            if stats is not None:
+                stats.selects += 1
+            continue
+        name, columns, primary_key = _table_columns(schema, insert)
+        names = insert.columns
+        if names is None:
+            names = list(columns) if columns else []
+        for row in insert.rows:
+            values = {}
+            for position, value in enumerate(row):
+                column = names[position] if position < len(names) else f"${position + 1}"
+                column_type = columns[column].type if columns and column in columns else None
+                values[column] = canonical(value, column_type)
+            key = _row_key(values, (primary_key, insert.conflict_columns, ["id"]))
+            yield SeedRow(name, key, values, row[0].line if row else insert.line)
+
+
+def _stable(part) -> bool:
+    """Parte de clave que identifica la fila: literal o expresión determinista (mod_id de un bloque DO)"""
+    if part is None or part == ("DEFAULT",):
+        return False
+    return not (isinstance(part, tuple) and VOLATILE_PATTERN.search(part[1]))
+
+
+def _row_key(values: Dict[str, object], candidates) -> tuple:
+    """Primera clave candidata (primary key, columnas del ON CONFLICT, id) con todos sus valores estables"""
+    for columns in candidates:
+        key = tuple(values.get(column) for column in columns)
+        if key and all(_stable(part) for part in key):
+            return tuple(zip(columns, key))
+    # Sin clave estable (gen_random_uuid(), sin columna id...): la fila completa es la clave
+    return (("fila", _digest(values).hex()),)
+
+
+def _row_id(row: SeedRow) -> bytes:
+    """Digest de tabla + clave: lo que se guarda por fila en vez de la clave completa"""
+    text = json.dumps([row.table, row.key], separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def _digest(values: Dict[str, object]) -> bytes:
+    text = json.dumps(sorted(values.items()), sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+                      default=str)
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def display_key(key: tuple) -> str:
+    if key and key[0][0] == "fila":
+        return "(sin clave)"
+    return ", ".join(f"{column}={_show(value, 60)}" for column, value in key)
+
+
+def json_changes(old, new, path: str) -> Iterator[ColumnChange]:
+    """Diferencias entre dos JSON por ruta (dicts por clave, listas por posición)"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        for name in list(old) + [name for name in new if name not in old]:
+            yield from json_changes(old.get(name, _MISSING), new.get(name, _MISSING), f"{path}.{name}")
+    elif isinstance(old, list) and isinstance(new, list):
+        for position in range(max(len(old), len(new))):
+            yield from json_changes(old[position] if position < len(old) else _MISSING,
+                                    new[position] if position < len(new) else _MISSING, f"{path}[{position}]")
+    elif old != new or type(old) is not type(new):
+        yield ColumnChange(path, old, new)
+
+
+class _Missing:
+    def __repr__(self):
+        return "(no existe)"
+
+
+_MISSING = _Missing()
+
+# Marca en el índice de una fila del archivo viejo que ya apareció en el nuevo
+_MATCHED = b""
+
+
+def row_changes(old: Dict[str, object], new: Dict[str, object]) -> List[ColumnChange]:
+    changes = []
+    for column in list(old) + [column for column in new if column not in old]:
+        before, after = old.get(column, _MISSING), new.get(column, _MISSING)
+        if isinstance(before, (dict, list)) and isinstance(after, (dict, list)):
+            changes.extend(json_changes(before, after, column))
+        elif before != after:
+            changes.append(ColumnChange(column, before, after))
+    return changes
+
+
+def diff_seeds(old_path: Path, new_path: Path, old_schema: str, new_schema: Optional[str] = None,
+               schema=None) -> Tuple[List[RowChange], DiffStats]:
+    """Filas agregadas, eliminadas y modificadas de old_path a new_path"""
+    stats = DiffStats()
+    new_schema = new_schema or old_schema
+
+    # 1. Del archivo viejo solo se guardan dos digests de 16 bytes por fila: clave → contenido
+    index: Dict[bytes, bytes] = {}
+    for row in iter_rows(old_path, old_schema, schema, stats):
+        stats.rows_old += 1
+        index[_row_id(row)] = _digest(row.values)
+
+    # 2. Archivo nuevo: las filas modificadas se guardan para detallarlas
+    changes = []
+    modified: Dict[bytes, SeedRow] = {}
+    for row in iter_rows(new_path, new_schema, schema, stats):
+        stats.rows_new += 1
+        row_id = _row_id(row)
+        digest = index.get(row_id)
+        if digest is None:
+            changes.append(RowChange(ADDED, row.table, display_key(row.key), row.line))
+            continue
+        if digest == _digest(row.values):
+            stats.unchanged += 1
+        elif digest != _MATCHED:
+            modified[row_id] = row
+        index[row_id] = _MATCHED
+
+    # 3. Segunda lectura del archivo viejo: filas eliminadas y columnas de las modificadas
+    if modified or any(digest != _MATCHED for digest in index.values()):
+        for row in iter_rows(old_path, old_schema, schema):
+            row_id = _row_id(row)
+            new_row = modified.pop(row_id, None)
+            if new_row is not None:
+                changes.append(RowChange(CHANGED, row.table, display_key(row.key), new_row.line,
+                                         row_changes(row.values, new_row.values)))
+            elif index.get(row_id, _MATCHED) != _MATCHED:
+                changes.append(RowChange(REMOVED, row.table, display_key(row.key), row.line))
+                index[row_id] = _MATCHED
+
+    changes.sort(key=lambda change: (change.table, change.line))
+    return changes, stats
+
+
+def summary(changes: List[RowChange]) -> str:
+    counts = {kind: 0 for kind in (ADDED, REMOVED, CHANGED)}
+    for change in changes:
+        counts[change.kind] += 1
+    return ", ".join(f"{count} {kind}s" for kind, count in counts.items())
+
+
+def _show(value, width: int = 100) -> str:
+    if value is None:
+        text = "NULL"
+    elif isinstance(value, tuple):
+        text = value[-1] if value[0] == "expr" else value[0]
+    elif isinstance(value, (dict, list)):
+        text = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, str):
+        text = "'" + value.replace("'", "''") + "'"
+    else:
+        text = repr(value)
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def print_changes(changes: List[RowChange], limit: int):
+    from validate_integrity import Colors
+
+    symbols = {ADDED: (Colors.OKGREEN, "+"), REMOVED: (Colors.FAIL, "-"), CHANGED: (Colors.WARNING, "~")}
+    table = None
+    for number, change in enumerate(changes):
+        if limit and number >= limit:
+            print(f"\n... {len(changes) - limit} filas más (usar --limit 0 para verlas todas)")
+            break
+        if change.table != table:
+            table = change.table
+            print(f"\n{Colors.BOLD}{table}{Colors.ENDC}")
+        color, symbol = symbols[change.kind]
+        print(f"{color}{symbol} {change.key}{Colors.ENDC}  (línea {change.line})")
+        for column in change.columns:
+            print(f"    {column.column}: {_show(column.old)} → {_show(column.new)}")
+
+
+# CLI
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Diff por filas entre seeds de dos ambientes")
+    parser.add_argument("paths", nargs="+",
+                        help="Ruta relativa a seeds/<ambiente>/, o dos archivos a comparar")
+    parser.add_argument("--from", dest="source", default="prod", choices=ENVIRONMENTS,
+                        help="Ambiente de referencia (default: %(default)s)")
+    parser.add_argument("--to", dest="target", default="dev", choices=ENVIRONMENTS,
+                        help="Ambiente a comparar (default: %(default)s)")
+    parser.add_argument("--seeds", type=Path, default=DEFAULT_SEEDS, help="Directorio seeds/ (default: %(default)s)")
+    parser.add_argument("--ddl", type=Path, help="Directorio ddl/ (default: el de validate_integrity.py)")
+    parser.add_argument("--no-ddl", action="store_true",
+                        help="No leer el DDL: las filas se identifican por la columna id")
+    parser.add_argument("--limit", type=int, default=200, help="Filas a mostrar (0 = todas, default: %(default)s)")
+    args = parser.parse_args(argv)
+    if len(args.paths) > 2:
+        parser.error("se esperaba una ruta relativa o dos archivos")
+    return args
+
+
+def load_schema(ddl_path: Optional[Path] = None):
+    """Tablas del DDL (con su primary key y tipos de columnas) usando el cache de validate_integrity"""
+    from ddl_cache import DEFAULT_CACHE_FILE, FactsCache
+    from ddl_corpus import load_corpus
+    from ddl_graph import build_graph
+    from validate_integrity import BASE_PATH
+    from validate_seeds import build_schema
+
+    cache = FactsCache(DEFAULT_CACHE_FILE)
+    corpus = load_corpus(ddl_path or BASE_PATH, cache=cache)
+    cache.save()
+    return build_schema(corpus, build_graph(corpus))
+
+
+def main(argv=None):
+    from validate_integrity import print_error, print_ok, print_section
+
+    args = parse_args(argv)
+    if len(args.paths) == 2:
+        old_path, new_path = (Path(path) for path in args.paths)
+        old_schema, new_schema = old_path.parent.name, new_path.parent.name
+    else:
+        relative = args.paths[0]
+        old_file = SeedFile(args.seeds / args.source / relative, args.source)
+        new_file = SeedFile(args.seeds / args.target / relative, args.target)
+        old_path, new_path = old_file.path, new_file.path
+        old_schema, new_schema = old_file.schema, new_file.schema
+    for path in (old_path, new_path):
+        if not path.is_file():
+            print_error("CRÍTICO", f"No existe: {path}")
+            return 2
+
+    schema = None if args.no_ddl else load_schema(args.ddl)
+    changes, stats = diff_seeds(old_path, new_path, old_schema, new_schema, schema)
+
+    print_section(f"DIFF DE SEEDS: {old_path} → {new_path}")
+    print(f"{stats.rows_old} filas → {stats.rows_new} filas, {stats.unchanged} iguales")
+    if stats.selects:
+        print(f"{stats.selects} INSERT ... SELECT sin comparar (las filas salen de una consulta)")
+    if not changes:
+        print_ok("Los seeds tienen las mismas filas")
+        return 0
+    print_changes(changes, args.limit)
+    print(f"\n{summary(changes)}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Manifiestos SHA-256 de los seeds por ambiente
+
+Cada ambiente (seeds/prod, seeds/dev, seeds/staging) tiene un manifiesto en
+scripts/.cache/ con, por archivo, su tamaño, mtime_ns y sha256. Un archivo
+cuyo tamaño y mtime_ns coinciden con los del manifiesto no se vuelve a leer
+(como el índice de git, los archivos modificados después de escribir el
+manifiesto se re-hashean siempre). El manifiesto guarda además el hash de
+PROD con el que se sincronizó cada archivo, para distinguir una copia que
+quedó desactualizada de un archivo editado a propósito en el ambiente.
+
+Lo usan sync-prod-dev.py y verify-unification.py.
+Fecha: 2025-11-10
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from seed_parser import DEFAULT_SEEDS, ENVIRONMENTS
+
+DEFAULT_MANIFEST_DIR = Path(__file__).resolve().parent / ".cache"
+MANIFEST_VERSION = 1
+SOURCE_ENVIRONMENT = "prod"
+CHUNK_SIZE = 1 << 20
+
+# Seeds que deben ser idénticos en PROD y en los demás ambientes (los que
+# sincronizaba y comparaba la versión original de sync-prod-dev.py y
+# verify-unification.py): se crean si faltan, sin historial en el manifiesto se
+# actualizan como copias desactualizadas y verify-unification.py falla si faltan
+UNIFIED_SEEDS = (
+    "educational_content/01-modules.sql",
+    "educational_content/02-exercises-module1.sql",
+    "educational_content/03-exercises-module2.sql",
+    "educational_content/04-exercises-module3.sql",
+    "educational_content/05-exercises-module4.sql",
+    "educational_content/06-exercises-module5.sql",
+    "educational_content/07-assessment-rubrics.sql",
+    "educational_content/08-difficulty_criteria.sql",
+    "educational_content/09-exercise_mechanic_mapping.sql",
+    "gamification_system/01-achievement_categories.sql",
+    "gamification_system/02-leaderboard_metadata.sql",
+    "gamification_system/03-maya_ranks.sql",
+    "gamification_system/04-achievements.sql",
+    "auth/01-demo-users.sql",
+)
+# Seeds con datos reales de producción (usuarios, tenants) o retirados: nunca se copian a otro ambiente
+PRODUCTION_ONLY = re.compile(r"production|deprecated", re.IGNORECASE)
+
+
+@dataclass
+class ManifestEntry:
+    size: int
+    mtime_ns: int
+    sha256: str
+    synced_from: Optional[str] = None   # sha256 de PROD copiado por la última sincronización
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SeedManifest:
+    """sha256 de los archivos de un ambiente, reutilizado mientras no cambien tamaño ni mtime"""
+
+    def __init__(self, environment: str, seeds_path: Path = DEFAULT_SEEDS,
+                 manifest_dir: Optional[Path] = DEFAULT_MANIFEST_DIR):
+        self.environment = environment
+        self.root = Path(seeds_path) / environment
+        self.path = Path(manifest_dir) / f"seeds-{environment}.json" if manifest_dir else None
+        self.entries: Dict[str, ManifestEntry] = {}
+        self.written_ns = 0
+        self.hashed = 0                 # archivos leídos en esta ejecución
+        self._lock = threading.Lock()
+
+        if self.path is not None and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == MANIFEST_VERSION:
+                self.written_ns = data.get("written_ns", 0)
+                self.entries = {name: ManifestEntry(**entry) for name, entry in data.get("files", {}).items()}
+
+    def entry(self, relative: str) -> Optional[ManifestEntry]:
+        """Entrada vigente del archivo (re-hashea si cambió; None si no existe)"""
+        path = self.root / relative
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            with self._lock:
+                self.entries.pop(relative, None)
+            return None
+        with self._lock:
+            entry = self.entries.get(relative)
+        if (entry is not None and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns
+                and stat.st_mtime_ns < self.written_ns):
+            return entry
+        digest = sha256_file(path)
+        synced_from = entry.synced_from if entry is not None else None
+        entry = ManifestEntry(stat.st_size, stat.st_mtime_ns, digest, synced_from)
+        with self._lock:
+            self.entries[relative] = entry
+            self.hashed += 1
+        return entry
+
+    def digest(self, relative: str) -> Optional[str]:
+        entry = self.entry(relative)
+        return entry.sha256 if entry is not None else None
+
+    def mark_synced(self, relative: str, source_digest: str):
+        """Registra que el archivo es una copia de PROD con ese hash"""
+        entry = self.entry(relative)
+        if entry is not None:
+            entry.synced_from = source_digest
+
+    def save(self):
+        """Escribe el manifiesto de forma atómica"""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "written_ns": time.time_ns(),
+            "files": {name: asdict(self.entries[name]) for name in sorted(self.entries)},
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".tmp-", suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+@dataclass(frozen=True)
+class SeedPair:
+    """Un archivo de PROD y su contraparte (misma ruta relativa) en otro ambiente"""
+    relative: str
+    target: str                     # ambiente de la contraparte
+    in_source: bool
+    in_target: bool
+
+
+def seed_paths(seeds_path: Path, environment: str) -> List[str]:
+    """Rutas relativas de los .sql del ambiente, sin los directorios _deprecated/, _backlog/..."""
+    root = Path(seeds_path) / environment
+    names = []
+    for path in sorted(root.rglob("*.sql")):
+        relative = path.relative_to(root)
+        if not any(part.startswith("_") for part in relative.parts[:-1]):
+            names.append(relative.as_posix())
+    return names
+
+
+def production_only(relative: str) -> bool:
+    """True si el seed de PROD no debe existir en otro ambiente"""
+    return PRODUCTION_ONLY.search(Path(relative).name) is not None
+
+
+def discover_pairs(seeds_path: Path = DEFAULT_SEEDS, targets: Iterable[str] = None,
+                   source: str = SOURCE_ENVIRONMENT) -> List[SeedPair]:
+    """Cada archivo de PROD con su contraparte en cada ambiente, y los que solo existen en el ambiente"""
+    targets = [env for env in (targets or ENVIRONMENTS) if env != source]
+    source_names = seed_paths(seeds_path, source)
+    pairs = []
+    for target in targets:
+        target_names = set(seed_paths(seeds_path, target))
+        for name in source_names:
+            pairs.append(SeedPair(name, target, True, name in target_names))
+        for name in sorted(target_names - set(source_names)):
+            pairs.append(SeedPair(name, target, False, True))
+    return pairs
+
+
+def atomic_copy(source: Path, target: Path):
+    """Copia con archivo temporal + rename: el destino nunca queda a medio escribir"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=".tmp-", suffix=target.suffix)
+    try:
+        with os.fdopen(fd, "wb") as out, open(source, "rb") as f:
+            shutil.copyfileobj(f, out, CHUNK_SIZE)
+        shutil.copymode(source, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Lectura de los seeds de GAMILIT (seeds/{dev,staging,prod}/**/*.sql)
+
+Recorre los INSERT de cada archivo sentencia por sentencia (el tokenizador y
+split_statements son generadores: un archivo nunca se materializa como lista
+de sentencias) y entrega, por INSERT, la tabla calificada según el
+`SET search_path` vigente, la lista de columnas, las filas de VALUES con cada
+valor clasificado (literal, cast, NULL, DEFAULT o expresión) y el ON CONFLICT.
+Los INSERT dentro de bloques DO se leen igual que los de nivel superior.
+
+Lo usan validate_seeds.py y los demás análisis de seeds.
+Fecha: 2025-11-10
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from ddl_corpus import qualify
+from sql_lexer import (DOLLAR, IDENT, NUMBER, QIDENT, STRING, Token, expand, is_op, is_word, matching_paren,
+                       read_name, split_statements, split_top_level, sql_text, tokenize)
+
+# seeds/ del repositorio (hermano de scripts/)
+DEFAULT_SEEDS = Path(__file__).resolve().parent.parent / "seeds"
+
+ENVIRONMENTS = ("dev", "staging", "prod")
+
+# Clases de valor
+LITERAL = "literal"      # 'texto' o número, con o sin ::tipo
+NULL = "null"
+DEFAULT = "default"
+EXPRESSION = "expr"      # llamadas, subconsultas, operaciones...
+
+
+@dataclass
+class SeedValue:
+    """Un valor de una fila de VALUES"""
+    kind: str
+    value: Optional[str] = None     # contenido del literal (sin comillas) o texto normalizado de la expresión
+    cast: Optional[str] = None      # tipo del ::cast final, en minúsculas
+    line: int = 0
+    quoted: bool = False            # literal de texto ('...') y no numérico
+
+
+@dataclass
+class SeedInsert:
+    """Un INSERT de un seed"""
+    table: str                              # como está escrito (en minúsculas)
+    search_path: Tuple[str, ...]            # vigente en el INSERT
+    columns: Optional[List[str]]            # None: sin lista de columnas (orden de la tabla)
+    rows: List[List[SeedValue]]             # vacío si los datos vienen de un SELECT
+    line: int
+    select: bool = False                    # INSERT ... SELECT
+    conflict_columns: List[str] = field(default_factory=list)
+    conflict_action: Optional[str] = None   # "nothing" o "update"
+
+    def candidates(self) -> List[str]:
+        """Nombres calificados posibles de la tabla, en orden del search_path"""
+        if "." in self.table:
+            return [self.table]
+        return [qualify(self.table, schema) for schema in self.search_path]
+
+
+@dataclass(frozen=True)
+class SeedFile:
+    path: Path
+    environment: str
+
+    @property
+    def schema(self) -> str:
+        """Schema por defecto: el directorio seeds/<env>/<schema>/ (auth/ → auth)"""
+        parts = self.path.parts
+        index = parts.index(self.environment)
+        return parts[index + 1] if len(parts) > index + 2 else "public"
+
+
+def seed_files(seeds_path: Path = DEFAULT_SEEDS, environments=ENVIRONMENTS) -> List[SeedFile]:
+    """Archivos .sql de cada ambiente, en orden de path, sin los directorios _deprecated/, _backlog/..."""
+    files = []
+    for environment in environments:
+        root = Path(seeds_path) / environment
+        for path in sorted(root.rglob("*.sql")):
+            if not any(part.startswith("_") for part in path.relative_to(root).parts[:-1]):
+                files.append(SeedFile(path, environment))
+    return files
+
+
+def read_seed(path: Path) -> str:
+    """Contenido de un seed (algunos están en latin-1: los bytes inválidos se reemplazan)"""
+    return path.read_bytes().decode("utf-8", errors="replace").replace("\r\n", "\n")
+
+
+def cast_index(tokens: List[Token]) -> Optional[int]:
+    """Índice del `::` final si lo que sigue es solo un nombre de tipo (schema.tipo, tipo[], varchar(20))"""
+    for k in range(len(tokens) - 1, 0, -1):
+        token = tokens[k]
+        if is_op(token, "::"):
+            return k if k + 1 < len(tokens) else None
+        if token.kind not in (IDENT, QIDENT, NUMBER) and not is_op(token, ".", "[", "]", "(", ")", ","):
+            return None
+    return None
+
+
+def classify_value(tokens: List[Token]) -> SeedValue:
+    """Clasifica la expresión de un valor: 'x', 'x'::tipo, -1, NULL, DEFAULT o expresión"""
+    line = tokens[0].line if tokens else 0
+    cast = None
+    start = cast_index(tokens)
+    if start is not None:
+        cast = "".join(token.value for token in tokens[start + 1:]).lower()
+        tokens = tokens[:start]
+    if len(tokens) == 1:
+        token = tokens[0]
+        if token.kind == STRING or token.kind == DOLLAR:
+            return SeedValue(LITERAL, token.value, cast, line, quoted=True)
+        if token.kind == NUMBER:
+            return SeedValue(LITERAL, token.value, cast, line)
+        if is_word(token, "NULL"):
+            return SeedValue(NULL, None, cast, line)
+        if is_word(token, "DEFAULT"):
+            return SeedValue(DEFAULT, None, None, line)
+        if is_word(token, "TRUE", "FALSE"):
+            return SeedValue(LITERAL, token.value.lower(), cast, line)
+    if len(tokens) == 2 and is_op(tokens[0], "-", "+") and tokens[1].kind == NUMBER:
+        return SeedValue(LITERAL, tokens[0].value.replace("+", "") + tokens[1].value, cast, line)
+    return SeedValue(EXPRESSION, sql_text(tokens), cast, line)
+
+
+def _columns(tokens: List[Token]) -> Optional[List[str]]:
+    """Lista de columnas en minúsculas (None si alguna parte no es un nombre, p. ej. `(a, 1)`)"""
+    columns = []
+    for part in split_top_level(tokens):
+        name, _ = read_name(part, 0)
+        if name is None:
+            return None
+        columns.append(name.lower())
+    return columns
+
+
+def parse_insert(stmt: List[Token], search_path: List[str]) -> Optional[SeedInsert]:
+    """SeedInsert de una sentencia INSERT INTO (None si no lo es o no se puede leer)"""
+    if len(stmt) < 3 or not is_word(stmt[0], "INSERT") or not is_word(stmt[1], "INTO"):
+        return None
+    name, j = read_name(stmt, 2)
+    if not name:
+        return None
+    insert = SeedInsert(name.lower(), tuple(search_path), None, [], stmt[0].line)
+    if j < len(stmt) and is_word(stmt[j], "AS"):
+        j += 2
+    if j < len(stmt) and is_op(stmt[j], "("):
+        close = matching_paren(stmt, j)
+        insert.columns = _columns(stmt[j + 1:close])
+        if insert.columns is None:
+            return None
+        j = close + 1
+    if j < len(stmt) and is_word(stmt[j], "OVERRIDING"):
+        j += 3
+
+    if j < len(stmt) and is_word(stmt[j], "VALUES"):
+        j += 1
+        while j < len(stmt) and is_op(stmt[j], "("):
+            close = matching_paren(stmt, j)
+            insert.rows.append([classify_value(part) for part in split_top_level(stmt[j + 1:close])])
+            j = close + 1
+            if j < len(stmt) and is_op(stmt[j], ","):
+                j += 1
+    elif j < len(stmt) and is_word(stmt[j], "SELECT", "WITH", "TABLE"):
+        insert.select = True
+    elif j + 1 < len(stmt) and is_word(stmt[j], "DEFAULT") and is_word(stmt[j + 1], "VALUES"):
+        insert.rows.append([])
+
+    for k in range(j, len(stmt) - 1):
+        if is_word(stmt[k], "ON") and is_word(stmt[k + 1], "CONFLICT"):
+            k += 2
+            if k < len(stmt) and is_op(stmt[k], "("):
+                insert.conflict_columns = _columns(stmt[k + 1:matching_paren(stmt, k)]) or []
+            for m in range(k, len(stmt) - 1):
+                if is_word(stmt[m], "DO"):
+                    insert.conflict_action = "nothing" if is_word(stmt[m + 1], "NOTHING") else "update"
+                    break
+            break
+    return insert
+
+
+def iter_inserts(content: str, schema: str = "public") -> Iterator[SeedInsert]:
+    """INSERTs de un seed en orden, siguiendo los SET search_path (y los de bloques DO)"""
+    search_path = [schema]
+
+    def walk(tokens):
+        nonlocal search_path
+        for stmt in split_statements(tokens):
+            head = stmt[0]
+            if is_word(head, "SET") and len(stmt) > 1 and is_word(stmt[1], "SEARCH_PATH"):
+                search_path = [t.value.lower() for t in stmt[2:] if t.kind in (IDENT, QIDENT)
+                               and not is_word(t, "TO")] or search_path
+            elif is_word(head, "INSERT"):
+                insert = parse_insert(stmt, search_path)
+                if insert is not None:
+                    yield insert
+            elif is_word(head, "DO"):
+                for token in stmt:
+                    if token.kind == DOLLAR:
+                        yield from walk(_body(token))
+
+    yield from walk(tokenize(content))
+
+
+def _body(token: Token) -> Iterator[Token]:
+    """Sentencias de un bloque DO sin el BEGIN/DECLARE que abre cada una"""
+    for stmt in split_statements(expand(token)):
+        start = 0
+        while start < len(stmt) and is_word(stmt[start], "BEGIN", "DECLARE", "THEN", "ELSE", "LOOP"):
+            start += 1
+        yield from stmt[start:]
+        yield Token("OP", ";", stmt[-1].line, stmt[-1].col, None)
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Integridad referencial de los seeds de GAMILIT, sin base de datos
+
+Los seeds se refieren unos a otros por UUIDs fijos: las filas de
+ml_coins_transactions usan los ids de auth/01-demo-users.sql y
+auth_management/03-profiles.sql (las "Dependencies" del encabezado de cada
+archivo). Por ambiente, este script construye un índice en memoria de las
+claves insertadas en cada columna referenciada por un FK del DDL
+(clave → archivo y línea) y resuelve contra él cada valor de FK de los seeds.
+
+El índice es compacto: los UUIDs se guardan como claves de 16 bytes
+(uuid.UUID(...).bytes), el resto de las claves como sus bytes UTF-8, y la
+ubicación como un solo entero (número de archivo y línea). Los archivos se
+leen un INSERT a la vez y se recorren en paralelo con -j; cada worker
+devuelve solo las claves y referencias de su archivo.
+
+Un valor de FK que no aparece en el índice es CRÍTICO (el INSERT fallaría),
+salvo que la tabla referenciada tenga filas cuya clave no es un literal
+(gen_random_uuid(), variables de un bloque DO, INSERT ... SELECT): en ese
+caso no se puede descartar y se reporta como MEDIO.
+
+Uso:
+    python3 scripts/seed_references.py                  # todos los ambientes
+    python3 scripts/seed_references.py --env prod -j 0
+Fecha: 2025-11-10
+"""
+
+import argparse
+import os
+import sys
+import uuid
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from ddl_corpus import DDLCorpus
+from ddl_graph import DDLGraph, search_path_of
+from seed_parser import DEFAULT_SEEDS, ENVIRONMENTS, LITERAL, NULL, SeedFile, iter_inserts, read_seed, seed_files
+from validate_seeds import SeedSchema, build_schema
+
+# Ubicación empaquetada en un entero: número de archivo << LINE_BITS | línea
+LINE_BITS = 32
+LINE_MASK = (1 << LINE_BITS) - 1
+
+
+@dataclass(frozen=True)
+class SeedForeignKey:
+    table: str
+    columns: Tuple[str, ...]
+    ref_table: str
+    ref_columns: Tuple[str, ...]
+    types: Tuple[str, ...]          # tipos de las columnas del FK (deciden la codificación de la clave)
+
+    def __str__(self):
+        return f"{self.table}({', '.join(self.columns)}) → {self.ref_table}({', '.join(self.ref_columns)})"
+
+
+@dataclass
+class ReferenceMap:
+    """FKs del DDL por tabla y columnas que hay que indexar por tabla"""
+    schema: SeedSchema
+    foreign_keys: Dict[str, List[SeedForeignKey]] = field(default_factory=dict)
+    targets: Dict[str, Set[Tuple[str, ...]]] = field(default_factory=dict)
+
+    def add(self, fk: SeedForeignKey):
+        self.foreign_keys.setdefault(fk.table, []).append(fk)
+        self.targets.setdefault(fk.ref_table, set()).add(fk.ref_columns)
+
+
+def build_reference_map(corpus: DDLCorpus, graph: DDLGraph, schema: Optional[SeedSchema] = None) -> ReferenceMap:
+    """FKs del build con la tabla referenciada resuelta (sin columnas explícitas: la PK)"""
+    references = ReferenceMap(schema or build_schema(corpus, graph))
+    primary_keys = {}
+    for sql_file in corpus.files:
+        if sql_file.live:
+            for table, columns, kind, _ in sql_file.facts["keys"]:
+                if kind == "primary":
+                    node_id = graph.resolve(table, ("table",), search_path_of(sql_file))
+                    if node_id is not None:
+                        primary_keys[graph.nodes[node_id].name] = tuple(columns)
+
+    for sql_file in corpus.files:
+        if not sql_file.live:
+            continue
+        search_path = search_path_of(sql_file)
+        for table, columns, ref, ref_columns, *_ in sql_file.facts["foreign_keys"]:
+            source = graph.resolve(table, ("table",), search_path)
+            target = graph.resolve(ref, ("table",), search_path)
+            if source is None or target is None:
+                continue
+            table, ref_table = graph.nodes[source].name, graph.nodes[target].name
+            ref_columns = tuple(ref_columns) or primary_keys.get(ref_table, ())
+            seed_table = references.schema.tables.get(table)
+            if len(ref_columns) == len(columns) and seed_table is not None:
+                types = tuple(seed_table.columns[c].type if c in seed_table.columns else "" for c in columns)
+                references.add(SeedForeignKey(table, tuple(columns), ref_table, ref_columns, types))
+    return references
+
+
+def _key(value, column_type: str) -> Optional[bytes]:
+    """Clave de índice de un valor (None si no es un literal: no se puede resolver offline)"""
+    if value.kind != LITERAL:
+        return None
+    if column_type == "uuid":
+        try:
+            return uuid.UUID(value.value).bytes
+        except ValueError:
+            return None     # uuid inválido: lo reporta validate_seeds.py
+    text = value.value
+    if not value.quoted and text.lstrip("-").isdigit():
+        text = str(int(text))
+    return text.encode()
+
+
+def _composite(values, types) -> Optional[bytes]:
+    keys = [_key(value, type_) for value, type_ in zip(values, types)]
+    if any(key is None for key in keys):
+        return None
+    return keys[0] if len(keys) == 1 else b"".join(len(key).to_bytes(4, "big") + key for key in keys)
+
+
+def display_key(key: bytes, types: Tuple[str, ...]) -> str:
+    """Texto de una clave del índice codificada según los tipos de sus columnas"""
+    parts = [key]
+    if len(types) > 1:
+        parts, pos = [], 0
+        while pos < len(key):
+            size = int.from_bytes(key[pos:pos + 4], "big")
+            parts.append(key[pos + 4:pos + 4 + size])
+            pos += 4 + size
+    return ", ".join(str(uuid.UUID(bytes=part)) if type_ == "uuid" else part.decode(errors="replace")
+                     for part, type_ in zip(parts, types))
+
+
+class KeyList:
+    """Claves con su línea: una lista de bytes y un array de enteros, sin una tupla por fila"""
+    __slots__ = ("keys", "lines")
+
+    def __init__(self):
+        self.keys: List[bytes] = []
+        self.lines = array("I")
+
+    def append(self, key: bytes, line: int):
+        self.keys.append(key)
+        self.lines.append(line)
+
+    def __iter__(self):
+        return zip(self.keys, self.lines)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getstate__(self):
+        return self.keys, self.lines
+
+    def __setstate__(self, state):
+        self.keys, self.lines = state
+
+
+@dataclass
+class FileKeys:
+    """Claves y referencias de un archivo de seeds"""
+    keys: Dict[Tuple[str, Tuple[str, ...]], KeyList] = field(default_factory=dict)   # (tabla, columnas) → claves
+    refs: Dict[SeedForeignKey, KeyList] = field(default_factory=dict)                # FK → valores referenciados
+    opaque: Set[Tuple[str, Tuple[str, ...]]] = field(default_factory=set)  # columnas con claves no literales
+    unchecked: int = 0              # valores de FK que no son literales
+
+
+# Mapa de FKs en cada worker (se envía una vez por proceso, no por archivo)
+_REFERENCES: Optional[ReferenceMap] = None
+
+
+def _init_worker(references: ReferenceMap):
+    global _REFERENCES
+    _REFERENCES = references
+
+
+def scan_file(seed_file: SeedFile) -> FileKeys:
+    references = _REFERENCES
+    found = FileKeys()
+    for insert in iter_inserts(read_seed(seed_file.path), seed_file.schema):
+        table = references.schema.table(insert)
+        if table is None:
+            continue
+        targets = references.targets.get(table.name, ())
+        foreign_keys = references.foreign_keys.get(table.name, ())
+        if insert.select:
+            found.opaque.update((table.name, columns) for columns in targets)
+            continue
+        columns = insert.columns if insert.columns is not None else list(table.columns)
+        position = {name: k for k, name in enumerate(columns)}
+        types = {name: column.type for name, column in table.columns.items()}
+        for key_columns in targets:
+            if not all(name in position for name in key_columns):
+                found.opaque.add((table.name, key_columns))     # clave por DEFAULT (gen_random_uuid()...)
+        for row in insert.rows:
+            if len(row) != len(columns):
+                continue    # lo reporta validate_seeds.py
+            line = row[0].line if row else insert.line
+            for key_columns in targets:
+                if all(name in position for name in key_columns):
+                    key = _composite([row[position[name]] for name in key_columns],
+                                     [types.get(name, "") for name in key_columns])
+                    if key is None:
+                        found.opaque.add((table.name, key_columns))
+                    else:
+                        found.keys.setdefault((table.name, key_columns), KeyList()).append(key, line)
+            for fk in foreign_keys:
+                if not all(name in position for name in fk.columns):
+                    continue
+                values = [row[position[name]] for name in fk.columns]
+                if any(value.kind == NULL for value in values):
+                    continue
+                key = _composite(values, fk.types)
+                if key is None:
+                    found.unchecked += 1
+                else:
+                    found.refs.setdefault(fk, KeyList()).append(key, values[0].line)
+    return found
+
+
+@dataclass
+class SeedIndex:
+    """Claves insertadas por los seeds de un ambiente en cada (tabla, columnas) referenciada"""
+    environment: str
+    files: List[str] = field(default_factory=list)
+    keys: Dict[Tuple[str, Tuple[str, ...]], Dict[bytes, int]] = field(default_factory=dict)
+    opaque: Set[Tuple[str, Tuple[str, ...]]] = field(default_factory=set)
+    checked: int = 0
+    unchecked: int = 0
+
+    def add(self, file_keys: FileKeys, path: str):
+        file_number = len(self.files)
+        self.files.append(path)
+        for target, key_list in file_keys.keys.items():
+            keys = self.keys.setdefault(target, {})
+            for key, line in key_list:
+                keys.setdefault(key, file_number << LINE_BITS | line)
+        self.opaque |= file_keys.opaque
+        self.unchecked += file_keys.unchecked
+
+    def locate(self, table: str, columns: Tuple[str, ...], key: bytes) -> Optional[Tuple[str, int]]:
+        """(archivo, línea) del INSERT que creó la clave, o None"""
+        packed = self.keys.get((table, columns), {}).get(key)
+        if packed is None:
+            return None
+        return self.files[packed >> LINE_BITS], packed & LINE_MASK
+
+    @property
+    def size(self) -> int:
+        return sum(len(keys) for keys in self.keys.values())
+
+
+def _issue(severity, path, line, fk: SeedForeignKey, message):
+    return {"severity": severity, "type": "SEED_DANGLING_REFERENCE", "file": path, "line": line,
+            "object": f"{fk.table}.{fk.columns[0]}", "message": message}
+
+
+def resolve_references(index: SeedIndex, refs_by_file: List[Tuple[str, FileKeys]]) -> List[dict]:
+    """Referencias sin fila en el índice; una por (archivo, FK, valor) con el número de filas"""
+    found = {}
+    counts = Counter()
+    for path, file_keys in refs_by_file:
+        for fk, key_list in file_keys.refs.items():
+            keys = index.keys.get((fk.ref_table, fk.ref_columns), {})
+            opaque = (fk.ref_table, fk.ref_columns) in index.opaque
+            index.checked += len(key_list)
+            for key, line in key_list:
+                if key in keys:
+                    continue
+                issue_key = (path, fk, key)
+                counts[issue_key] += 1
+                if issue_key in found:
+                    continue
+                note = f" ({fk.ref_table} tiene filas con claves no literales en estos seeds)" if opaque else ""
+                found[issue_key] = _issue(
+                    "MEDIO" if opaque else "CRÍTICO", path, line, fk,
+                    f"{fk.table}.{', '.join(fk.columns)} = '{display_key(key, fk.types)}' no existe en "
+                    f"{fk.ref_table}.{', '.join(fk.ref_columns)} (seeds de {index.environment}){note}")
+    issues = []
+    for issue_key, issue in found.items():
+        if counts[issue_key] > 1:
+            issue["message"] += f" ({counts[issue_key]} filas)"
+        issues.append(issue)
+    return sorted(issues, key=lambda issue: (issue["file"], issue["line"]))
+
+
+def check_references(references: ReferenceMap, files: List[SeedFile], jobs: int = 1):
+    """Índice y referencias colgantes de cada ambiente: {ambiente: (SeedIndex, issues)}"""
+    if jobs > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(references,)) as executor:
+            scanned = list(executor.map(scan_file, files, chunksize=max(1, len(files) // (jobs * 4))))
+    else:
+        _init_worker(references)
+        scanned = [scan_file(seed_file) for seed_file in files]
+
+    results = {}
+    for environment in dict.fromkeys(seed_file.environment for seed_file in files):
+        index = SeedIndex(environment)
+        env_files = [(str(seed_file.path), file_keys) for seed_file, file_keys in zip(files, scanned)
+                     if seed_file.environment == environment]
+        for path, file_keys in env_files:
+            index.add(file_keys, path)
+        results[environment] = (index, resolve_references(index, env_files))
+    return results
+
+
+# CLI
+def parse_args(argv=None):
+    from validate_integrity import severity_threshold
+
+    parser = argparse.ArgumentParser(description="Integridad referencial de los seeds de GAMILIT sin base de datos")
+    parser.add_argument("--ddl", type=Path, help="Directorio ddl/ (default: el de validate_integrity.py)")
+    parser.add_argument("--seeds", type=Path, default=DEFAULT_SEEDS, help="Directorio seeds/ (default: %(default)s)")
+    parser.add_argument("--env", action="append", choices=ENVIRONMENTS,
+                        help="Ambiente a validar (repetible; default: todos)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Procesos para leer archivos en paralelo (0 = todos los núcleos, default: 1)")
+    parser.add_argument("--fail-on", type=severity_threshold, default="CRÍTICO", metavar="SEVERIDAD",
+                        help="Salir con código 1 si hay issues de esta severidad o mayor (default: CRÍTICO)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from ddl_cache import DEFAULT_CACHE_FILE, FactsCache
+    from ddl_corpus import load_corpus
+    from ddl_graph import build_graph
+    from issue_formats import SEVERITIES, exceeds_threshold
+    from validate_integrity import BASE_PATH, print_counts, print_section, report_issues
+
+    args = parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    cache = FactsCache(DEFAULT_CACHE_FILE)
+    corpus = load_corpus(args.ddl or BASE_PATH, cache=cache)
+    cache.save()
+    references = build_reference_map(corpus, build_graph(corpus))
+
+    environments = args.env or list(ENVIRONMENTS)
+    results = check_references(references, seed_files(args.seeds, environments), jobs)
+
+    counts = Counter({severity: 0 for severity in SEVERITIES})
+    for environment in environments:
+        index, issues = results.get(environment, (SeedIndex(environment), []))
+        print_section(f"REFERENCIAS DE SEEDS: {environment}")
+        print(f"{len(index.files)} archivos, {index.size} claves indexadas en {len(index.keys)} columnas, "
+              f"{index.checked} referencias verificadas, {index.unchecked} no literales (sin verificar)\n")
+        report_issues(issues, f"Todas las referencias de los seeds de {environment} existen")
+        counts.update(issue["severity"] for issue in issues)
+
+    print_section("RESUMEN DE REFERENCIAS")
+    print_counts(counts, "REFERENCIAS DE SEEDS VALIDADAS EXITOSAMENTE")
+    return 1 if exceeds_threshold(counts, args.fail_on) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
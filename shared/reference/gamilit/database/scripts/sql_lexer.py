@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Tokenizador SQL para PostgreSQL usado por los extractores del corpus DDL
+
+Recorre el texto una sola vez y produce tokens con su línea y columna. Reconoce
+comentarios `--` y `/* */` (anidados), strings '...', E'...' (con escapes),
+B'', X'', U&'', identificadores entre comillas dobles y cuerpos dollar-quoted
+($$...$$, $function$...$function$). Los comentarios se descartan, de modo que
+los extractores no ven texto de comentarios ni el contenido de los literales.
+Fecha: 2025-11-07
+"""
+
+import re
+from collections import namedtuple
+from typing import Iterator, List
+
+# Tipos de token
+IDENT = "IDENT"      # identificador o palabra clave sin comillas
+QIDENT = "QIDENT"    # identificador entre comillas dobles
+STRING = "STRING"    # literal de texto (value = contenido sin comillas, tag = prefijo B, X o U&)
+DOLLAR = "DOLLAR"    # cuerpo dollar-quoted (value = cuerpo, tag = $tag$)
+NUMBER = "NUMBER"
+PARAM = "PARAM"      # $1, $2...
+OP = "OP"            # operadores y puntuación
+
+Token = namedtuple("Token", ["kind", "value", "line", "col", "tag"])
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<line_comment>--[^\n]*)
+  | (?P<block_comment>/\*)
+  | (?P<estring>[Ee]'(?:[^'\\]|\\.|'')*')
+  | (?P<string>(?:[BbXxNn]|[Uu]&)?'(?:[^']|'')*')
+  | (?P<qident>(?:[Uu]&)?"(?:[^"]|"")*")
+  | (?P<dollar>\$(?:[^\W\d]\w*)?\$)
+  | (?P<param>\$\d+)
+  | (?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<ident>[^\W\d][\w$]*)
+  | (?P<op>::|<=|>=|<>|!=|->>|->|\#>>|\#>|@>|<@|\|\||:=|=>|.)
+""", re.VERBOSE | re.DOTALL)
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+_ESCAPE_PATTERN = re.compile(r"\\(.)", re.DOTALL)
+
+# Contador de llamadas (validate_integrity.py lo registra como contador de profiling)
+calls = 0
+
+
+def _unescape_e(body: str) -> str:
+    return _ESCAPE_PATTERN.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), body).replace("''", "'")
+
+
+def _block_comment_end(text: str, pos: int) -> int:
+    """Fin de un comentario /* */ que empieza en pos (PostgreSQL permite anidarlos)"""
+    depth = 0
+    while pos < len(text):
+        if text.startswith("/*", pos):
+            depth += 1
+            pos += 2
+        elif text.startswith("*/", pos):
+            depth -= 1
+            pos += 2
+            if depth == 0:
+                return pos
+        else:
+            pos += 1
+    return len(text)
+
+
+def tokenize(text: str, line: int = 1, col: int = 1) -> Iterator[Token]:
+    """Genera los tokens de `text` en una sola pasada lineal
+
+    `line` y `col` indican dónde empieza `text` dentro del archivo, lo que permite
+    tokenizar un cuerpo dollar-quoted conservando posiciones reales (ver expand).
+    """
+    global calls
+    calls += 1
+
+    pos = 0
+    line_start = -(col - 1)
+    length = len(text)
+    match = _TOKEN_PATTERN.match
+
+    while pos < length:
+        m = match(text, pos)
+        group = m.lastgroup
+        end = m.end()
+        token = None
+        tok_line, tok_col = line, pos - line_start + 1
+
+        if group == "ident":
+            token = Token(IDENT, m.group(), tok_line, tok_col, "")
+        elif group == "op":
+            token = Token(OP, m.group(), tok_line, tok_col, "")
+        elif group == "string":
+            raw = m.group()
+            quote = raw.index("'")
+            prefix = raw[:quote].upper()
+            token = Token(STRING, raw[quote + 1:-1].replace("''", "'"), tok_line, tok_col,
+                          prefix if prefix in ("B", "X", "U&") else "")
+        elif group == "estring":
+            token = Token(STRING, _unescape_e(m.group()[2:-1]), tok_line, tok_col, "")
+        elif group == "qident":
+            raw = m.group()
+            token = Token(QIDENT, raw[raw.index('"') + 1:-1].replace('""', '"'), tok_line, tok_col, "")
+        elif group == "dollar":
+            tag = m.group()
+            close = text.find(tag, end)
+            body_end = close if close >= 0 else length
+            token = Token(DOLLAR, text[end:body_end], tok_line, tok_col, tag)
+            end = body_end + len(tag) if close >= 0 else length
+        elif group == "number":
+            token = Token(NUMBER, m.group(), tok_line, tok_col, "")
+        elif group == "param":
+            token = Token(PARAM, m.group(), tok_line, tok_col, "")
+        elif group == "block_comment":
+            end = _block_comment_end(text, pos)
+
+        newlines = text.count("\n", pos, end)
+        if newlines:
+            line += newlines
+            line_start = text.rfind("\n", pos, end) + 1
+        pos = end
+
+        if token is not None:
+            yield token
+
+
+def expand(token: Token) -> Iterator[Token]:
+    """Tokeniza el cuerpo de un token DOLLAR conservando línea y columna reales"""
+    return tokenize(token.value, token.line, token.col + len(token.tag))
+
+
+def split_statements(tokens) -> Iterator[List[Token]]:
+    """Agrupa los tokens en sentencias separadas por `;`"""
+    statement = []
+    for token in tokens:
+        if token.kind == OP and token.value == ";":
+            if statement:
+                yield statement
+            statement = []
+        else:
+            statement.append(token)
+    if statement:
+        yield statement
+
+
+def is_word(token: Token, *words: str) -> bool:
+    """True si el token es una palabra clave (sin comillas) de `words`"""
+    return token.kind == IDENT and token.value.upper() in words
+
+
+def is_op(token: Token, *ops: str) -> bool:
+    return token.kind == OP and token.value in ops
+
+
+def read_name(tokens: List[Token], i: int):
+    """Lee un nombre calificado (a.b.c) desde tokens[i]
+
+    Devuelve (nombre, índice siguiente) o (None, i) si no hay identificador.
+    Los identificadores sin comillas se normalizan a minúsculas como en PostgreSQL.
+    """
+    parts = []
+    n = len(tokens)
+    while i < n and tokens[i].kind in (IDENT, QIDENT):
+        token = tokens[i]
+        parts.append(token.value.lower() if token.kind == IDENT else token.value)
+        if i + 2 < n and is_op(tokens[i + 1], ".") and tokens[i + 2].kind in (IDENT, QIDENT):
+            i += 2
+        else:
+            i += 1
+            break
+    if not parts:
+        return None, i
+    return ".".join(parts), i
+
+
+# Palabras clave que pueden ir seguidas de `(` sin ser llamadas a función
+PAREN_KEYWORDS = {"AND", "OR", "NOT", "IN", "EXISTS", "VALUES", "ANY", "ALL", "SOME", "USING", "WHEN",
+                  "THEN", "ELSE", "OVER", "FILTER", "WITHIN", "KEY", "CHECK", "AS", "ON", "RETURN",
+                  "RETURNS", "SELECT", "WHERE", "IF", "ARRAY", "ROW", "WITH", "BY", "UNIQUE", "PRIMARY",
+                  "DEFAULT", "IS", "LIKE", "ILIKE", "BETWEEN", "CASE", "FROM", "JOIN", "SET", "TO"}
+
+# Caracteres de los operadores de PostgreSQL: dos tokens seguidos de estos forman otro operador
+_OPERATOR_CHARS = set("+-*/<>=~!@#%^&|`?")
+
+
+def split_top_level(tokens: List[Token]) -> List[List[Token]]:
+    """Divide una lista de tokens por comas de nivel superior"""
+    parts, current, depth = [], [], 0
+    for token in tokens:
+        if token.kind == OP:
+            if token.value in ("(", "["):
+                depth += 1
+            elif token.value in (")", "]"):
+                depth -= 1
+            elif token.value == "," and depth == 0:
+                parts.append(current)
+                current = []
+                continue
+        current.append(token)
+    if current:
+        parts.append(current)
+    return parts
+
+
+def matching_paren(tokens: List[Token], i: int) -> int:
+    """Índice del ')' que cierra el '(' en tokens[i] (o len(tokens))"""
+    depth = 0
+    for j in range(i, len(tokens)):
+        if is_op(tokens[j], "("):
+            depth += 1
+        elif is_op(tokens[j], ")"):
+            depth -= 1
+            if depth == 0:
+                return j
+    return len(tokens)
+
+
+def _adjacent_operators(prev: Token, token: Token) -> bool:
+    """True si dos operadores estaban pegados en el texto (separarlos o unirlos cambia el SQL)"""
+    return (prev.kind == OP and token.kind == OP and set(prev.value) <= _OPERATOR_CHARS
+            and set(token.value) <= _OPERATOR_CHARS)
+
+
+def sql_text(tokens: List[Token]) -> str:
+    """Texto normalizado de una expresión, sin comentarios (NOW () y now() dan lo mismo)
+
+    Es SQL válido: los operadores seguidos se unen o separan como en el original.
+    """
+    parts = []
+    prev = None
+    for token in tokens:
+        if token.kind == IDENT:
+            value = token.value.lower()
+        elif token.kind == QIDENT:
+            value = '"' + token.value.replace('"', '""') + '"'
+        elif token.kind == STRING:
+            value = (token.tag or "") + "'" + token.value.replace("'", "''") + "'"
+        elif token.kind == DOLLAR:
+            value = token.tag + token.value + token.tag
+        else:
+            value = token.value
+        if prev is None:
+            pass
+        elif _adjacent_operators(prev, token):
+            if prev.line != token.line or prev.col + len(prev.value) != token.col:
+                parts.append(" ")
+        elif not (
+            is_op(token, ",", ")", "]", ".", "::", "[")
+            or is_op(prev, "(", "[", ".", "::")
+            or (is_op(token, "(") and prev.kind in (IDENT, QIDENT) and not is_word(prev, *PAREN_KEYWORDS))
+        ):
+            parts.append(" ")
+        parts.append(value)
+        prev = token
+    return "".join(parts)
+
+
+def names(tokens: List[Token]) -> List[str]:
+    """Nombres separados por comas (listas de columnas o de roles); omite las partes que no lo son"""
+    result = []
+    for part in split_top_level(tokens):
+        name, _ = read_name(part, 0)
+        if name:
+            result.append(name)
+    return result
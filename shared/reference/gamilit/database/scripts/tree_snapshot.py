@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Snapshot del árbol de database/ en un solo recorrido
+
+Un recorrido con os.scandir clasifica cada archivo contra todos los patrones
+a la vez (una sola regex con un grupo por patrón) en lugar de un
+Path.glob("**/...") por patrón. Los directorios de .scanignore (backups/,
+.git/, scripts/.cache/...) no se recorren. Los seeds dentro de _backlog/ y
+_deprecated/ no entran en los patrones generales (no son temporales): solo
+se listan como candidatos a limpieza, junto con scripts/migrations/*.sql.
+
+El snapshot se guarda en scripts/.cache/tree-snapshot.json: otra herramienta
+de la misma corrida (verify-unification.py después de sync-prod-dev.py) lo
+reutiliza si tiene menos de --max-age segundos.
+
+Uso:
+    python3 scripts/tree_snapshot.py              # temporales y archivos a limpiar
+    python3 scripts/tree_snapshot.py --json
+Fecha: 2025-11-10
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DATABASE_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SNAPSHOT_FILE = Path(__file__).resolve().parent / ".cache" / "tree-snapshot.json"
+IGNORE_FILE = ".scanignore"
+SNAPSHOT_VERSION = 1
+
+# Directorios que nunca se recorren, además de los de .scanignore
+PRUNED_NAMES = {".git", "__pycache__", "node_modules"}
+# Directorios de archivos retirados: no cuentan para los patrones, solo para la limpieza
+ARCHIVE_NAMES = {"_backlog", "_deprecated"}
+
+# Categoría → globs sobre la ruta relativa (** = cualquier cantidad de directorios)
+PATTERNS = {
+    "temp": ["**/*~", "**/*.bak", "**/*.tmp", "**/.tmp-*"],
+    "migrations": ["scripts/migrations/*.sql"],
+}
+
+
+@dataclass
+class TreeSnapshot:
+    root: str
+    created: float
+    matches: Dict[str, List[str]] = field(default_factory=dict)   # patrón → rutas relativas
+    archived: List[str] = field(default_factory=list)
+    pruned: List[str] = field(default_factory=list)
+    directories: int = 0
+    files: int = 0
+
+    def category(self, name: str) -> List[str]:
+        """Archivos de todos los patrones de una categoría de PATTERNS"""
+        return sorted(path for pattern in PATTERNS.get(name, []) for path in self.matches.get(pattern, []))
+
+    def discard(self, paths):
+        """Quita del snapshot archivos que se eliminaron después de tomarlo"""
+        paths = set(paths)
+        for pattern, found in self.matches.items():
+            self.matches[pattern] = [path for path in found if path not in paths]
+        self.archived = [path for path in self.archived if path not in paths]
+
+
+def glob_regex(pattern: str) -> str:
+    """Regex de un glob sobre rutas con /: ** cruza directorios, * y ? no"""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+
+def _combined(patterns: List[str]) -> re.Pattern:
+    """Una regex con un grupo por patrón: match.lastgroup dice cuál coincidió"""
+    if not patterns:
+        return re.compile(r"(?!)")
+    groups = "|".join(f"(?P<p{number}>{glob_regex(pattern)})" for number, pattern in enumerate(patterns))
+    return re.compile(f"(?:{groups})\\Z")
+
+
+def read_ignore(root: Path) -> List[str]:
+    """Globs de directorios a no recorrer (.scanignore: uno por línea, # comenta)"""
+    path = root / IGNORE_FILE
+    if not path.exists():
+        return []
+    rules = []
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            rules.append(line.strip("/"))
+    return rules
+
+
+def scan_tree(root: Path = DATABASE_ROOT, patterns: Optional[List[str]] = None) -> TreeSnapshot:
+    """Un solo recorrido de root, sin bajar a los directorios ignorados"""
+    root = Path(root)
+    if patterns is None:
+        patterns = [pattern for globs in PATTERNS.values() for pattern in globs]
+    combined = _combined(patterns)
+    ignore = _combined(read_ignore(root))
+    tree = TreeSnapshot(str(root), time.time(), {pattern: [] for pattern in patterns})
+
+    stack = [("", False)]
+    while stack:
+        relative, archived = stack.pop()
+        tree.directories += 1
+        try:
+            entries = list(os.scandir(root / relative if relative else root))
+        except OSError:
+            continue
+        for entry in entries:
+            path = f"{relative}/{entry.name}" if relative else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in PRUNED_NAMES or ignore.match(path):
+                    tree.pruned.append(path)
+                else:
+                    stack.append((path, archived or entry.name in ARCHIVE_NAMES))
+                continue
+            tree.files += 1
+            if archived:
+                if path.startswith("seeds/") and entry.name.endswith(".sql"):
+                    tree.archived.append(path)
+                continue
+            match = combined.match(path)
+            if match is not None:
+                tree.matches[patterns[int(match.lastgroup[1:])]].append(path)
+
+    for found in tree.matches.values():
+        found.sort()
+    tree.archived.sort()
+    tree.pruned.sort()
+    return tree
+
+
+def save_snapshot(snapshot: TreeSnapshot, path: Path = DEFAULT_SNAPSHOT_FILE):
+    """Escribe el snapshot de forma atómica"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"version": SNAPSHOT_VERSION, **asdict(snapshot)}
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(root: Path = DATABASE_ROOT, max_age: float = 0,
+                  path: Path = DEFAULT_SNAPSHOT_FILE) -> Optional[TreeSnapshot]:
+    """Snapshot guardado de root si tiene menos de max_age segundos (None si no sirve)"""
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if data.pop("version", None) != SNAPSHOT_VERSION or data.get("root") != str(root):
+        return None
+    if time.time() - data.get("created", 0) > max_age:
+        return None
+    if set(data.get("matches", {})) != {pattern for globs in PATTERNS.values() for pattern in globs}:
+        return None
+    return TreeSnapshot(**data)
+
+
+# Snapshots ya tomados en este proceso
+_SNAPSHOTS: Dict[str, TreeSnapshot] = {}
+
+
+def snapshot(root: Path = DATABASE_ROOT, max_age: float = 0, save: bool = True) -> TreeSnapshot:
+    """Snapshot de root: el de este proceso, el guardado si es reciente, o un recorrido nuevo"""
+    key = str(Path(root))
+    cached = _SNAPSHOTS.get(key)
+    if cached is not None and time.time() - cached.created <= max_age:
+        return cached
+    cached = load_snapshot(root, max_age) if max_age > 0 else None
+    if cached is None:
+        cached = scan_tree(root)
+        if save:
+            save_snapshot(cached)
+    _SNAPSHOTS[key] = cached
+    return cached
+
+
+# CLI
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Archivos temporales y obsoletos de database/ en un solo recorrido")
+    parser.add_argument("--root", type=Path, default=DATABASE_ROOT, help="Directorio a recorrer (default: %(default)s)")
+    parser.add_argument("--max-age", type=float, default=0,
+                        help="Reutilizar el snapshot guardado si tiene menos de estos segundos (default: 0)")
+    parser.add_argument("--json", action="store_true", help="Imprimir el snapshot como JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from validate_integrity import Colors, print_ok, print_section
+
+    args = parse_args(argv)
+    start = time.perf_counter()
+    tree = snapshot(args.root.resolve(), args.max_age)
+    elapsed = (time.perf_counter() - start) * 1000
+    if args.json:
+        print(json.dumps(asdict(tree), indent=1))
+        return 0
+
+    print_section("SNAPSHOT DE database/")
+    print(f"{tree.files} archivos en {tree.directories} directorios ({elapsed:.0f} ms); "
+          f"sin recorrer: {', '.join(tree.pruned) or '-'}")
+    groups = [("Archivos temporales", tree.category("temp")),
+              ("Migraciones (no se usan en carga limpia)", tree.category("migrations")),
+              ("Seeds en _backlog/_deprecated", tree.archived)]
+    for title, paths in groups:
+        if not paths:
+            print_ok(f"{title}: ninguno")
+            continue
+        print(f"\n{Colors.WARNING}{title}: {len(paths)}{Colors.ENDC}")
+        for path in paths:
+            print(f"  {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
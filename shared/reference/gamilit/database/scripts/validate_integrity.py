@@ -4,11 +4,34 @@ Script de validación exhaustiva de integridad de la base de datos GAMILIT
 Fecha: 2025-11-07
 """
 
+import argparse
+import io
 import os
-import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
-from collections import defaultdict
-from typing import Dict, List, Set, Tuple
+from collections import Counter, defaultdict
+
+import ddl_corpus
+import sql_lexer
+from ddl_cache import DEFAULT_CACHE_FILE, ChangeScope, FactsCache, change_scope
+from ddl_corpus import DDLCorpus, defined_objects, load_corpus, qualify, reload_files
+from ddl_functions import analyze_functions, collect_functions
+from ddl_graph import DDLGraph, build_graph
+from ddl_indexes import DUPLICATE, PARTIAL, analyze_indexes, collect_indexes
+from ddl_matviews import analyze_matviews, cascade_drops, refresh_statements
+from ddl_projects import DEFAULT_ROOT, default_projects, load_config, parse_root, unique_names
+from ddl_rls import lint_policies
+from ddl_rules import DEFAULT_RULES, RuleSet, load_rules
+from ddl_triggers import AMPLIFICATION_THRESHOLD, analyze_cascades, distinct_cycles
+from issue_formats import SEVERITIES, JsonlWriter, SarifWriter, exceeds_threshold
+from profiling import BYTES_READ, TOKENIZER_CALLS, Profiler, register_counter
+
+# Contadores de las fases de --profile (y de bench_integrity.py)
+register_counter(BYTES_READ, lambda: ddl_corpus.bytes_read)
+register_counter(TOKENIZER_CALLS, lambda: sql_lexer.calls)
 
 # Colores para output
 class Colors:
@@ -33,62 +56,56 @@ def print_error(severity, msg):
 def print_ok(msg):
     print(f"{Colors.OKGREEN}✓ {msg}{Colors.ENDC}")
 
-# Configuración de paths
-BASE_PATH = Path("/home/isem/workspace/workspace-gamilit/gamilit/projects/gamilit/apps/database/ddl")
-SCHEMAS_PATH = BASE_PATH / "schemas"
+def issue_location(issue):
+    """file[:línea[:columna]] de un issue"""
+    location = issue["file"]
+    if issue.get("line"):
+        location += f":{issue['line']}"
+        if issue.get("column"):
+            location += f":{issue['column']}"
+    return location
+
+def report_issues(issues, ok_message):
+    if not issues:
+        print_ok(ok_message)
+        return
+    for issue in issues:
+        if issue["file"] == "N/A":
+            print_error(issue["severity"], issue["message"])
+        else:
+            print_error(issue["severity"], f"{issue['message']}\n  Archivo: {issue_location(issue)}")
+
+def validation(title, ok_message):
+    """Registra el título de sección y el mensaje de éxito de un validador"""
+    def decorator(validator):
+        validator.title = title
+        validator.ok_message = ok_message
+        return validator
+    return decorator
+
+# Configuración de paths: el ddl/ de este repositorio (otros árboles con --root/--config)
+BASE_PATH = DEFAULT_ROOT
 
 # 1. EXTRAER TODOS LOS ENUMs DEFINIDOS
-def extract_enums():
+def extract_enums(corpus: DDLCorpus):
     """Extrae todos los ENUMs definidos en el sistema"""
     enums = {}
 
     # 1.1 ENUMs en 00-prerequisites.sql
-    prereq_file = BASE_PATH / "00-prerequisites.sql"
-    if prereq_file.exists():
-        content = prereq_file.read_text()
-        # Buscar CREATE TYPE schema.enum AS ENUM
-        pattern = r'CREATE TYPE\s+([\w.]+)\s+AS ENUM\s*\((.*?)\);'
-        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
-        for enum_name, values in matches:
-            schema = "public"
-            name = enum_name
-            if "." in enum_name:
-                schema, name = enum_name.split(".", 1)
-
-            # Limpiar valores
-            vals = [v.strip().strip("'").strip('"') for v in re.findall(r"'([^']*)'", values)]
-            enums[f"{schema}.{name}"] = {
-                "file": str(prereq_file),
-                "schema": schema,
-                "name": name,
-                "values": vals,
-                "count": len(vals)
-            }
-
     # 1.2 ENUMs en archivos individuales
-    for enum_file in SCHEMAS_PATH.rglob("enums/*.sql"):
-        content = enum_file.read_text()
-
-        # Extraer schema del path
-        parts = enum_file.parts
-        schema_idx = parts.index("schemas") + 1
-        schema = parts[schema_idx]
-
-        # Buscar CREATE TYPE
-        pattern = r'CREATE TYPE\s+([\w.]+)\s+AS ENUM\s*\((.*?)\);'
-        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
+    sources = [corpus.prerequisites] if corpus.prerequisites else []
+    sources += corpus.of_kind("enums")
 
-        for enum_name, values in matches:
+    for sql_file in sources:
+        for enum_name, vals, _ in sql_file.facts["enums"]:
+            schema = sql_file.schema
+            name = enum_name
             if "." in enum_name:
                 schema, name = enum_name.split(".", 1)
-            else:
-                name = enum_name
-
-            vals = [v.strip().strip("'").strip('"') for v in re.findall(r"'([^']*)'", values)]
 
             full_name = f"{schema}.{name}"
             enums[full_name] = {
-                "file": str(enum_file),
+                "file": str(sql_file.path),
                 "schema": schema,
                 "name": name,
                 "values": vals,
@@ -98,32 +115,21 @@ def extract_enums():
     return enums
 
 # 2. EXTRAER TODAS LAS TABLAS DEFINIDAS
-def extract_tables():
+def extract_tables(corpus: DDLCorpus):
     """Extrae todas las tablas definidas"""
     tables = {}
 
-    for table_file in SCHEMAS_PATH.rglob("tables/*.sql"):
-        content = table_file.read_text()
-
-        # Extraer schema del path
-        parts = table_file.parts
-        schema_idx = parts.index("schemas") + 1
-        schema = parts[schema_idx]
-
-        # Buscar CREATE TABLE
-        pattern = r'CREATE TABLE\s+(?:IF NOT EXISTS\s+)?([\w.]+)'
-        matches = re.findall(pattern, content, re.IGNORECASE)
-
-        for table_name in matches:
+    for table_file in corpus.of_kind("tables"):
+        for table_name, _ in table_file.facts["tables"]:
             if "." in table_name:
                 tbl_schema, tbl_name = table_name.split(".", 1)
             else:
-                tbl_schema = schema
+                tbl_schema = table_file.schema
                 tbl_name = table_name
 
             full_name = f"{tbl_schema}.{tbl_name}"
             tables[full_name] = {
-                "file": str(table_file),
+                "file": str(table_file.path),
                 "schema": tbl_schema,
                 "name": tbl_name
             }
@@ -131,67 +137,39 @@ def extract_tables():
     return tables
 
 # 3. VALIDAR FOREIGN KEYS
-def validate_foreign_keys(tables):
+@validation("VALIDACIÓN 1: INTEGRIDAD DE FOREIGN KEYS", "Todas las Foreign Keys apuntan a tablas existentes")
+def validate_foreign_keys(corpus: DDLCorpus, tables):
     """Valida que todas las referencias de FK apunten a tablas existentes"""
     issues = []
 
-    print_section("VALIDACIÓN 1: INTEGRIDAD DE FOREIGN KEYS")
-
-    for table_file in SCHEMAS_PATH.rglob("tables/*.sql"):
-        content = table_file.read_text()
-
-        # Buscar REFERENCES
-        pattern = r'REFERENCES\s+([\w.]+)\s*\('
-        matches = re.findall(pattern, content, re.IGNORECASE)
-
-        for ref_table in matches:
-            # Normalizar nombre
+    for table_file in corpus.of_kind("tables", "fk-constraints"):
+        for ref_table, line, column in table_file.facts["references"]:
+            # Normalizar nombre con el schema del archivo actual
             if "." not in ref_table:
-                # Buscar schema del archivo actual
-                parts = table_file.parts
-                schema_idx = parts.index("schemas") + 1
-                schema = parts[schema_idx]
-                ref_table = f"{schema}.{ref_table}"
+                ref_table = f"{table_file.schema}.{ref_table}"
 
             if ref_table not in tables:
                 issues.append({
                     "severity": "CRÍTICO",
                     "type": "FK_BROKEN",
-                    "file": str(table_file),
+                    "file": str(table_file.path),
+                    "line": line,
+                    "column": column,
+                    "object": ref_table,
                     "message": f"Referencia a tabla inexistente: {ref_table}"
                 })
 
-    if not issues:
-        print_ok("Todas las Foreign Keys apuntan a tablas existentes")
-    else:
-        for issue in issues:
-            print_error(issue["severity"], f"{issue['message']}\n  Archivo: {issue['file']}")
-
     return issues
 
 # 4. VALIDAR ENUMS EN TABLAS
-def validate_enum_references(enums, tables):
+@validation("VALIDACIÓN 2: INTEGRIDAD DE ENUMs", "Todos los ENUMs referenciados existen")
+def validate_enum_references(corpus: DDLCorpus, enums, tables):
     """Valida que todos los ENUMs usados en tablas existan"""
     issues = []
 
-    print_section("VALIDACIÓN 2: INTEGRIDAD DE ENUMs")
-
-    for table_file in SCHEMAS_PATH.rglob("tables/*.sql"):
-        content = table_file.read_text()
-
-        # Buscar columnas con tipo ENUM (schema.enum_name)
-        pattern = r'(\w+)\s+([\w.]+)(?:\s+(?:NOT NULL|DEFAULT|CHECK|UNIQUE|PRIMARY KEY))?'
-
-        # Buscar específicamente tipos que parecen ENUMs (esquema.tipo)
-        enum_pattern = r'\s+([\w]+\.\w+)(?:\s|,|\))'
-        enum_matches = re.findall(enum_pattern, content)
-
-        for enum_ref in enum_matches:
-            # Ignorar cosas que no son ENUMs
-            if enum_ref.startswith('auth.') or enum_ref.startswith('educational_content.') or enum_ref.startswith('social_features.'):
-                if '(' in enum_ref or ')' in enum_ref:
-                    continue
-
+    for table_file in corpus.of_kind("tables"):
+        # Tipos calificados (esquema.tipo) de columnas y casts ::esquema.tipo
+        for enum_ref, line, column in table_file.facts["type_refs"]:
             # Verificar si es un ENUM conocido
             if enum_ref not in enums:
                 # Podría ser una tabla, verificar
@@ -199,209 +177,96 @@ def validate_enum_references(enums, tables):
                     issues.append({
                         "severity": "ALTO",
                         "type": "ENUM_NOT_FOUND",
-                        "file": str(table_file),
+                        "file": str(table_file.path),
+                        "line": line,
+                        "column": column,
+                        "object": enum_ref,
                         "message": f"Posible referencia a ENUM inexistente: {enum_ref}"
                     })
 
-    if not issues:
-        print_ok("Todos los ENUMs referenciados existen")
-    else:
-        for issue in issues:
-            print_error(issue["severity"], f"{issue['message']}\n  Archivo: {issue['file']}")
-
     return issues
 
 # 5. VALIDAR CORRECCIONES APLICADAS
-def validate_corrections():
-    """Valida las correcciones específicas mencionadas en el tracking"""
-    issues = []
-
-    print_section("VALIDACIÓN 3: CORRECCIONES APLICADAS")
-
-    # 5.1 notification_type - Debe tener 11 valores
-    print("\n--- notification_type ---")
-    enum_file = SCHEMAS_PATH / "public" / "enums" / "notification_type.sql"
-    if enum_file.exists():
-        content = enum_file.read_text()
-        values = re.findall(r"'([^']*)'", content)
-        if len(values) == 11:
-            print_ok(f"notification_type tiene 11 valores correctos")
-            expected = ['achievement_unlocked', 'rank_up', 'friend_request', 'guild_invitation',
-                       'mission_completed', 'level_up', 'message_received', 'system_announcement',
-                       'ml_coins_earned', 'streak_milestone', 'exercise_feedback']
-            missing = set(expected) - set(values)
-            if missing:
-                issues.append({
-                    "severity": "ALTO",
-                    "type": "ENUM_VALUES",
-                    "file": str(enum_file),
-                    "message": f"notification_type falta valores: {missing}"
-                })
-        else:
-            issues.append({
-                "severity": "CRÍTICO",
-                "type": "ENUM_VALUES",
-                "file": str(enum_file),
-                "message": f"notification_type tiene {len(values)} valores, esperados 11"
-            })
+@validation("VALIDACIÓN 3: CORRECCIONES APLICADAS", "Todas las correcciones del tracking están aplicadas")
+def validate_corrections(corpus: DDLCorpus, graph: DDLGraph, rules: RuleSet):
+    """Evalúa las reglas declarativas del tracking (integrity_rules.toml, ver ddl_rules.py)"""
+    print(f"\n--- {rules.count} reglas de {rules.path.name} ---")
+    return rules.evaluate(corpus, graph)
 
-    # 5.2 achievement_category - Debe estar en gamification_system
-    print("\n--- achievement_category ---")
-    enum_file = SCHEMAS_PATH / "gamification_system" / "enums" / "achievement_category.sql"
-    if enum_file.exists():
-        print_ok(f"achievement_category está en gamification_system")
-
-        # Verificar que la tabla achievements lo usa
-        table_file = SCHEMAS_PATH / "gamification_system" / "tables" / "03-achievements.sql"
-        if table_file.exists():
-            content = table_file.read_text()
-            if "gamification_system.achievement_category" in content:
-                print_ok("achievements usa gamification_system.achievement_category")
-            elif "public.achievement_category" in content:
-                issues.append({
-                    "severity": "CRÍTICO",
-                    "type": "ENUM_SCHEMA",
-                    "file": str(table_file),
-                    "message": "achievements usa public.achievement_category (debe ser gamification_system)"
-                })
-    else:
-        issues.append({
-            "severity": "CRÍTICO",
-            "type": "ENUM_MISSING",
-            "file": "N/A",
-            "message": "achievement_category no existe en gamification_system"
-        })
+# 6. BUSCAR FUNCIONES CON REFERENCIAS ROTAS
+# Catálogos del sistema: relaciones válidas aunque ningún DDL las cree
+SYSTEM_SCHEMAS = {"pg_catalog", "information_schema"}
 
-    # 5.3 transaction_type - Debe estar en gamification_system
-    print("\n--- transaction_type ---")
-    enum_file = SCHEMAS_PATH / "gamification_system" / "enums" / "transaction_type.sql"
-    if enum_file.exists():
-        content = enum_file.read_text()
-        values = re.findall(r"'([^']*)'", content)
-        print_ok(f"transaction_type existe en gamification_system con {len(values)} valores")
+def is_system_relation(name):
+    """pg_catalog.*, information_schema.* y pg_* sin calificar (pg_class, pg_policies...)"""
+    schema, _, relation = name.rpartition(".")
+    return schema in SYSTEM_SCHEMAS or (not schema and relation.startswith("pg_"))
 
-        # Debe tener 14 valores según tracking
-        if len(values) != 14:
-            issues.append({
-                "severity": "MEDIO",
-                "type": "ENUM_VALUES",
-                "file": str(enum_file),
-                "message": f"transaction_type tiene {len(values)} valores, esperados 14 según tracking"
-            })
-    else:
-        issues.append({
-            "severity": "CRÍTICO",
-            "type": "ENUM_MISSING",
-            "file": "N/A",
-            "message": "transaction_type no existe en gamification_system"
-        })
-
-    return issues
-
-# 6. BUSCAR FUNCIONES CON REFERENCIAS ROTAS
-def validate_functions(tables):
+@validation("VALIDACIÓN 4: FUNCIONES CON REFERENCIAS ROTAS", "Todas las funciones referencian tablas válidas")
+def validate_functions(corpus: DDLCorpus, tables):
     """Busca funciones que referencien tablas inexistentes"""
     issues = []
 
-    print_section("VALIDACIÓN 4: FUNCIONES CON REFERENCIAS ROTAS")
-
-    function_files = list(SCHEMAS_PATH.rglob("functions/*.sql"))
-
-    for func_file in function_files:
-        content = func_file.read_text()
-
-        # Buscar FROM, JOIN, INSERT INTO, UPDATE, DELETE FROM
-        patterns = [
-            r'FROM\s+([\w.]+)',
-            r'JOIN\s+([\w.]+)',
-            r'INSERT INTO\s+([\w.]+)',
-            r'UPDATE\s+([\w.]+)',
-            r'DELETE FROM\s+([\w.]+)'
-        ]
-
-        for pattern in patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for table_ref in matches:
-                # Normalizar
-                if "." not in table_ref and table_ref not in ['NEW', 'OLD', 'RETURNING', 'VALUES']:
-                    parts = func_file.parts
-                    schema_idx = parts.index("schemas") + 1
-                    schema = parts[schema_idx]
-                    table_ref = f"{schema}.{table_ref}"
-
-                if "." in table_ref and table_ref not in tables:
-                    # Verificar que no sea palabra clave SQL
-                    if table_ref.lower() not in ['with.recursive', 'select.distinct']:
-                        issues.append({
-                            "severity": "ALTO",
-                            "type": "FUNCTION_BROKEN_REF",
-                            "file": str(func_file),
-                            "message": f"Función referencia tabla inexistente: {table_ref}"
-                        })
+    # Las vistas (y vistas materializadas) también son relaciones válidas
+    views = {qualify(view, sql_file.schema) for sql_file in corpus.files for view, _ in sql_file.facts["views"]}
 
-    if not issues:
-        print_ok("Todas las funciones referencian tablas válidas")
-    else:
-        for issue in issues:
-            print_error(issue["severity"], f"{issue['message']}\n  Archivo: {issue['file']}")
+    for func_file in corpus.of_kind("functions"):
+        # FROM, JOIN, INSERT INTO, UPDATE, DELETE FROM
+        for table_ref, line, column in func_file.facts["table_usages"]:
+            if table_ref.upper() in ['NEW', 'OLD'] or is_system_relation(table_ref):
+                continue
+            table_ref = qualify(table_ref, func_file.schema)
+
+            if table_ref not in tables and table_ref not in views:
+                # Los archivos mixtos (fuera de functions/) también tienen políticas y consultas
+                source = "Función" if func_file.kind == "functions" else "SQL"
+                issues.append({
+                    "severity": "ALTO",
+                    "type": "FUNCTION_BROKEN_REF",
+                    "file": str(func_file.path),
+                    "line": line,
+                    "column": column,
+                    "object": table_ref,
+                    "message": f"{source} referencia tabla inexistente: {table_ref}"
+                })
 
     return issues
 
 # 7. BUSCAR TRIGGERS CON REFERENCIAS ROTAS
-def validate_triggers():
+@validation("VALIDACIÓN 5: TRIGGERS CON REFERENCIAS ROTAS", "Todos los triggers llaman funciones válidas")
+def validate_triggers(corpus: DDLCorpus):
     """Busca triggers que llamen funciones inexistentes"""
     issues = []
 
-    print_section("VALIDACIÓN 5: TRIGGERS CON REFERENCIAS ROTAS")
-
-    # Primero extraer todas las funciones
+    # Primero reunir todas las funciones (incluidas las de prerequisites y las
+    # funciones de trigger definidas en el mismo archivo del trigger)
     functions = set()
-    for func_file in SCHEMAS_PATH.rglob("functions/*.sql"):
-        content = func_file.read_text()
-        pattern = r'CREATE\s+(?:OR REPLACE\s+)?FUNCTION\s+([\w.]+)\s*\('
-        matches = re.findall(pattern, content, re.IGNORECASE)
-        functions.update(matches)
-
-    # Agregar funciones de prerequisites
-    prereq_file = BASE_PATH / "00-prerequisites.sql"
-    if prereq_file.exists():
-        content = prereq_file.read_text()
-        pattern = r'CREATE\s+(?:OR REPLACE\s+)?FUNCTION\s+([\w.]+)\s*\('
-        matches = re.findall(pattern, content, re.IGNORECASE)
-        functions.update(matches)
-
-    # Validar triggers
-    for trigger_file in SCHEMAS_PATH.rglob("triggers/*.sql"):
-        content = trigger_file.read_text()
-
-        # Buscar EXECUTE FUNCTION
-        pattern = r'EXECUTE\s+(?:FUNCTION|PROCEDURE)\s+([\w.]+)\s*\('
-        matches = re.findall(pattern, content, re.IGNORECASE)
-
-        for func_ref in matches:
-            if func_ref not in functions:
+    sources = [corpus.prerequisites] if corpus.prerequisites else []
+    for func_file in sources + corpus.of_kind("functions", "triggers"):
+        functions.update(qualify(name, func_file.schema) for name, _ in func_file.facts["functions"])
+
+    # Validar triggers (EXECUTE FUNCTION)
+    for trigger_file in corpus.of_kind("triggers"):
+        for func_ref, line, column in trigger_file.facts["trigger_calls"]:
+            if qualify(func_ref, trigger_file.schema) not in functions:
                 issues.append({
                     "severity": "CRÍTICO",
                     "type": "TRIGGER_BROKEN_REF",
-                    "file": str(trigger_file),
+                    "file": str(trigger_file.path),
+                    "line": line,
+                    "column": column,
+                    "object": func_ref,
                     "message": f"Trigger llama función inexistente: {func_ref}"
                 })
 
-    if not issues:
-        print_ok("Todos los triggers llaman funciones válidas")
-    else:
-        for issue in issues:
-            print_error(issue["severity"], f"{issue['message']}\n  Archivo: {issue['file']}")
-
     return issues
 
 # 8. BUSCAR ENUMS DUPLICADOS
+@validation("VALIDACIÓN 6: ENUMs DUPLICADOS", "No hay ENUMs duplicados")
 def check_duplicate_enums(enums):
     """Busca ENUMs duplicados en múltiples schemas"""
     issues = []
 
-    print_section("VALIDACIÓN 6: ENUMs DUPLICADOS")
-
     enum_names = defaultdict(list)
     for full_name, info in enums.items():
         name = info["name"]
@@ -413,61 +278,591 @@ def check_duplicate_enums(enums):
                 "severity": "ALTO",
                 "type": "ENUM_DUPLICATE",
                 "file": "N/A",
+                "object": name,
                 "message": f"ENUM '{name}' duplicado en: {', '.join(locations)}"
             })
 
-    if not issues:
-        print_ok("No hay ENUMs duplicados")
-    else:
-        for issue in issues:
-            print_error(issue["severity"], issue["message"])
+    return issues
+
+# 9. CICLOS EN EL GRAFO DE DEPENDENCIAS
+@validation("VALIDACIÓN 7: CICLOS DE DEPENDENCIAS", "No hay ciclos en el orden de creación")
+def validate_dependency_cycles(graph: DDLGraph):
+    """Busca ciclos que impiden crear los objetos en algún orden"""
+    issues = []
+
+    for cycle in graph.fk_cycles():
+        if cycle.resolved:
+            print(f"  Ciclo de FKs resuelto con FK diferido: {' ↔ '.join(cycle.tables)}")
+        else:
+            issues.append({
+                "severity": "CRÍTICO",
+                "type": "FK_CYCLE",
+                "file": "N/A",
+                "object": cycle.tables[0],
+                "message": f"Ciclo de FKs sin FK diferido: {' ↔ '.join(cycle.tables)}"
+            })
+
+    for component in graph.cycles():
+        nodes = [graph.nodes[node_id] for node_id in component]
+        issues.append({
+            "severity": "CRÍTICO",
+            "type": "DEPENDENCY_CYCLE",
+            "file": nodes[0].file,
+            "line": nodes[0].line,
+            "object": nodes[0].name,
+            "message": f"Dependencia circular: {' → '.join(str(node) for node in nodes)}"
+        })
 
     return issues
 
-# MAIN
-def main():
-    print(f"\n{Colors.BOLD}VALIDACIÓN EXHAUSTIVA DE INTEGRIDAD - BASE DE DATOS GAMILIT{Colors.ENDC}")
-    print(f"{Colors.BOLD}Fecha: 2025-11-07{Colors.ENDC}")
-    print(f"{Colors.BOLD}Post-correcciones: 9/142 completadas{Colors.ENDC}\n")
+# 10. FOREIGN KEYS SIN ÍNDICE
+# Métodos de índice que sirven para la búsqueda por igualdad del FK
+# (hash solo con una columna)
+FK_INDEX_METHODS = {"btree", "hash"}
+
+def index_prefixes(corpus: DDLCorpus, graph: DDLGraph):
+    """Columnas iniciales de cada índice utilizable por tabla: índices no
+    parciales más los índices implícitos de PRIMARY KEY y UNIQUE"""
+    prefixes = defaultdict(list)
+    for table, indexes in collect_indexes(corpus, graph).items():
+        for index in indexes:
+            if index.where or index.method not in FK_INDEX_METHODS:
+                continue
+            columns = []
+            for column in index.columns:
+                if column is None:  # expresión: las columnas siguientes ya no son prefijo
+                    break
+                columns.append(column)
+            if index.method == "hash":
+                columns = columns[:1]
+            if columns:
+                prefixes[table].append(columns)
+    return prefixes
+
+def hot_tables(graph: DDLGraph):
+    """Tablas en caminos calientes: con triggers, leídas por vistas
+    materializadas o por vistas de leaderboard (tabla -> motivos)"""
+    hot = defaultdict(list)
+    for node_id, node in graph.nodes.items():
+        if node.kind == "trigger":
+            hot[node.table].append(f"trigger {node.name.rsplit('.', 1)[-1]}")
+        elif node.kind == "materialized_view" or (node.kind == "view" and "leaderboard" in node.name):
+            kind = "MV" if node.kind == "materialized_view" else "vista"
+            for target in graph.dependencies[node_id]:
+                if graph.nodes[target].kind == "table":
+                    hot[graph.nodes[target].name].append(f"{kind} {node.name}")
+    return hot
+
+@validation("VALIDACIÓN 8: FOREIGN KEYS SIN ÍNDICE", "Todas las Foreign Keys tienen un índice que las cubre")
+def validate_unindexed_foreign_keys(corpus: DDLCorpus, graph: DDLGraph):
+    """Busca FKs cuyas columnas no son el prefijo de ningún índice de la tabla
+    (JOINs y borrados en cascada recorren la tabla completa)"""
+    issues = []
+    prefixes = index_prefixes(corpus, graph)
+    hot = hot_tables(graph)
+
+    for table_file in corpus.of_kind("tables", "fk-constraints"):
+        for table, columns, ref_table, _, on_delete, line, column in table_file.facts["foreign_keys"]:
+            table = qualify(table, table_file.schema)
+            wanted = set(columns)
+            if any(len(prefix) >= len(columns) and set(prefix[:len(columns)]) == wanted
+                   for prefix in prefixes.get(table, [])):
+                continue
+
+            reasons = sorted(set(hot.get(table, [])))
+            cascade = f" (ON DELETE {on_delete})" if on_delete in ("CASCADE", "SET NULL", "SET DEFAULT") else ""
+            message = f"FK sin índice: {table}({', '.join(columns)}) → {qualify(ref_table, table_file.schema)}{cascade}"
+            if reasons:
+                shown = ", ".join(reasons[:3]) + (f" y {len(reasons) - 3} más" if len(reasons) > 3 else "")
+                message += f"; tabla en camino caliente: {shown}"
+            issues.append({
+                "severity": "ALTO" if reasons else "MEDIO",
+                "type": "FK_UNINDEXED",
+                "file": str(table_file.path),
+                "line": line,
+                "column": column,
+                "object": table,
+                "message": message
+            })
 
-    # Extraer información
-    print("Extrayendo información de la base de datos...")
-    enums = extract_enums()
-    tables = extract_tables()
+    return issues
 
-    print(f"✓ {len(enums)} ENUMs encontrados")
-    print(f"✓ {len(tables)} tablas encontradas")
+# 11. ÍNDICES REDUNDANTES
+@validation("VALIDACIÓN 9: ÍNDICES REDUNDANTES", "No hay índices duplicados ni redundantes")
+def validate_redundant_indexes(corpus: DDLCorpus, graph: DDLGraph):
+    """Busca índices duplicados, redundantes por prefijo o parciales ya cubiertos
+    (cada uno agrega escrituras en INSERT y UPDATE; detalle en ddl_indexes.py)"""
+    issues = []
 
-    # Ejecutar validaciones
-    all_issues = []
+    for finding in analyze_indexes(collect_indexes(corpus, graph)):
+        index, other = finding.index, finding.covered_by
+        issue_type = ("INDEX_DUPLICATE" if finding.kind == DUPLICATE
+                      else "INDEX_PARTIAL_COVERED" if finding.kind == PARTIAL else "INDEX_REDUNDANT")
+        issues.append({
+            "severity": "MEDIO" if finding.kind == DUPLICATE else "BAJO",
+            "type": issue_type,
+            "file": index.file,
+            "line": index.line,
+            "object": index.name,
+            "message": f"Índice {finding.kind}: {index} ya cubierto por {other}"
+        })
 
-    all_issues.extend(validate_foreign_keys(tables))
-    all_issues.extend(validate_enum_references(enums, tables))
-    all_issues.extend(validate_corrections())
-    all_issues.extend(validate_functions(tables))
-    all_issues.extend(validate_triggers())
-    all_issues.extend(check_duplicate_enums(enums))
+    return issues
 
-    # RESUMEN FINAL
-    print_section("RESUMEN DE VALIDACIÓN")
+# 12. RENDIMIENTO DE POLICIES RLS
+@validation("VALIDACIÓN 10: RENDIMIENTO DE POLICIES RLS", "Las policies no evalúan funciones ni subconsultas por fila")
+def validate_rls_policies(corpus: DDLCorpus, graph: DDLGraph):
+    """Busca en USING / WITH CHECK llamadas STABLE/VOLATILE sin (SELECT fn()),
+    subconsultas correlacionadas y predicados sin índice (detalle en ddl_rls.py)"""
+    issues = []
 
-    critical = [i for i in all_issues if i["severity"] == "CRÍTICO"]
-    high = [i for i in all_issues if i["severity"] == "ALTO"]
-    medium = [i for i in all_issues if i["severity"] == "MEDIO"]
-    low = [i for i in all_issues if i["severity"] == "BAJO"]
+    for finding in lint_policies(corpus, graph):
+        policy = finding.policy
+        issues.append({
+            "severity": finding.severity,
+            "type": finding.kind,
+            "file": policy.file,
+            "line": policy.line,
+            "object": policy.name,
+            "message": f"Policy {policy.name.rsplit('.', 1)[-1]} ({finding.clause}): {finding.message}"
+        })
+
+    return issues
+
+# 13. REFRESH DE VISTAS MATERIALIZADAS
+@validation("VALIDACIÓN 11: REFRESH DE VISTAS MATERIALIZADAS", "Los REFRESH y DROP de vistas materializadas son seguros")
+def validate_matview_refresh(corpus: DDLCorpus, graph: DDLGraph):
+    """Verifica los REFRESH ... CONCURRENTLY, los refresh bloqueantes o redundantes
+    y los DROP ... CASCADE que arrastran otros objetos (plan en ddl_matviews.py)"""
+    issues = []
+    matviews = {mv.name: mv for mv in analyze_matviews(corpus, graph)}
+
+    for mv in matviews.values():
+        if mv.unique_index is None:
+            issues.append({
+                "severity": "BAJO",
+                "type": "MV_NOT_CONCURRENT",
+                "file": mv.file,
+                "line": mv.line,
+                "object": mv.name,
+                "message": f"Vista materializada {mv.name} sin índice UNIQUE: su refresh bloquea las lecturas"
+            })
+
+    created_in = {mv.name: mv.file for mv in matviews.values() if mv.populated}
+    for sql_file, name, concurrently, top_level, line in refresh_statements(corpus):
+        mv = matviews.get(name)
+        if mv is None:
+            continue
+        issue = {"file": str(sql_file.path), "line": line, "object": name}
+        if concurrently and mv.blocker:
+            issue.update(severity="ALTO", type="MV_CONCURRENT_REFRESH_INVALID",
+                         message=f"REFRESH ... CONCURRENTLY de {name} fallará: {mv.blocker}")
+        elif top_level and created_in.get(name) == str(sql_file.path):
+            issue.update(severity="BAJO", type="MV_REDUNDANT_REFRESH",
+                         message=f"REFRESH de {name} en el mismo archivo que la crea WITH DATA: el build la calcula dos veces")
+        elif not concurrently and not top_level and mv.blocker is None:
+            issue.update(severity="MEDIO", type="MV_BLOCKING_REFRESH",
+                         message=f"REFRESH de {name} sin CONCURRENTLY: bloquea las lecturas aunque tiene "
+                                 f"índice único ({mv.unique_index.name})")
+        else:
+            continue
+        issues.append(issue)
+
+    for sql_file, name, line in cascade_drops(corpus):
+        mv = matviews.get(name)
+        if mv is None or not mv.cascade:
+            continue
+        names = ", ".join(graph.nodes[node_id].name for node_id in mv.cascade)
+        issues.append({
+            "severity": "ALTO",
+            "type": "MV_DROP_CASCADE",
+            "file": str(sql_file.path),
+            "line": line,
+            "object": name,
+            "message": f"DROP MATERIALIZED VIEW {name} CASCADE elimina también {names}"
+        })
+
+    return issues
 
-    print(f"\n{Colors.FAIL}CRÍTICO: {len(critical)} problemas{Colors.ENDC}")
-    print(f"{Colors.WARNING}ALTO: {len(high)} problemas{Colors.ENDC}")
-    print(f"{Colors.OKCYAN}MEDIO: {len(medium)} problemas{Colors.ENDC}")
-    print(f"{Colors.OKBLUE}BAJO: {len(low)} problemas{Colors.ENDC}")
-    print(f"\n{Colors.BOLD}TOTAL: {len(all_issues)} problemas encontrados{Colors.ENDC}\n")
+# 14. VOLATILIDAD DE FUNCIONES
+@validation("VALIDACIÓN 12: VOLATILIDAD DE FUNCIONES", "Las funciones declaran la volatilidad y el paralelismo que su cuerpo admite")
+def validate_function_volatility(corpus: DDLCorpus, graph: DDLGraph):
+    """Compara la volatilidad, PARALLEL y LANGUAGE declarados de cada función con
+    su cuerpo y sus usos (detalle en ddl_functions.py)"""
+    return [{
+        "severity": finding.severity,
+        "type": finding.kind,
+        "file": finding.function.file,
+        "line": finding.function.line,
+        "object": finding.function.name,
+        "message": finding.message
+    } for finding in analyze_functions(collect_functions(corpus, graph))]
+
+# 15. CASCADAS DE TRIGGERS
+@validation("VALIDACIÓN 13: CASCADAS DE TRIGGERS", "Las cascadas de triggers no se repiten ni amplifican las escrituras")
+def validate_trigger_cascades(corpus: DDLCorpus, graph: DDLGraph):
+    """Detecta ciclos entre triggers y escrituras que disparan cadenas largas de
+    triggers (peor caso por fila; detalle en ddl_triggers.py)"""
+    issues = []
+    cascades = analyze_cascades(corpus, graph)
+
+    for cycle in distinct_cycles(cascades):
+        guard = " (la función consulta pg_trigger_depth())" if cycle.guarded else ""
+        issues.append({
+            "severity": "BAJO" if cycle.guarded else "ALTO",
+            "type": "TRIGGER_CYCLE",
+            "file": cycle.trigger.file,
+            "line": cycle.trigger.line,
+            "object": f"{cycle.trigger.table}.{cycle.trigger.name}",
+            "message": f"Ciclo de triggers {' → '.join(cycle.path)} vía {cycle.trigger.name}: "
+                       f"cada vuelta vuelve a disparar la cadena{guard}"
+        })
 
-    if len(all_issues) == 0:
-        print(f"{Colors.OKGREEN}{Colors.BOLD}✓✓✓ BASE DE DATOS VALIDADA EXITOSAMENTE ✓✓✓{Colors.ENDC}\n")
+    for cascade in cascades:
+        if cascade.writes < AMPLIFICATION_THRESHOLD:
+            continue
+        first = cascade.steps[0].trigger
+        issues.append({
+            "severity": "MEDIO",
+            "type": "TRIGGER_WRITE_AMPLIFICATION",
+            "file": first.file,
+            "line": first.line,
+            "object": cascade.table,
+            "message": f"Un {cascade.event} en {cascade.table} escribe hasta {cascade.writes} filas y ejecuta "
+                       f"{cascade.invocations} funciones de trigger por fila (profundidad {cascade.depth})"
+        })
+
+    return issues
+
+# EJECUCIÓN DE VALIDADORES
+def run_validator(validator, args, scope=None):
+    """Ejecuta un validador capturando su salida para imprimirla en orden estable"""
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        print_section(validator.title)
+        issues = validator(*args)
+        if scope is not None:
+            issues = scope.filter(issues)
+        report_issues(issues, validator.ok_message)
+    return buffer.getvalue(), issues
+
+def iter_validators(validations, executor=None, scope=None, profiler=None):
+    """Ejecuta las validaciones (en paralelo si hay executor) y entrega
+    (validador, salida, issues) de cada una en cuanto está lista, en el mismo
+    orden determinista de la ejecución secuencial. Con un profiler habilitado
+    se ejecutan en este proceso para medir cada una como fase."""
+    if profiler is not None and profiler.enabled:
+        for validator, *args in validations:
+            with profiler.phase(validator.__name__):
+                result = run_validator(validator, args, scope)
+            yield (validator, *result)
+    elif executor is None:
+        for validator, *args in validations:
+            yield (validator, *run_validator(validator, args, scope))
+    else:
+        futures = [(validator, executor.submit(run_validator, validator, args, scope))
+                   for validator, *args in validations]
+        for validator, future in futures:
+            yield (validator, *future.result())
+
+# FORMATOS DE SALIDA
+def print_counts(counts, success):
+    total = sum(counts.values())
+    print(f"\n{Colors.FAIL}CRÍTICO: {counts['CRÍTICO']} problemas{Colors.ENDC}")
+    print(f"{Colors.WARNING}ALTO: {counts['ALTO']} problemas{Colors.ENDC}")
+    print(f"{Colors.OKCYAN}MEDIO: {counts['MEDIO']} problemas{Colors.ENDC}")
+    print(f"{Colors.OKBLUE}BAJO: {counts['BAJO']} problemas{Colors.ENDC}")
+    print(f"\n{Colors.BOLD}TOTAL: {total} problemas encontrados{Colors.ENDC}\n")
+
+    if total == 0:
+        print(f"{Colors.OKGREEN}{Colors.BOLD}✓✓✓ {success} ✓✓✓{Colors.ENDC}\n")
     else:
         print(f"{Colors.FAIL}{Colors.BOLD}⚠ SE REQUIERE ATENCIÓN ⚠{Colors.ENDC}\n")
 
-    return all_issues
+class TextWriter:
+    """Salida para terminal: secciones por validador y resumen por severidad
+    de cada proyecto (y del workspace si hay varios)"""
+    machine = False
+
+    def __init__(self, stream=None):
+        self.summaries = []
+
+    def begin(self, projects):
+        self.multiple = len(projects) > 1
+
+    def project(self, project):
+        pass
+
+    def validator(self, validator, output, issues):
+        print(output, end="")
+
+    def end_project(self, project, counts):
+        self.summaries.append((project.name, counts))
+        print_section(f"RESUMEN DE VALIDACIÓN: {project.name}" if self.multiple else "RESUMEN DE VALIDACIÓN")
+        print_counts(counts, "BASE DE DATOS VALIDADA EXITOSAMENTE")
+
+    def finish(self, counts):
+        if not self.multiple:
+            return
+        print_section("RESUMEN DEL WORKSPACE")
+        print(f"{'proyecto':<30}" + "".join(f"{severity:>9}" for severity in SEVERITIES) + f"{'total':>9}")
+        for name, project_counts in self.summaries:
+            print(f"{name:<30}" + "".join(f"{project_counts[severity]:>9}" for severity in SEVERITIES)
+                  + f"{sum(project_counts.values()):>9}")
+        print_counts(counts, f"{len(self.summaries)} BASES DE DATOS VALIDADAS EXITOSAMENTE")
+
+WRITERS = {"text": TextWriter, "jsonl": JsonlWriter, "sarif": SarifWriter}
+
+def severity_threshold(value):
+    """CRÍTICO/ALTO/MEDIO/BAJO/NINGUNO (acepta CRITICO sin acento)"""
+    value = value.upper().replace("CRITICO", "CRÍTICO")
+    if value not in SEVERITIES + ("NINGUNO",):
+        raise argparse.ArgumentTypeError(f"severidad inválida: {value}")
+    return value
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Validación exhaustiva de integridad de la base de datos GAMILIT")
+    parser.add_argument("--root", action="append", default=[], metavar="[NOMBRE=]RUTA",
+                        help="Árbol DDL a validar (repetible; default: el ddl/ junto a scripts/)")
+    parser.add_argument("--config", type=Path, metavar="ARCHIVO",
+                        help="TOML con los proyectos a validar ([[project]] con name, root, include; "
+                             "ver ddl_projects.py)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Procesos para parseo y validación en paralelo (0 = todos los núcleos, default: 1)")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE_FILE,
+                        help=f"Caché de extracciones por hash de contenido (default: {DEFAULT_CACHE_FILE})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-parsear todos los archivos sin leer ni escribir la caché")
+    parser.add_argument("--since", metavar="GIT_REV",
+                        help="Reportar solo issues de archivos cambiados desde GIT_REV y de los objetos que "
+                             "dependen de lo que definen")
+    parser.add_argument("--watch", action="store_true",
+                        help="Tras la validación, observar ddl/ y re-validar los objetos afectados por cada cambio")
+    parser.add_argument("--interval", type=float, default=0.5,
+                        help="Con --watch sin watchdog instalado: segundos entre sondeos (default: 0.5)")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="text",
+                        help="text (terminal), jsonl (un issue JSON por línea) o sarif (SARIF 2.1.0); "
+                             "con jsonl/sarif el progreso va a stderr")
+    parser.add_argument("--profile", action="store_true",
+                        help="Reportar wall/CPU, bytes leídos, tokenizaciones y memoria por fase")
+    parser.add_argument("--profile-cprofile", type=Path, metavar="DIR",
+                        help="Con --profile: guardar estadísticas de cProfile por fase en DIR")
+    parser.add_argument("--profile-tracemalloc", type=int, default=0, metavar="N",
+                        help="Con --profile: pico de memoria Python y top N de asignaciones por fase")
+    parser.add_argument("--fail-on", type=severity_threshold, default="CRÍTICO", metavar="SEVERIDAD",
+                        help="Salir con código 1 si hay issues de esta severidad o mayor: "
+                             "CRÍTICO, ALTO, MEDIO, BAJO o NINGUNO (default: CRÍTICO)")
+    args = parser.parse_args(argv)
+    try:
+        projects = load_config(args.config) if args.config else []
+        projects += [parse_root(spec) for spec in args.root]
+        unique_names(projects)
+        for project in projects or default_projects():
+            if project.rules:
+                load_rules(project.rules)
+    except ValueError as e:
+        parser.error(str(e))
+    args.projects = projects or default_projects()
+    if args.watch and args.format != "text":
+        parser.error("--watch solo admite --format text")
+    if args.watch and len(args.projects) > 1:
+        parser.error("--watch admite un solo proyecto")
+    if (args.profile_cprofile or args.profile_tracemalloc) and not args.profile:
+        args.profile = True
+    return args
+
+def build_validations(corpus: DDLCorpus, profiler=None, rules=DEFAULT_RULES):
+    """Índices derivados del corpus y lista de validaciones con sus argumentos
+    (validate_corrections solo con un archivo de `rules`: el tracking es de GAMILIT)"""
+    profiler = profiler or Profiler()
+    with profiler.phase("extract_enums"):
+        enums = extract_enums(corpus)
+    with profiler.phase("extract_tables"):
+        tables = extract_tables(corpus)
+    with profiler.phase("build_graph"):
+        graph = build_graph(corpus)
+    validations = [
+        (validate_foreign_keys, corpus, tables),
+        (validate_enum_references, corpus, enums, tables),
+        (validate_corrections, corpus, graph, load_rules(rules) if rules else None),
+        (validate_functions, corpus, tables),
+        (validate_triggers, corpus),
+        (check_duplicate_enums, enums),
+        (validate_dependency_cycles, graph),
+        (validate_unindexed_foreign_keys, corpus, graph),
+        (validate_redundant_indexes, corpus, graph),
+        (validate_rls_policies, corpus, graph),
+        (validate_matview_refresh, corpus, graph),
+        (validate_function_volatility, corpus, graph),
+        (validate_trigger_cascades, corpus, graph),
+    ]
+    if not rules:
+        validations = [entry for entry in validations if entry[0] is not validate_corrections]
+    return validations, enums, tables, graph
+
+# MODO --watch
+def issue_key(issue):
+    return (issue["severity"], issue["type"], issue["file"], issue["message"])
+
+def affected_scope(graph_before: DDLGraph, graph_after: DDLGraph, previous, corpus: DDLCorpus) -> ChangeScope:
+    """Archivos y objetos cambiados más todos sus dependientes (antes y después del cambio)"""
+    changed_files = {str(path) for path in previous}
+    files = set(changed_files)
+    objects = set()
+
+    for graph in (graph_before, graph_after):
+        changed = {node_id for node_id, node in graph.nodes.items()
+                   if node.file in changed_files or changed_files.intersection(node.also_defined_in)}
+        for node_id in changed | graph.transitive_dependents(changed):
+            node = graph.nodes[node_id]
+            files.add(node.file)
+            objects.add(node.name)
+
+    for path, old_file in previous.items():
+        if old_file is not None:
+            objects |= defined_objects(old_file.facts, old_file.schema)
+        new_file = corpus.get(path)
+        if new_file is not None:
+            objects |= defined_objects(new_file.facts, new_file.schema)
+
+    return ChangeScope(files=frozenset(files), objects=frozenset(objects))
+
+def print_delta(added, resolved, elapsed_ms, changed_paths):
+    names = ", ".join(sorted(Path(path).name for path in changed_paths))
+    print(f"\n{Colors.BOLD}[{time.strftime('%H:%M:%S')}] {names} "
+          f"({elapsed_ms:.0f} ms){Colors.ENDC}")
+    for issue in resolved:
+        print(f"{Colors.OKGREEN}- [{issue['severity']}] {issue['message']}{Colors.ENDC}")
+    for issue in added:
+        print_error(issue["severity"], f"+ {issue['message']}\n  Archivo: {issue_location(issue)}")
+    if not added and not resolved:
+        print_ok("Sin cambios en los issues")
+
+def watch(args, corpus: DDLCorpus, issues, cache=None):
+    """Mantiene el corpus en memoria y re-valida solo lo afectado por cada cambio"""
+    from ddl_watch import HAS_WATCHDOG, watch_changes
+
+    mode = "watchdog" if HAS_WATCHDOG else f"sondeo cada {args.interval}s"
+    print(f"{Colors.BOLD}Observando {corpus.base_path} ({mode}); Ctrl+C para salir{Colors.ENDC}")
+    graph = build_graph(corpus)
+
+    try:
+        for paths in watch_changes(corpus.base_path, args.interval):
+            started = time.perf_counter()
+            previous = reload_files(corpus, paths, cache)
+            validations, _, _, new_graph = build_validations(corpus, rules=args.projects[0].rules)
+            scope = affected_scope(graph, new_graph, previous, corpus)
+            graph = new_graph
+
+            with redirect_stdout(io.StringIO()):
+                scoped = [issue for validator, *v_args in validations
+                          for issue in scope.filter(validator(*v_args))]
+            before = {issue_key(issue) for issue in scope.filter(issues)}
+            after = {issue_key(issue) for issue in scoped}
+            added = [issue for issue in scoped if issue_key(issue) not in before]
+            resolved = [issue for issue in scope.filter(issues) if issue_key(issue) not in after]
+            issues = [issue for issue in issues if not scope.covers(issue)] + scoped
+
+            print_delta(added, resolved, (time.perf_counter() - started) * 1000, paths)
+            print(f"  Total: {len(issues)} problemas")
+            if cache is not None:
+                cache.save()
+    except KeyboardInterrupt:
+        print()
+    return issues
+
+# MAIN
+def main(argv=None):
+    """Devuelve el código de salida según --fail-on"""
+    args = parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            counts = validate(args, executor, jobs)
+    else:
+        counts = validate(args)
+    return 1 if exceeds_threshold(counts, args.fail_on) else 0
+
+def validate(args, executor=None, jobs=1):
+    """Valida cada proyecto (compartiendo workers y caché) y devuelve el número
+    total de issues por severidad"""
+    writer = WRITERS[args.format](sys.stdout)
+    profiler = Profiler(args.profile, args.profile_cprofile, args.profile_tracemalloc)
+    cache = None if args.no_cache else FactsCache(args.cache)
+    multiple = len(args.projects) > 1
+    # Con formatos para máquina, stdout lleva solo los issues
+    log = sys.stderr if writer.machine else sys.stdout
+    with redirect_stdout(log):
+        print_header(args.projects)
+
+    totals = Counter()
+    writer.begin(args.projects)
+    for project in args.projects:
+        profiler.prefix = f"{project.name}/" if multiple else ""
+        with redirect_stdout(log):
+            if multiple:
+                print_section(f"PROYECTO: {project.name}")
+                print(f"Raíz: {project.root}")
+            corpus, validations, scope = prepare(args, project, cache, executor, jobs, profiler)
+
+        counts = Counter()
+        kept = [] if args.watch else None
+        writer.project(project)
+        for validator, output, issues in iter_validators(validations, executor, scope, profiler):
+            writer.validator(validator, output, issues)
+            counts.update(issue["severity"] for issue in issues)
+            if kept is not None:
+                kept.extend(issues)
+        writer.end_project(project, counts)
+        totals.update(counts)
+    writer.finish(totals)
+
+    if profiler.enabled:
+        with redirect_stdout(log):
+            print_section("PERFIL DE EJECUCIÓN")
+            if executor is not None:
+                print("(el parseo ocurrió en workers: sus tokenizaciones no se cuentan aquí)\n")
+            profiler.report()
+
+    if args.watch:
+        totals = Counter(issue["severity"] for issue in watch(args, corpus, kept, cache))
+    return totals
+
+def print_header(projects):
+    target = f"BASE DE DATOS {projects[0].name.upper()}" if len(projects) == 1 else f"{len(projects)} PROYECTOS"
+    print(f"\n{Colors.BOLD}VALIDACIÓN EXHAUSTIVA DE INTEGRIDAD - {target}{Colors.ENDC}")
+    print(f"{Colors.BOLD}Fecha: 2025-11-07{Colors.ENDC}")
+    if any(project.rules for project in projects):
+        print(f"{Colors.BOLD}Post-correcciones: 9/142 completadas{Colors.ENDC}")
+    print()
+
+def prepare(args, project, cache=None, executor=None, jobs=1, profiler=None):
+    """Carga del corpus de un proyecto y lista de validaciones"""
+    # Extraer información (un solo recorrido del árbol DDL)
+    print("Extrayendo información de la base de datos...")
+    profiler = profiler or Profiler()
+    with profiler.phase("load_corpus"):
+        corpus = load_corpus(project.root, executor, jobs, cache, project.include)
+    if cache is not None:
+        cache.save()
+    validations, enums, tables, graph = build_validations(corpus, profiler, project.rules)
+
+    print(f"✓ {len(corpus.files)} archivos SQL leídos en {len(corpus.schemas)} schemas "
+          f"({corpus.parsed_count} re-parseados)")
+
+    scope = None
+    if args.since:
+        scope = change_scope(corpus, args.since, graph)
+        print(f"✓ {len(scope.files)} archivos cambiados desde {args.since} "
+              f"({len(scope.objects)} objetos afectados)")
+
+    print(f"✓ {len(enums)} ENUMs encontrados")
+    print(f"✓ {len(tables)} tablas encontradas")
+    print(f"✓ {len(graph.nodes)} objetos en el grafo de dependencias ({graph.edge_count()} dependencias)")
+
+    # Las validaciones son independientes entre sí
+    return corpus, validations, scope
 
 if __name__ == "__main__":
-    issues = main()
+    sys.exit(main())
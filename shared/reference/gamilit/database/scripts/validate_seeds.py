@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Validación de los seeds de GAMILIT contra el DDL, sin base de datos
+
+Cruza cada INSERT de seeds/{dev,staging,prod}/**/*.sql con el índice de
+tablas y ENUMs del DDL antes de que create-database.sh pase minutos
+construyendo el schema para descubrir el error:
+
+- la tabla y cada columna de la lista del INSERT existen
+- cada fila de VALUES tiene tantos valores como columnas
+- los literales casteados a un ENUM ('welcome_bonus'::gamification_system.transaction_type)
+  y los literales insertados en columnas ENUM son valores del ENUM
+- los literales de columnas o casts uuid son UUIDs válidos
+- las columnas NOT NULL sin DEFAULT reciben un valor que no es NULL
+  (MEDIO si la tabla tiene un trigger BEFORE INSERT que podría completarlo)
+
+Los archivos se leen en streaming (un INSERT a la vez) y se validan en
+paralelo con -j; el índice del DDL se envía una sola vez a cada worker.
+
+Uso:
+    python3 scripts/validate_seeds.py                  # todos los ambientes
+    python3 scripts/validate_seeds.py --env prod -j 0
+Fecha: 2025-11-10
+"""
+
+import argparse
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ddl_corpus import DDLCorpus, qualify
+from ddl_graph import DDLGraph, search_path_of
+from seed_parser import (DEFAULT, DEFAULT_SEEDS, ENVIRONMENTS, LITERAL, NULL, SeedFile, SeedInsert, iter_inserts,
+                         read_seed, seed_files)
+
+UUID_PATTERN = re.compile(r"\{?[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}\}?", re.IGNORECASE)
+
+
+@dataclass
+class SeedColumn:
+    type: str                       # tipo como está en el DDL, en minúsculas
+    enum: Optional[str] = None      # ENUM calificado si el tipo es un ENUM del build
+    not_null: bool = False
+    has_default: bool = False
+
+
+@dataclass
+class SeedTable:
+    name: str
+    file: str
+    line: int
+    columns: Dict[str, SeedColumn] = field(default_factory=dict)   # en el orden del DDL
+    before_insert: bool = False     # tiene triggers BEFORE INSERT (pueden completar columnas)
+    primary_key: List[str] = field(default_factory=list)
+
+
+@dataclass
+class SeedSchema:
+    """Lo que los seeds necesitan saber del DDL: tablas con sus columnas y valores de cada ENUM"""
+    tables: Dict[str, SeedTable] = field(default_factory=dict)
+    enums: Dict[str, List[str]] = field(default_factory=dict)
+
+    def table(self, insert: SeedInsert) -> Optional[SeedTable]:
+        for name in insert.candidates() + [qualify(insert.table, "public")]:
+            if name in self.tables:
+                return self.tables[name]
+        return None
+
+    def enum(self, type_text: str, search_path) -> Optional[str]:
+        """ENUM calificado al que se refiere `type_text` (None si no es un ENUM del build)"""
+        if type_text in self.enums:
+            return type_text
+        if "." in type_text:
+            return None
+        for schema in list(search_path) + ["public"]:
+            if qualify(type_text, schema) in self.enums:
+                return qualify(type_text, schema)
+        return None
+
+
+def build_schema(corpus: DDLCorpus, graph: DDLGraph) -> SeedSchema:
+    """Índice de tablas y ENUMs de los archivos del build"""
+    schema = SeedSchema()
+    for sql_file in corpus.files:
+        if sql_file.live:
+            for name, values, _ in sql_file.facts["enums"]:
+                schema.enums[qualify(name, sql_file.schema).lower()] = values
+    for node in graph.nodes.values():
+        if node.kind == "table":
+            schema.tables[node.name] = SeedTable(node.name, node.file, node.line)
+
+    for sql_file in corpus.files:
+        if not sql_file.live:
+            continue
+        search_path = search_path_of(sql_file)
+        # Un CREATE TABLE posterior (tras DROP TABLE ... CASCADE) reemplaza las columnas anteriores
+        for table, _ in sql_file.facts["tables"]:
+            seed_table = schema.tables.get(qualify(table, sql_file.schema))
+            if seed_table is not None:
+                seed_table.columns = {}
+        for table, column, type_text, _, not_null, has_default in sql_file.facts["columns"]:
+            seed_table = schema.tables.get(qualify(table, sql_file.schema))
+            if seed_table is None:
+                continue
+            type_text = type_text.lower()
+            seed_table.columns[column.lower()] = SeedColumn(type_text, schema.enum(type_text, search_path),
+                                                            not_null, has_default)
+        for table, columns, kind, _ in sql_file.facts["keys"]:
+            seed_table = schema.tables.get(qualify(table, sql_file.schema))
+            if seed_table is not None and kind == "primary":
+                seed_table.primary_key = [column.lower() for column in columns]
+                for column in seed_table.primary_key:
+                    if column in seed_table.columns:
+                        seed_table.columns[column].not_null = True
+
+    for node in graph.nodes.values():
+        if (node.kind == "trigger" and node.table in schema.tables and node.data.get("timing") == "BEFORE"
+                and "INSERT" in node.data.get("events", [])):
+            schema.tables[node.table].before_insert = True
+    return schema
+
+
+def _issue(severity, type_, path, line, obj, message):
+    return {"severity": severity, "type": type_, "file": path, "line": line, "object": obj, "message": message}
+
+
+def check_insert(schema: SeedSchema, insert: SeedInsert, path: str) -> List[dict]:
+    """Issues de un INSERT; los que se repiten en varias filas se reportan una vez con el conteo"""
+    table = schema.table(insert)
+    if table is None:
+        return [_issue("CRÍTICO", "SEED_UNKNOWN_TABLE", path, insert.line, insert.table,
+                       f"INSERT en {insert.table}, que no existe en el DDL (search_path: {', '.join(insert.search_path)})")]
+    issues = []
+    columns = insert.columns if insert.columns is not None else list(table.columns)
+    unknown = [column for column in columns if column not in table.columns]
+    for column in unknown:
+        issues.append(_issue("CRÍTICO", "SEED_UNKNOWN_COLUMN", path, insert.line, f"{table.name}.{column}",
+                             f"{table.name} no tiene la columna {column}"))
+
+    # NOT NULL sin DEFAULT omitidas en la lista de columnas
+    not_null = "MEDIO" if table.before_insert else "CRÍTICO"
+    trigger_note = " (la tabla tiene triggers BEFORE INSERT que podrían completarla)" if table.before_insert else ""
+    if insert.columns is not None:
+        for name, column in table.columns.items():
+            if column.not_null and not column.has_default and name not in insert.columns:
+                issues.append(_issue(not_null, "SEED_NOT_NULL", path, insert.line, f"{table.name}.{name}",
+                                     f"{table.name}.{name} es NOT NULL sin DEFAULT y el INSERT no la incluye"
+                                     f"{trigger_note}"))
+
+    found = {}
+    counts = Counter()
+
+    def report(key, severity, type_, line, obj, message):
+        counts[key] += 1
+        if key not in found:
+            found[key] = _issue(severity, type_, path, line, obj, message)
+
+    for row in insert.rows:
+        if row and len(row) != len(columns):
+            report(("arity", len(row)), "CRÍTICO", "SEED_ROW_ARITY", row[0].line, table.name,
+                   f"Fila de {len(row)} valores para {len(columns)} columnas de {table.name}")
+            continue
+        for name, value in zip(columns, row):
+            column = table.columns.get(name)
+            if column is None:
+                continue
+            target = f"{table.name}.{name}"
+            if value.kind == NULL and column.not_null:
+                report(("null", name), not_null, "SEED_NOT_NULL", value.line, target,
+                       f"NULL en {target}, que es NOT NULL{trigger_note}")
+            elif value.kind == DEFAULT and column.not_null and not column.has_default:
+                report(("default", name), not_null, "SEED_NOT_NULL", value.line, target,
+                       f"DEFAULT en {target}, que es NOT NULL sin DEFAULT{trigger_note}")
+            if value.kind != LITERAL or not value.quoted:
+                continue
+            enum = schema.enum(value.cast, insert.search_path) if value.cast else column.enum
+            if enum is not None and value.value not in schema.enums[enum]:
+                report(("enum", name, value.value), "CRÍTICO", "SEED_ENUM_VALUE", value.line, target,
+                       f"'{value.value}' no es un valor de {enum} (columna {target})")
+            elif (value.cast or column.type) == "uuid" and not UUID_PATTERN.fullmatch(value.value):
+                report(("uuid", name), "CRÍTICO", "SEED_INVALID_LITERAL", value.line, target,
+                       f"'{value.value}' no es un uuid válido (columna {target})")
+
+    for key, issue in found.items():
+        if counts[key] > 1:
+            issue["message"] += f" ({counts[key]} filas)"
+        issues.append(issue)
+    return issues
+
+
+# Índice del DDL en cada worker (se envía una vez por proceso, no por archivo)
+_SCHEMA: Optional[SeedSchema] = None
+
+
+def _init_worker(schema: SeedSchema):
+    global _SCHEMA
+    _SCHEMA = schema
+
+
+def check_file(seed_file: SeedFile) -> List[dict]:
+    path = str(seed_file.path)
+    issues = []
+    for insert in iter_inserts(read_seed(seed_file.path), seed_file.schema):
+        issues += check_insert(_SCHEMA, insert, path)
+    return issues
+
+
+def validate_seeds(schema: SeedSchema, files: List[SeedFile], jobs: int = 1) -> Dict[str, List[dict]]:
+    """Issues por ambiente, en el orden de los archivos"""
+    if jobs > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(schema,)) as executor:
+            results = list(executor.map(check_file, files, chunksize=max(1, len(files) // (jobs * 4))))
+    else:
+        _init_worker(schema)
+        results = [check_file(seed_file) for seed_file in files]
+    issues = {}
+    for seed_file, file_issues in zip(files, results):
+        issues.setdefault(seed_file.environment, []).extend(file_issues)
+    return issues
+
+
+# CLI
+def parse_args(argv=None):
+    from validate_integrity import severity_threshold
+
+    parser = argparse.ArgumentParser(description="Validación de los seeds de GAMILIT contra el DDL")
+    parser.add_argument("--ddl", type=Path, help="Directorio ddl/ (default: el de validate_integrity.py)")
+    parser.add_argument("--seeds", type=Path, default=DEFAULT_SEEDS, help="Directorio seeds/ (default: %(default)s)")
+    parser.add_argument("--env", action="append", choices=ENVIRONMENTS,
+                        help="Ambiente a validar (repetible; default: todos)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Procesos para validar archivos en paralelo (0 = todos los núcleos, default: 1)")
+    parser.add_argument("--fail-on", type=severity_threshold, default="CRÍTICO", metavar="SEVERIDAD",
+                        help="Salir con código 1 si hay issues de esta severidad o mayor (default: CRÍTICO)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from ddl_cache import DEFAULT_CACHE_FILE, FactsCache
+    from ddl_corpus import load_corpus
+    from ddl_graph import build_graph
+    from issue_formats import SEVERITIES, exceeds_threshold
+    from validate_integrity import BASE_PATH, print_counts, print_section, report_issues
+
+    args = parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    cache = FactsCache(DEFAULT_CACHE_FILE)
+    corpus = load_corpus(args.ddl or BASE_PATH, cache=cache)
+    cache.save()
+    schema = build_schema(corpus, build_graph(corpus))
+
+    environments = args.env or list(ENVIRONMENTS)
+    files = seed_files(args.seeds, environments)
+    issues = validate_seeds(schema, files, jobs)
+
+    counts = Counter({severity: 0 for severity in SEVERITIES})
+    for environment in environments:
+        env_files = sum(1 for seed_file in files if seed_file.environment == environment)
+        print_section(f"SEEDS: {environment} ({env_files} archivos)")
+        env_issues = issues.get(environment, [])
+        report_issues(env_issues, f"Los seeds de {environment} coinciden con el DDL")
+        counts.update(issue["severity"] for issue in env_issues)
+
+    print_section("RESUMEN DE SEEDS")
+    print_counts(counts, "SEEDS VALIDADOS EXITOSAMENTE")
+    return 1 if exceeds_threshold(counts, args.fail_on) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,119 +1,229 @@
 #!/usr/bin/env python3
 """
 Script para corregir la unificación PROD ↔ DEV
+
+Descubre cada seed de seeds/prod/ y su contraparte (misma ruta relativa) en
+seeds/dev/ (y seeds/staging/ con --env staging) y copia solo cuando los
+sha256 difieren. Los hashes se guardan en un manifiesto por ambiente
+(scripts/.cache/seeds-<env>.json), así que una sincronización solo lee los
+archivos que cambiaron y no toca el mtime de los que ya están iguales.
+
+Un archivo del ambiente que difiere de PROD se actualiza solo si sigue siendo
+la copia que dejó la última sincronización; si fue editado a propósito (p.ej.
+los tenants o usuarios de prueba de dev) se reporta como divergente y se
+conserva, salvo que se pase --force o su ruta explícita. Sin historial en el
+manifiesto (un clon nuevo), los seeds de UNIFIED_SEEDS se actualizan como
+antes y los demás se reportan sin tocarlos.
+
+Solo se crean en el ambiente los seeds faltantes de UNIFIED_SEEDS, los pedidos
+por ruta y, con --create-missing, el resto. Los seeds de producción
+(*production*, *DEPRECATED*) nunca se copian.
+
+Uso:
+    python3 sync-prod-dev.py --dry-run          # solo mostrar el plan
+    python3 sync-prod-dev.py --env dev --env staging
+    python3 sync-prod-dev.py --force auth/01-demo-users.sql
+    python3 sync-prod-dev.py --create-missing   # crear también los demás seeds que faltan
+Fecha: 2025-11-10
 """
 
-import os
-import shutil
+import argparse
+import sys
 from pathlib import Path
 
+DATABASE_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(DATABASE_ROOT / "scripts"))
+
+from seed_manifest import (SOURCE_ENVIRONMENT, UNIFIED_SEEDS, SeedManifest, atomic_copy,  # noqa: E402
+                           discover_pairs, production_only)
+from tree_snapshot import save_snapshot, snapshot  # noqa: E402
+
 GREEN = '\033[0;32m'
 RED = '\033[0;31m'
 YELLOW = '\033[1;33m'
 NC = '\033[0m'
 
-print("=" * 75)
-print("CORRECCIÓN DE UNIFICACIÓN PROD ↔ DEV")
-print("=" * 75)
-print()
-
-actions_taken = []
-
-# 1. Sincronizar archivos desincronizados (PROD → DEV)
-print("1. SINCRONIZANDO ARCHIVOS PROD → DEV")
-print("-" * 75)
-
-sync_files = [
-    ("seeds/prod/educational_content/01-modules.sql", "seeds/dev/educational_content/01-modules.sql"),
-    ("seeds/prod/gamification_system/01-achievement_categories.sql", "seeds/dev/gamification_system/01-achievement_categories.sql"),
-    ("seeds/prod/auth/01-demo-users.sql", "seeds/dev/auth/01-demo-users.sql"),
-]
-
-for prod_file, dev_file in sync_files:
-    if os.path.exists(prod_file):
-        os.makedirs(os.path.dirname(dev_file), exist_ok=True)
-        shutil.copy2(prod_file, dev_file)
-        print(f"{GREEN}✓{NC} Copiado: {prod_file} → {dev_file}")
-        actions_taken.append(f"Sincronizado: {os.path.basename(dev_file)}")
-    else:
-        print(f"{RED}✗{NC} PROD no existe: {prod_file}")
-
-# 2. Copiar archivos faltantes en DEV
-print()
-print("2. COPIANDO ARCHIVOS FALTANTES PROD → DEV")
-print("-" * 75)
-
-missing_in_dev = [
-    ("seeds/prod/gamification_system/02-leaderboard_metadata.sql", "seeds/dev/gamification_system/02-leaderboard_metadata.sql"),
-    ("seeds/prod/gamification_system/03-maya_ranks.sql", "seeds/dev/gamification_system/03-maya_ranks.sql"),
-    ("seeds/prod/gamification_system/04-achievements.sql", "seeds/dev/gamification_system/04-achievements.sql"),
-]
-
-for prod_file, dev_file in missing_in_dev:
-    if os.path.exists(prod_file):
-        os.makedirs(os.path.dirname(dev_file), exist_ok=True)
-        shutil.copy2(prod_file, dev_file)
-        print(f"{GREEN}✓{NC} Copiado: {prod_file} → {dev_file}")
-        actions_taken.append(f"Creado: {os.path.basename(dev_file)}")
-    else:
-        print(f"{YELLOW}⚠{NC}  PROD no existe: {prod_file}")
-
-# 3. Copiar archivos faltantes en educational_content (si existen)
-print()
-print("3. VERIFICANDO educational_content ADICIONALES")
-print("-" * 75)
-
-additional_files = [
-    ("seeds/prod/educational_content/07-assessment-rubrics.sql", "seeds/dev/educational_content/07-assessment-rubrics.sql"),
-    ("seeds/prod/educational_content/08-difficulty_criteria.sql", "seeds/dev/educational_content/08-difficulty_criteria.sql"),
-    ("seeds/prod/educational_content/09-exercise_mechanic_mapping.sql", "seeds/dev/educational_content/09-exercise_mechanic_mapping.sql"),
-]
-
-for prod_file, dev_file in additional_files:
-    if os.path.exists(prod_file):
-        os.makedirs(os.path.dirname(dev_file), exist_ok=True)
-        shutil.copy2(prod_file, dev_file)
-        print(f"{GREEN}✓{NC} Copiado: {prod_file} → {dev_file}")
-        actions_taken.append(f"Creado: {os.path.basename(dev_file)}")
-    else:
-        print(f"{YELLOW}⚠{NC}  PROD no existe (OK si no se usa): {prod_file}")
+SEEDS_PATH = DATABASE_ROOT / "seeds"
+TARGETS = ("dev", "staging")
+
+# Acciones del plan
+SYNCED = "sincronizado"
+UPDATE = "actualizar"
+CREATE = "crear"
+DIVERGENT = "divergente"
+UNKNOWN = "sin historial"
+
+
+def plan_sync(manifests, pairs, force=False, paths=(), create_missing=False):
+    """(acción, par, sha256 de PROD) por cada contraparte; no escribe nada"""
+    source = manifests[SOURCE_ENVIRONMENT]
+    plan = []
+    for pair in pairs:
+        if not pair.in_source or (paths and pair.relative not in paths) or production_only(pair.relative):
+            continue
+        source_digest = source.digest(pair.relative)
+        if not pair.in_target:
+            if create_missing or pair.relative in UNIFIED_SEEDS or pair.relative in paths:
+                plan.append((CREATE, pair, source_digest))
+            continue
+        target = manifests[pair.target].entry(pair.relative)
+        if target.sha256 == source_digest:
+            action = SYNCED
+        elif target.synced_from == target.sha256 or force or pair.relative in paths:
+            # Sigue siendo la copia de la última sincronización (o se pidió explícitamente)
+            action = UPDATE
+        elif target.synced_from is None:
+            # Sin historial (clon nuevo): los seeds unificados se sincronizan como siempre
+            action = UPDATE if pair.relative in UNIFIED_SEEDS else UNKNOWN
+        else:
+            action = DIVERGENT
+        plan.append((action, pair, source_digest))
+    return plan
+
+
+def apply_plan(manifests, plan):
+    """Copia lo necesario y registra en el manifiesto qué versión de PROD tiene cada archivo"""
+    actions = []
+    for action, pair, source_digest in plan:
+        if action in (CREATE, UPDATE):
+            source_file = SEEDS_PATH / SOURCE_ENVIRONMENT / pair.relative
+            target_file = SEEDS_PATH / pair.target / pair.relative
+            try:
+                atomic_copy(source_file, target_file)
+            except OSError as e:
+                print(f"{RED}✗{NC} Error copiando {pair.relative} → {pair.target}: {e}")
+                continue
+            print(f"{GREEN}✓{NC} Copiado: seeds/prod/{pair.relative} → seeds/{pair.target}/{pair.relative}")
+            actions.append(f"{'Creado' if action == CREATE else 'Sincronizado'}: {pair.target}/{pair.relative}")
+        if action in (SYNCED, CREATE, UPDATE):
+            manifests[pair.target].mark_synced(pair.relative, source_digest)
+    return actions
+
+
+def print_plan(plan):
+    counts = {}
+    for action, pair, _ in plan:
+        counts[action] = counts.get(action, 0) + 1
+        if action == SYNCED:
+            continue
+        color = YELLOW if action in (DIVERGENT, UNKNOWN) else GREEN
+        print(f"{color}{action:>12}{NC}  seeds/{pair.target}/{pair.relative}")
+    if not any(action != SYNCED for action, _, _ in plan):
+        print(f"{GREEN}✓{NC} Todos los archivos están sincronizados")
+    print()
+    print("  " + ", ".join(f"{count} {action}" for action, count in sorted(counts.items())))
+    if counts.get(DIVERGENT):
+        print(f"{YELLOW}⚠{NC}  Los divergentes se editaron en el ambiente; usar --force o su ruta para sobrescribirlos")
+    if counts.get(UNKNOWN):
+        print(f"{YELLOW}⚠{NC}  Los que no tienen historial de sincronización se conservan; "
+              "usar --force o su ruta para sobrescribirlos")
+
+
+def delete_temp_files(dry_run=False):
+    """Elimina los temporales del snapshot y lo deja guardado para verify-unification.py"""
+    tree = snapshot(DATABASE_ROOT, save=not dry_run)
+    deleted = []
+    for path in tree.category("temp"):
+        if dry_run:
+            print(f"{YELLOW}⚠{NC}  Se eliminaría: {path}")
+            continue
+        try:
+            (DATABASE_ROOT / path).unlink()
+            print(f"{GREEN}✓{NC} Eliminado: {path}")
+            deleted.append(path)
+        except Exception as e:
+            print(f"{RED}✗{NC} Error eliminando {path}: {e}")
+    if deleted:
+        tree.discard(deleted)
+        save_snapshot(tree)
+    return len(deleted)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sincroniza los seeds de PROD con sus contrapartes de DEV/staging")
+    parser.add_argument("paths", nargs="*",
+                        help="Rutas relativas a seeds/prod/ a sincronizar aunque hayan divergido (default: todas)")
+    parser.add_argument("--env", action="append", choices=TARGETS,
+                        help="Ambiente destino (repetible; default: dev)")
+    parser.add_argument("--dry-run", action="store_true", help="Mostrar el plan sin escribir nada")
+    parser.add_argument("--force", action="store_true", help="Sobrescribir también los archivos divergentes")
+    parser.add_argument("--create-missing", action="store_true",
+                        help="Crear en el ambiente todos los seeds que solo existen en PROD "
+                             "(default: solo los de UNIFIED_SEEDS; los de producción nunca)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    targets = args.env or ["dev"]
+    paths = {Path(path).as_posix().removeprefix("seeds/prod/") for path in args.paths}
+
+    print("=" * 75)
+    print("CORRECCIÓN DE UNIFICACIÓN PROD ↔ " + " / ".join(env.upper() for env in targets)
+          + (" (dry-run)" if args.dry_run else ""))
+    print("=" * 75)
+    print()
 
-# 4. Eliminar archivos temporales
-print()
-print("4. ELIMINANDO ARCHIVOS TEMPORALES")
-print("-" * 75)
+    manifests = {env: SeedManifest(env, SEEDS_PATH) for env in [SOURCE_ENVIRONMENT] + targets}
+    plan = plan_sync(manifests, discover_pairs(SEEDS_PATH, targets), args.force, paths, args.create_missing)
+    if paths - {pair.relative for _, pair, _ in plan}:
+        for path in sorted(paths - {pair.relative for _, pair, _ in plan}):
+            if production_only(path):
+                print(f"{RED}✗{NC} Seed de producción, no se copia a otros ambientes: seeds/prod/{path}")
+            else:
+                print(f"{RED}✗{NC} PROD no existe: seeds/prod/{path}")
+        print()
+
+    # 1. Plan de sincronización
+    print("1. PLAN DE SINCRONIZACIÓN PROD → " + " / ".join(env.upper() for env in targets))
+    print("-" * 75)
+    print_plan(plan)
+    hashed = sum(manifest.hashed for manifest in manifests.values())
+    print(f"  {hashed} archivos leídos (el resto coincidía con el manifiesto)")
+
+    actions_taken = []
+    if not args.dry_run:
+        # 2. Copias atómicas de lo que cambió
+        print()
+        print("2. COPIANDO ARCHIVOS PROD → " + " / ".join(env.upper() for env in targets))
+        print("-" * 75)
+        actions_taken = apply_plan(manifests, plan)
+        if not actions_taken:
+            print(f"{GREEN}✓{NC} No hubo nada que copiar")
+        for manifest in manifests.values():
+            manifest.save()
+
+    # 3. Eliminar archivos temporales
+    print()
+    print("3. ELIMINANDO ARCHIVOS TEMPORALES")
+    print("-" * 75)
+    deleted_count = delete_temp_files(args.dry_run)
+    if deleted_count == 0 and not args.dry_run:
+        print(f"{GREEN}✓{NC} No se encontraron archivos temporales")
+    elif deleted_count:
+        actions_taken.append(f"Eliminados {deleted_count} archivos temporales")
+
+    # Resumen
+    print()
+    print("=" * 75)
+    print("RESUMEN DE ACCIONES")
+    print("=" * 75)
+    print()
 
-temp_patterns = ["**/*.bak", "**/*~", "**/*.tmp"]
-deleted_count = 0
+    if args.dry_run:
+        print(f"{YELLOW}⚠{NC}  Dry-run: no se modificó ningún archivo")
+    elif actions_taken:
+        for action in actions_taken:
+            print(f"  • {action}")
+        print()
+        print(f"{GREEN}✅ Se realizaron {len(actions_taken)} acciones de corrección{NC}")
+    else:
+        print(f"{GREEN}✅ No se necesitaron correcciones{NC}")
 
-for pattern in temp_patterns:
-    for temp_file in Path(".").glob(pattern):
-        try:
-            temp_file.unlink()
-            print(f"{GREEN}✓{NC} Eliminado: {temp_file}")
-            deleted_count += 1
-        except Exception as e:
-            print(f"{RED}✗{NC} Error eliminando {temp_file}: {e}")
-
-if deleted_count == 0:
-    print(f"{GREEN}✓{NC} No se encontraron archivos temporales")
-else:
-    actions_taken.append(f"Eliminados {deleted_count} archivos temporales")
-
-# Resumen
-print()
-print("=" * 75)
-print("RESUMEN DE ACCIONES")
-print("=" * 75)
-print()
-
-if actions_taken:
-    for action in actions_taken:
-        print(f"  • {action}")
     print()
-    print(f"{GREEN}✅ Se realizaron {len(actions_taken)} acciones de corrección{NC}")
-else:
-    print(f"{GREEN}✅ No se necesitaron correcciones{NC}")
+    print("Ejecuta verify-unification.py nuevamente para verificar")
+    return 0
+
 
-print()
-print("Ejecuta verify-unification.py nuevamente para verificar")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,12 +2,35 @@
 """
 Script de verificación de unificación PROD ↔ DEV
 y preparación para carga inicial limpia
+
+Compara cada seed de seeds/prod/ con su contraparte (misma ruta relativa) en
+seeds/dev/ (y seeds/staging/ con --env staging); los pares se descubren
+recorriendo seeds/, así que un seed nuevo ya no queda fuera de la
+verificación. Los sha256 salen del manifiesto que comparte con
+sync-prod-dev.py (scripts/.cache/seeds-<env>.json): un archivo cuyo tamaño y
+mtime no cambiaron no se vuelve a leer, y los que sí cambiaron se hashean en
+paralelo con un pool de threads.
+
+Uso:
+    python3 verify-unification.py
+    python3 verify-unification.py --env dev --env staging --allow-divergent
+    python3 verify-unification.py --diff        # qué filas difieren en cada archivo desincronizado
+Fecha: 2025-11-10
 """
 
+import argparse
 import os
-import filecmp
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+DATABASE_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(DATABASE_ROOT / "scripts"))
+
+from seed_manifest import (SOURCE_ENVIRONMENT, UNIFIED_SEEDS, SeedManifest, discover_pairs,  # noqa: E402
+                           production_only)
+from tree_snapshot import PATTERNS, snapshot  # noqa: E402
+
 # Colores
 GREEN = '\033[0;32m'
 RED = '\033[0;31m'
@@ -15,135 +38,12 @@ YELLOW = '\033[1;33m'
 BLUE = '\033[0;34m'
 NC = '\033[0m'  # No Color
 
-total_checks = 0
-passed_checks = 0
-failed_checks = 0
-warnings = []
-
-def compare_files(prod_file, dev_file, name):
-    """Compara un archivo PROD con DEV"""
-    global total_checks, passed_checks, failed_checks
-
-    total_checks += 1
-
-    if not os.path.exists(prod_file):
-        print(f"{RED}✗{NC} {name} - PROD no existe: {prod_file}")
-        failed_checks += 1
-        return False
-
-    if not os.path.exists(dev_file):
-        print(f"{RED}✗{NC} {name} - DEV no existe: {dev_file}")
-        failed_checks += 1
-        return False
-
-    if filecmp.cmp(prod_file, dev_file, shallow=False):
-        print(f"{GREEN}✓{NC} {name} - Sincronizado")
-        passed_checks += 1
-        return True
-    else:
-        print(f"{RED}✗{NC} {name} - DESINCRONIZADO")
-        failed_checks += 1
-        return False
-
-def check_file_exists(file_path, name):
-    """Verifica que un archivo exista"""
-    global total_checks, passed_checks, failed_checks
+SEEDS_PATH = DATABASE_ROOT / "seeds"
+TARGETS = ("dev", "staging")
+# Segundos durante los que se reutiliza el snapshot de sync-prod-dev.py (--rescan lo ignora)
+SNAPSHOT_MAX_AGE = 60
 
-    total_checks += 1
-
-    if os.path.exists(file_path):
-        print(f"{GREEN}✓{NC} {name} existe")
-        passed_checks += 1
-        return True
-    else:
-        print(f"{RED}✗{NC} {name} NO EXISTE")
-        failed_checks += 1
-        return False
-
-print("=" * 75)
-print("VERIFICACIÓN DE UNIFICACIÓN PROD ↔ DEV")
-print("=" * 75)
-print()
-
-# 1. SEEDS EDUCATIONAL_CONTENT
-print("1. VERIFICANDO SEEDS EDUCATIONAL_CONTENT")
-print("-" * 75)
-
-compare_files(
-    "seeds/prod/educational_content/01-modules.sql",
-    "seeds/dev/educational_content/01-modules.sql",
-    "Modules"
-)
-
-for i in range(1, 6):
-    module_num = str(i + 1).zfill(2)
-    compare_files(
-        f"seeds/prod/educational_content/{module_num}-exercises-module{i}.sql",
-        f"seeds/dev/educational_content/{module_num}-exercises-module{i}.sql",
-        f"Exercises Module {i}"
-    )
-
-compare_files(
-    "seeds/prod/educational_content/07-assessment-rubrics.sql",
-    "seeds/dev/educational_content/07-assessment-rubrics.sql",
-    "Assessment Rubrics"
-)
-
-compare_files(
-    "seeds/prod/educational_content/08-difficulty_criteria.sql",
-    "seeds/dev/educational_content/08-difficulty_criteria.sql",
-    "Difficulty Criteria"
-)
-
-compare_files(
-    "seeds/prod/educational_content/09-exercise_mechanic_mapping.sql",
-    "seeds/dev/educational_content/09-exercise_mechanic_mapping.sql",
-    "Exercise Mechanic Mapping"
-)
-
-print()
-print("2. VERIFICANDO SEEDS GAMIFICATION_SYSTEM")
-print("-" * 75)
-
-compare_files(
-    "seeds/prod/gamification_system/01-achievement_categories.sql",
-    "seeds/dev/gamification_system/01-achievement_categories.sql",
-    "Achievement Categories"
-)
-
-compare_files(
-    "seeds/prod/gamification_system/02-leaderboard_metadata.sql",
-    "seeds/dev/gamification_system/02-leaderboard_metadata.sql",
-    "Leaderboard Metadata"
-)
-
-compare_files(
-    "seeds/prod/gamification_system/03-maya_ranks.sql",
-    "seeds/dev/gamification_system/03-maya_ranks.sql",
-    "Maya Ranks"
-)
-
-compare_files(
-    "seeds/prod/gamification_system/04-achievements.sql",
-    "seeds/dev/gamification_system/04-achievements.sql",
-    "Achievements"
-)
-
-print()
-print("3. VERIFICANDO SEEDS AUTH")
-print("-" * 75)
-
-compare_files(
-    "seeds/prod/auth/01-demo-users.sql",
-    "seeds/dev/auth/01-demo-users.sql",
-    "Demo Users"
-)
-
-print()
-print("4. VERIFICANDO ARCHIVOS CRÍTICOS DDL")
-print("-" * 75)
-
-critical_ddl = [
+CRITICAL_DDL = [
     ("ddl/schemas/educational_content/tables/01-modules.sql", "Modules Table DDL"),
     ("ddl/schemas/educational_content/tables/02-exercises.sql", "Exercises Table DDL"),
     ("ddl/schemas/gamification_system/tables/13-maya_ranks.sql", "Maya Ranks Table DDL"),
@@ -151,88 +51,242 @@ critical_ddl = [
     ("ddl/schemas/educational_content/tables/03-assessment_rubrics.sql", "Assessment Rubrics DDL"),
 ]
 
-for file_path, name in critical_ddl:
-    check_file_exists(file_path, name)
 
-print()
-print("5. VERIFICANDO SCRIPT create-database.sh")
-print("-" * 75)
+class Checks:
+    """Contadores de la verificación"""
+
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.warnings = []
+
+    def ok(self, message):
+        self.total += 1
+        self.passed += 1
+        print(f"{GREEN}✓{NC} {message}")
+
+    def fail(self, message):
+        self.total += 1
+        self.failed += 1
+        print(f"{RED}✗{NC} {message}")
+
+    def warn(self, message, summary=None):
+        print(f"{YELLOW}⚠{NC}  {message}")
+        self.warnings.append(summary or message)
+
+
+def hash_pairs(manifests, pairs, jobs=None):
+    """sha256 de cada archivo de los pares, leyendo en paralelo solo los que cambiaron"""
+    files = set()
+    for pair in pairs:
+        if pair.in_source:
+            files.add((SOURCE_ENVIRONMENT, pair.relative))
+        if pair.in_target:
+            files.add((pair.target, pair.relative))
+    files = sorted(files)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        entries = executor.map(lambda key: manifests[key[0]].entry(key[1]), files)
+        return dict(zip(files, entries))
+
+
+def compare_pairs(checks, manifests, pairs, allow_divergent=False, jobs=None):
+    """Un check por archivo de PROD; devuelve los pares que difieren
+
+    Los seeds de producción (*production*, *DEPRECATED*) no se comparan. Un seed
+    que existe en un solo lado es advertencia, salvo los de UNIFIED_SEEDS que
+    faltan en el ambiente.
+    """
+    pairs = [pair for pair in pairs if not production_only(pair.relative)]
+    entries = hash_pairs(manifests, pairs, jobs)
+    different = []
+    for pair in pairs:
+        name = f"{pair.target}/{pair.relative}"
+        if not pair.in_source:
+            checks.warn(f"{name} - solo existe en {pair.target.upper()} (sin contraparte en PROD)",
+                        f"Solo en {pair.target.upper()}: {pair.relative}")
+            continue
+        if not pair.in_target:
+            if pair.relative in UNIFIED_SEEDS:
+                checks.fail(f"{name} - {pair.target.upper()} no existe")
+            else:
+                checks.warn(f"{name} - solo existe en PROD (sync-prod-dev.py --create-missing lo crea)",
+                            f"Solo en PROD: {pair.relative}")
+            continue
+        source = entries[(SOURCE_ENVIRONMENT, pair.relative)]
+        target = entries[(pair.target, pair.relative)]
+        if source.sha256 == target.sha256:
+            checks.ok(f"{name} - Sincronizado")
+            continue
+        different.append(pair)
+        if target.synced_from == target.sha256:
+            # Copia sin editar de una versión anterior de PROD: sync-prod-dev.py la actualiza
+            checks.fail(f"{name} - DESINCRONIZADO (PROD cambió desde la última sincronización)")
+        elif allow_divergent:
+            checks.total += 1
+            checks.passed += 1
+            checks.warn(f"{name} - divergente (editado en {pair.target.upper()})",
+                        f"Divergente: {name}")
+        else:
+            checks.fail(f"{name} - DESINCRONIZADO (editado en {pair.target.upper()})")
+    return different
 
-check_file_exists("create-database.sh", "create-database.sh")
 
-if os.path.exists("create-database.sh"):
-    total_checks += 1
-    if os.access("create-database.sh", os.X_OK):
-        print(f"{GREEN}✓{NC} create-database.sh es ejecutable")
-        passed_checks += 1
-    else:
-        print(f"{YELLOW}⚠{NC}  create-database.sh NO es ejecutable (pero existe)")
-        warnings.append("create-database.sh no es ejecutable")
-        passed_checks += 1
-
-    total_checks += 1
-    with open("create-database.sh", "r") as f:
-        content = f.read()
-        if "FASE 16: SEED DATA" in content:
-            print(f"{GREEN}✓{NC} create-database.sh contiene carga de seeds")
-            passed_checks += 1
-        else:
-            print(f"{RED}✗{NC} create-database.sh NO contiene carga de seeds")
-            failed_checks += 1
+def print_row_diffs(pairs):
+    """Resumen por filas (seed_diff.py) de cada par que difiere"""
+    from seed_diff import diff_seeds, load_schema, summary
+    from seed_parser import SeedFile
 
-print()
-print("6. VERIFICANDO ARCHIVOS OBSOLETOS/TEMPORALES")
-print("-" * 75)
+    schema = load_schema()
+    for pair in pairs:
+        source = SeedFile(SEEDS_PATH / SOURCE_ENVIRONMENT / pair.relative, SOURCE_ENVIRONMENT)
+        target = SeedFile(SEEDS_PATH / pair.target / pair.relative, pair.target)
+        changes, _ = diff_seeds(source.path, target.path, source.schema, target.schema, schema)
+        detail = summary(changes) if changes else "mismas filas (solo formato)"
+        print(f"{BLUE}ℹ{NC}  {pair.target}/{pair.relative}: {detail}")
+    if pairs:
+        print("   Detalle: python3 scripts/seed_diff.py <ruta> --to <ambiente>")
 
-# Buscar archivos que NO deberían estar
-obsolete_found = False
 
-# Migraciones (no deberían usarse en carga limpia)
-migration_path = Path("scripts/migrations")
-if migration_path.exists():
-    migrations = list(migration_path.glob("*.sql"))
-    if migrations:
-        print(f"{YELLOW}⚠{NC}  Se encontraron {len(migrations)} archivos de migración")
-        warnings.append(f"{len(migrations)} archivos de migración encontrados")
-        obsolete_found = True
+def check_file_exists(checks, file_path, name):
+    """Verifica que un archivo exista"""
+    if (DATABASE_ROOT / file_path).exists():
+        checks.ok(f"{name} existe")
+        return True
+    checks.fail(f"{name} NO EXISTE")
+    return False
 
-# Archivos temporales
-for pattern in ["**/*~", "**/*.bak", "**/*.tmp"]:
-    temp_files = list(Path(".").glob(pattern))
-    if temp_files:
-        print(f"{YELLOW}⚠{NC}  Archivos temporales encontrados: {pattern}")
-        warnings.append(f"Archivos temporales: {pattern}")
-        obsolete_found = True
 
-if not obsolete_found:
-    print(f"{GREEN}✓{NC} No se encontraron archivos obsoletos")
+def check_create_database(checks):
+    script = DATABASE_ROOT / "create-database.sh"
+    if not check_file_exists(checks, "create-database.sh", "create-database.sh"):
+        return
+    if os.access(script, os.X_OK):
+        checks.ok("create-database.sh es ejecutable")
+    else:
+        checks.total += 1
+        checks.passed += 1
+        checks.warn("create-database.sh NO es ejecutable (pero existe)", "create-database.sh no es ejecutable")
+    if "FASE 16: SEED DATA" in script.read_text():
+        checks.ok("create-database.sh contiene carga de seeds")
+    else:
+        checks.fail("create-database.sh NO contiene carga de seeds")
 
-print()
-print("=" * 75)
-print("RESUMEN")
-print("=" * 75)
-print()
-print(f"Total de verificaciones: {total_checks}")
-print(f"{GREEN}Pasadas: {passed_checks}{NC}")
-print(f"{RED}Fallidas: {failed_checks}{NC}")
 
-if warnings:
-    print(f"{YELLOW}Advertencias: {len(warnings)}{NC}")
-    for warning in warnings:
-        print(f"  - {warning}")
+def check_obsolete(checks, max_age=SNAPSHOT_MAX_AGE):
+    """Archivos que NO deberían estar en una carga limpia (un solo recorrido del árbol)"""
+    tree = snapshot(DATABASE_ROOT, max_age)
+    obsolete_found = False
 
-print()
+    # Migraciones (no deberían usarse en carga limpia)
+    migrations = tree.category("migrations")
+    if migrations:
+        checks.warn(f"Se encontraron {len(migrations)} archivos de migración: {', '.join(migrations)}",
+                    f"{len(migrations)} archivos de migración encontrados")
+        obsolete_found = True
 
-if failed_checks == 0:
-    print(f"{GREEN}✅ TODOS LOS CHECKS PASARON{NC}")
-    print(f"{GREEN}✅ Sistema listo para carga inicial limpia{NC}")
+    # Archivos temporales
+    for pattern in PATTERNS["temp"]:
+        if tree.matches[pattern]:
+            checks.warn(f"Archivos temporales encontrados: {pattern} ({', '.join(tree.matches[pattern])})",
+                        f"Archivos temporales: {pattern}")
+            obsolete_found = True
+
+    # Seeds retirados: no se cargan, candidatos a limpieza
+    if tree.archived:
+        checks.warn(f"{len(tree.archived)} seeds en _backlog/_deprecated (candidatos a limpieza; "
+                    "ver scripts/tree_snapshot.py)", f"{len(tree.archived)} seeds en _backlog/_deprecated")
+        obsolete_found = True
 
-    if warnings:
+    if not obsolete_found:
+        print(f"{GREEN}✓{NC} No se encontraron archivos obsoletos")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Verificación de unificación de seeds PROD ↔ DEV/staging")
+    parser.add_argument("--env", action="append", choices=TARGETS,
+                        help="Ambiente a comparar con PROD (repetible; default: dev)")
+    parser.add_argument("--allow-divergent", action="store_true",
+                        help="Reportar como advertencia los archivos editados a propósito en el ambiente")
+    parser.add_argument("--diff", action="store_true",
+                        help="Resumir por filas (agregadas/eliminadas/modificadas) los archivos que difieren")
+    parser.add_argument("--rescan", action="store_true",
+                        help="Recorrer el árbol aunque haya un snapshot reciente de sync-prod-dev.py")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Threads para hashear archivos (0 = default de ThreadPoolExecutor)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    targets = args.env or ["dev"]
+    checks = Checks()
+
+    print("=" * 75)
+    print("VERIFICACIÓN DE UNIFICACIÓN PROD ↔ " + " / ".join(env.upper() for env in targets))
+    print("=" * 75)
+
+    manifests = {env: SeedManifest(env, SEEDS_PATH) for env in [SOURCE_ENVIRONMENT] + targets}
+    pairs = discover_pairs(SEEDS_PATH, targets)
+    different = []
+    for number, target in enumerate(targets, 1):
         print()
-        print(f"{YELLOW}⚠️  Hay {len(warnings)} advertencias menores (no críticas){NC}")
-
-    exit(0)
-else:
-    print(f"{RED}❌ HAY {failed_checks} CHECKS FALLIDOS{NC}")
+        print(f"{number}. VERIFICANDO SEEDS PROD ↔ {target.upper()}")
+        print("-" * 75)
+        different += compare_pairs(checks, manifests, [pair for pair in pairs if pair.target == target],
+                                   args.allow_divergent, args.jobs or None)
+        if args.diff:
+            print_row_diffs([pair for pair in different if pair.target == target])
+    for manifest in manifests.values():
+        manifest.save()
+    hashed = sum(manifest.hashed for manifest in manifests.values())
+    print(f"{BLUE}ℹ{NC}  {hashed} archivos leídos (el resto coincidía con el manifiesto)")
+
+    print()
+    print(f"{len(targets) + 1}. VERIFICANDO ARCHIVOS CRÍTICOS DDL")
+    print("-" * 75)
+    for file_path, name in CRITICAL_DDL:
+        check_file_exists(checks, file_path, name)
+
+    print()
+    print(f"{len(targets) + 2}. VERIFICANDO SCRIPT create-database.sh")
+    print("-" * 75)
+    check_create_database(checks)
+
+    print()
+    print(f"{len(targets) + 3}. VERIFICANDO ARCHIVOS OBSOLETOS/TEMPORALES")
+    print("-" * 75)
+    check_obsolete(checks, 0 if args.rescan else SNAPSHOT_MAX_AGE)
+
+    print()
+    print("=" * 75)
+    print("RESUMEN")
+    print("=" * 75)
+    print()
+    print(f"Total de verificaciones: {checks.total}")
+    print(f"{GREEN}Pasadas: {checks.passed}{NC}")
+    print(f"{RED}Fallidas: {checks.failed}{NC}")
+
+    if checks.warnings:
+        print(f"{YELLOW}Advertencias: {len(checks.warnings)}{NC}")
+        for warning in checks.warnings:
+            print(f"  - {warning}")
+
+    print()
+
+    if checks.failed == 0:
+        print(f"{GREEN}✅ TODOS LOS CHECKS PASARON{NC}")
+        print(f"{GREEN}✅ Sistema listo para carga inicial limpia{NC}")
+
+        if checks.warnings:
+            print()
+            print(f"{YELLOW}⚠️  Hay {len(checks.warnings)} advertencias menores (no críticas){NC}")
+        return 0
+
+    print(f"{RED}❌ HAY {checks.failed} CHECKS FALLIDOS{NC}")
     print(f"{YELLOW}⚠️  Revisar archivos desincronizados antes de carga limpia{NC}")
-    exit(1)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())